@@ -0,0 +1,242 @@
+"""
+Analysis Cache Module
+=====================
+This module caches the results of document setup (type, summary and
+focus areas) so that popular documents cost no LLM calls to set up.
+
+Entries are stored in a local SQLite database keyed by:
+    - the SHA-256 of the document text
+    - the prompt template version (PROMPT_VERSION)
+    - the model the examiner prefers for these prompts
+
+Entries expire after a TTL, and the table is capped at a maximum number
+of rows, evicting the least recently used first.
+
+Dependencies:
+    - sqlite3 (standard library)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+# Bump when the analysis or focus area prompts change
+PROMPT_VERSION = 2
+
+
+def hash_text(text: str) -> str:
+    """
+    Compute the SHA-256 of a document's text.
+
+    Args:
+        text (str): Document text
+
+    Returns:
+        str: Hex digest
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """
+    SQLite-backed cache of document analysis and focus areas.
+
+    A short-lived connection is opened per operation, so a single cache
+    can be shared by threads and by several worker processes.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 5000):
+        """
+        Initialize the cache and create its table if needed.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+            ttl_seconds (float): Age after which an entry is ignored and evicted
+            max_entries (int): Maximum number of cached documents
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS document_analysis (
+                    cache_key TEXT PRIMARY KEY,
+                    document_analysis TEXT NOT NULL,
+                    document_type TEXT NOT NULL,
+                    focus_areas TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection, commit on success and always close it."""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(document_hash: str, model_name: str) -> str:
+        """
+        Build the cache key for a document.
+
+        Args:
+            document_hash (str): SHA-256 of the document text
+            model_name (str): Model the analysis is generated with
+
+        Returns:
+            str: Cache key
+        """
+        return f"{document_hash}:v{PROMPT_VERSION}:{model_name}"
+
+    def get(self, document_hash: str, model_name: str) -> Optional[Dict]:
+        """
+        Look up a cached analysis.
+
+        Args:
+            document_hash (str): SHA-256 of the document text
+            model_name (str): Model the analysis is generated with
+
+        Returns:
+            Optional[Dict]: 'document_analysis', 'document_type' and
+            'focus_areas', or None on a miss
+        """
+        key = self.make_key(document_hash, model_name)
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT document_analysis, document_type, focus_areas FROM document_analysis "
+                    "WHERE cache_key = ? AND created_at >= ?",
+                    (key, now - self.ttl_seconds)
+                ).fetchone()
+                if row:
+                    conn.execute("UPDATE document_analysis SET last_used = ? WHERE cache_key = ?", (now, key))
+        except sqlite3.Error as e:
+            print(f"Error reading analysis cache: {str(e)}")
+            row = None
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if not row:
+            return None
+        return {
+            'document_analysis': row[0],
+            'document_type': row[1],
+            'focus_areas': json.loads(row[2])
+        }
+
+    def put(self, document_hash: str, model_name: str, document_analysis: str,
+            document_type: str, focus_areas: List[str]):
+        """
+        Store the analysis of a document.
+
+        Args:
+            document_hash (str): SHA-256 of the document text
+            model_name (str): Model the analysis is generated with
+            document_analysis (str): Type and summary response
+            document_type (str): Detected document type
+            focus_areas (List[str]): Generated focus areas
+        """
+        key = self.make_key(document_hash, model_name)
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO document_analysis "
+                    "(cache_key, document_analysis, document_type, focus_areas, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, document_analysis, document_type, json.dumps(focus_areas), now, now)
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            print(f"Error writing analysis cache: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop expired entries and the least recently used beyond max_entries."""
+        conn.execute("DELETE FROM document_analysis WHERE created_at < ?", (now - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM document_analysis WHERE cache_key IN ("
+            "SELECT cache_key FROM document_analysis ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics for monitoring.
+
+        Returns:
+            Dict: Hits, misses and number of cached documents
+        """
+        try:
+            with self._connect() as conn:
+                entries = conn.execute("SELECT COUNT(*) FROM document_analysis").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+
+# Process-wide cache shared by every examiner
+_shared_cache: Optional[AnalysisCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_analysis_cache() -> Optional[AnalysisCache]:
+    """
+    Get the process-wide analysis cache.
+
+    Environment variables:
+        ANALYSIS_CACHE_ENABLED: Set to "false" to disable caching (default true)
+        ANALYSIS_CACHE_PATH: SQLite file (default <tmp>/examiner_ai/analysis_cache.db)
+        ANALYSIS_CACHE_TTL_HOURS: Entry lifetime in hours (default 168)
+        ANALYSIS_CACHE_MAX_ENTRIES: Maximum cached documents (default 5000)
+
+    Returns:
+        Optional[AnalysisCache]: Shared cache, or None if disabled
+    """
+    global _shared_cache
+    if os.getenv('ANALYSIS_CACHE_ENABLED', 'true').lower() not in ('1', 'true', 'yes'):
+        return None
+
+    with _shared_lock:
+        if _shared_cache is None:
+            db_path = os.getenv(
+                'ANALYSIS_CACHE_PATH',
+                os.path.join(tempfile.gettempdir(), 'examiner_ai', 'analysis_cache.db')
+            )
+            try:
+                _shared_cache = AnalysisCache(
+                    db_path,
+                    ttl_seconds=float(os.getenv('ANALYSIS_CACHE_TTL_HOURS', '168')) * 3600,
+                    max_entries=int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', '5000'))
+                )
+            except (OSError, sqlite3.Error) as e:
+                print(f"Error opening analysis cache: {str(e)}")
+                return None
+        return _shared_cache
@@ -9,27 +9,22 @@ a seamless user experience.
 """
 
 import os
+import hmac
+import asyncio
 import gradio as gr
 from dotenv import load_dotenv
-from pdf_handler import PDFHandler
-from examiner_logic import create_examiner, ExaminerAI
-from typing import List, Tuple, Optional
-from datetime import datetime
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-import tempfile
+from session_manager import SessionRegistry, UserSession, create_registry
+from request_queue import QueueSettings, create_queue_settings
+from report_jobs import BATCH_FORMATS, get_report_jobs
+from instrumentation import serve_metrics
+from model_backends import uses_fake_backend
+from typing import AsyncIterator, List, Tuple, Optional
 
 # Load environment variables
 load_dotenv()
 
-# Global state
-examiner: Optional[ExaminerAI] = None
-pdf_handler: PDFHandler = PDFHandler()
-session_active: bool = False
+# Global state - one examiner/PDF handler pair per browser session
+registry: Optional[SessionRegistry] = None
 
 
 def initialize_app() -> str:
@@ -40,30 +35,68 @@ def initialize_app() -> str:
         str: Status message
     """
     try:
-        global examiner
+        global registry
         api_key = os.getenv('GEMINI_API_KEY')
         
-        if not api_key:
+        if not api_key and not uses_fake_backend():
             return "⚠️ Error: GEMINI_API_KEY not found. Please set it in your .env file."
         
-        examiner = create_examiner(api_key)
+        registry = create_registry(api_key)
+        if uses_fake_backend():
+            return "✅ Application initialized with the fake model backend (no API calls)."
         return "✅ Application initialized successfully!"
     except Exception as e:
         return f"⚠️ Error initializing application: {str(e)}"
 
 
-def process_pdf(pdf_file, num_questions: int) -> Tuple[str, str, str, str, str]:
+async def get_session(request: gr.Request) -> UserSession:
+    """
+    Get the examination session belonging to the calling browser session.
+    
+    A session that is not in memory is rehydrated from the session store,
+    so the lookup runs on a worker thread instead of the event loop.
+    
+    Args:
+        request: Gradio request carrying the session hash
+        
+    Returns:
+        UserSession: The caller's own examiner and PDF handler
+    """
+    if registry is None:
+        raise RuntimeError("Application not initialized. Please set GEMINI_API_KEY in your .env file.")
+    
+    session_id = request.session_hash if request is not None else None
+    return await asyncio.to_thread(registry.get, session_id or "default")
+
+
+async def checkpoint_session(session: UserSession):
+    """
+    Persist a session's progress after a turn, so a restarted (or another)
+    worker can resume it.
+    
+    Args:
+        session: The session to persist
+    """
+    if registry is not None:
+        await asyncio.to_thread(registry.checkpoint, session)
+
+
+async def process_pdf(pdf_file, num_questions: int, exam_mode: bool = False,
+                      request: gr.Request = None) -> Tuple[str, str, str, str, str]:
     """
     Process uploaded PDF file and start the examination.
     
     Args:
         pdf_file: Uploaded PDF file from Gradio
         num_questions: Number of questions for the examination
+        exam_mode: Collect all answers first and grade them together at the end
+        request: Gradio request identifying the user's session
         
     Returns:
         Tuple[str, str, str, str, str]: (Status message, initial chat message, error notification, model info, lifelines status)
     """
-    global session_active
+    session = await get_session(request)
+    examiner, pdf_handler = session.examiner, session.pdf_handler
     
     if pdf_file is None:
         return "Please upload a PDF file.", "", "", "", ""
@@ -76,7 +109,8 @@ def process_pdf(pdf_file, num_questions: int) -> Tuple[str, str, str, str, str]:
         import os
         document_title = os.path.splitext(os.path.basename(pdf_path))[0]
         
-        extracted_text = pdf_handler.extract_text(pdf_path)
+        # PDF parsing is CPU-bound, keep it off the event loop
+        extracted_text = await asyncio.to_thread(pdf_handler.extract_text, pdf_path)
         
         if not extracted_text or not pdf_handler.validate_content():
             return "❌ Error: Could not extract sufficient text from PDF. Please check if the PDF contains readable text.", "", "", "", ""
@@ -86,30 +120,42 @@ def process_pdf(pdf_file, num_questions: int) -> Tuple[str, str, str, str, str]:
         
         # Set total questions
         examiner.set_total_questions(num_questions)
+        examiner.set_exam_mode(exam_mode)
         
         # Get lifelines status
         lifelines_remaining, lifelines_total = examiner.get_lifelines_status()
         
         # Analyze document with AI
-        analysis, analysis_error = examiner.analyze_document(extracted_text, document_title)
+        analysis, analysis_error = await examiner.aanalyze_document(extracted_text, document_title)
         
         if analysis_error:
             return "❌ Analysis Failed", "", analysis_error, "", ""
         
-        session_active = True
+        # Exam mode: the whole question set in one request
+        if exam_mode:
+            _, questions_error = await examiner.agenerate_exam_questions()
+            if questions_error:
+                return "❌ Question Generation Failed", "", questions_error, "", ""
+        
+        session.session_active = True
         
         # Generate first question
-        first_question, question_error = examiner.generate_next_question()
+        first_question, question_error = await examiner.agenerate_next_question()
         
         if question_error:
-            session_active = False
+            session.session_active = False
             return "❌ Question Generation Failed", "", question_error, "", ""
         
+        # Start generating question 2 while the user answers question 1
+        await examiner.aprefetch_next_question()
+        
         # Get current model info
         current_model = examiner.get_current_model()
         model_info = f"🤖 **Current AI Model:** {current_model}"
         
         lifelines_status = f"🎯 **Lifelines Available:** {lifelines_remaining}/{lifelines_total}"
+        if exam_mode:
+            lifelines_status = "📝 **Exam Mode:** answers are graded together at the end"
         
         # Get document type and format it nicely
         doc_type = examiner.state.document_type
@@ -131,7 +177,7 @@ def process_pdf(pdf_file, num_questions: int) -> Tuple[str, str, str, str, str]:
 - Title: {document_title}
 - Type: {doc_type_display}
 - Pages: {summary.get('pages', 'N/A')}
-- Words: {summary.get('word_count', 'N/A')}
+- Words: {summary.get('word_count', 'N/A')}{' (first pages only)' if summary.get('truncated') else ''}
 - Total Questions: {num_questions}
 - Lifelines: {lifelines_remaining}/{lifelines_total}
 
@@ -144,70 +190,101 @@ def process_pdf(pdf_file, num_questions: int) -> Tuple[str, str, str, str, str]:
         
         # Initial chat message with first question
         initial_chat = f"**Examiner:** {first_question}"
+        if exam_mode:
+            initial_chat = f"**Examiner:** 📝 Exam mode - your answers will be graded together once you have answered all {num_questions} questions.\n\n**Question 1 of {num_questions}:**\n{first_question}"
         
+        await checkpoint_session(session)
         return status_msg, initial_chat, "", model_info, lifelines_status
         
     except Exception as e:
         return f"❌ Error processing PDF: {str(e)}", "", "", "", ""
 
 
-def chat_with_examiner(message: str, history: List) -> Tuple[List, str, str, str, str, bool]:
+async def chat_with_examiner(message: str, history: List, request: gr.Request = None) -> AsyncIterator[Tuple[List, str, str, str, str, bool]]:
     """
     Handle conversation with the AI examiner.
     
+    The evaluation feedback is streamed into the chat while it is being
+    generated; the marks and the next question follow once it is complete.
+    
     Args:
         message: User's answer/message
         history: Chat history as list of [user, assistant] pairs
+        request: Gradio request identifying the user's session
         
-    Returns:
+    Yields:
         Tuple[List, str, str, str, str, bool]: (Updated history, cleared input, error notification, model info, lifelines status, show_retry)
     """
-    global session_active
+    session = await get_session(request)
+    examiner = session.examiner
     
-    if not session_active:
+    if not session.session_active:
         error_msg = "⚠️ Please upload and analyze a PDF document first."
-        return history, message, error_msg, "", "", False
+        yield history, message, error_msg, "", "", False
+        return
     
     if not message.strip():
         current_model = examiner.get_current_model()
         lifelines_remaining, lifelines_total = examiner.get_lifelines_status()
-        return history, message, "", f"🤖 **Current AI Model:** {current_model}", f"🎯 **Lifelines:** {lifelines_remaining}/{lifelines_total}", False
+        yield history, message, "", f"🤖 **Current AI Model:** {current_model}", f"🎯 **Lifelines:** {lifelines_remaining}/{lifelines_total}", False
+        return
     
     # Add user message to history
     history.append([message, None])
     
+    if examiner.state.exam_mode:
+        yield await answer_exam_question(session, message, history)
+        return
+    
     try:
-        # First, always evaluate the current answer
-        evaluation, eval_error = examiner.evaluate_answer(message)
+        # Make sure the next question is being generated while we evaluate
+        await examiner.aprefetch_next_question()
+        
+        # First, always evaluate the current answer - showing the feedback as it arrives
+        evaluation, eval_error = "", None
+        async for evaluation, eval_error in examiner.astream_evaluation(message):
+            if evaluation and not eval_error:
+                lifelines_remaining, lifelines_total = examiner.get_lifelines_status()
+                history[-1][1] = f"**Examiner:** {evaluation}"
+                yield history, "", "", f"🤖 **Current AI Model:** {examiner.get_current_model()}", f"🎯 **Lifelines:** {lifelines_remaining}/{lifelines_total}", False
         
         if eval_error:
             lifelines_remaining, lifelines_total = examiner.get_lifelines_status()
             # Remove the user message from history since we got an error
             history.pop()
-            return history, message, eval_error, f"🤖 **Current AI Model:** {examiner.get_current_model()}", f"🎯 **Lifelines:** {lifelines_remaining}/{lifelines_total}", True
+            yield history, message, eval_error, f"🤖 **Current AI Model:** {examiner.get_current_model()}", f"🎯 **Lifelines:** {lifelines_remaining}/{lifelines_total}", True
+            return
         
         # Check if this was the last question (after evaluation)
         if examiner.is_examination_complete():
             # Generate final summary
-            final_summary, summary_error = examiner.generate_final_summary()
+            final_summary, summary_error = await examiner.agenerate_final_summary()
             
             if summary_error:
                 lifelines_remaining, lifelines_total = examiner.get_lifelines_status()
-                return history, "", summary_error, f"🤖 **Current AI Model:** {examiner.get_current_model()}", f"🎯 **Lifelines:** {lifelines_remaining}/{lifelines_total}", True
+                yield history, "", summary_error, f"🤖 **Current AI Model:** {examiner.get_current_model()}", f"🎯 **Lifelines:** {lifelines_remaining}/{lifelines_total}", True
+                return
             
-            session_active = False
+            session.session_active = False
+            await checkpoint_session(session)
             # Show evaluation of last answer, then final summary
             response = f"{evaluation}\n\n---\n\n{final_summary}\n\n---\n✅ **Examination Complete!** You can now export the report or upload a new PDF to start another session."
             history[-1][1] = f"**Examiner:** {response}"
             lifelines_remaining, lifelines_total = examiner.get_lifelines_status()
-            return history, "", "", f"🤖 **Final Evaluation Model:** {examiner.get_current_model()}", f"🎯 **Lifelines Used:** {lifelines_total - lifelines_remaining}/{lifelines_total}", False
+            yield history, "", "", f"🤖 **Final Evaluation Model:** {examiner.get_current_model()}", f"🎯 **Lifelines Used:** {lifelines_total - lifelines_remaining}/{lifelines_total}", False
+            return
         
         # Generate next question (only if not complete)
-        next_question, question_error = examiner.generate_next_question()
+        next_question, question_error = await examiner.agenerate_next_question()
         
         if question_error:
             lifelines_remaining, lifelines_total = examiner.get_lifelines_status()
-            return history, "", question_error, f"🤖 **Current AI Model:** {examiner.get_current_model()}", f"🎯 **Lifelines:** {lifelines_remaining}/{lifelines_total}", True
+            yield history, "", question_error, f"🤖 **Current AI Model:** {examiner.get_current_model()}", f"🎯 **Lifelines:** {lifelines_remaining}/{lifelines_total}", True
+            return
+        
+        # Start on the question after this one while the user answers
+        await examiner.aprefetch_next_question()
+        await checkpoint_session(session)
         
         # Combine evaluation and next question
         response = f"{evaluation}\n\n---\n**Next Question:**\n{next_question}"
@@ -219,30 +296,86 @@ def chat_with_examiner(message: str, history: List) -> Tuple[List, str, str, str
         lifelines_remaining, lifelines_total = examiner.get_lifelines_status()
         lifelines_info = f"🎯 **Lifelines:** {lifelines_remaining}/{lifelines_total}"
         
-        return history, "", "", model_info, lifelines_info, False
+        yield history, "", "", model_info, lifelines_info, False
         
     except Exception as e:
         error_msg = f"❌ An unexpected error occurred: {str(e)}"
         lifelines_remaining, lifelines_total = examiner.get_lifelines_status()
         # Remove the user message from history since we got an error
         history.pop()
-        return history, message, error_msg, f"🤖 **Current AI Model:** {examiner.get_current_model()}", f"🎯 **Lifelines:** {lifelines_remaining}/{lifelines_total}", True
+        yield history, message, error_msg, f"🤖 **Current AI Model:** {examiner.get_current_model()}", f"🎯 **Lifelines:** {lifelines_remaining}/{lifelines_total}", True
 
 
-def use_lifeline(lifeline_type: str, history: List) -> Tuple[List, str, str, str]:
+async def answer_exam_question(session: UserSession, message: str, history: List) -> Tuple[List, str, str, str, str, bool]:
+    """
+    Record an answer in exam mode, grading the whole exam after the last one.
+    
+    Args:
+        session: The caller's session
+        message: User's answer
+        history: Chat history, ending with the user's message
+        
+    Returns:
+        Tuple[List, str, str, str, str, bool]: (Updated history, cleared input, error notification, model info, lifelines status, show_retry)
+    """
+    examiner = session.examiner
+    exam_status = "📝 **Exam Mode:** answers are graded together at the end"
+    
+    try:
+        examiner.record_exam_answer(message)
+        
+        # More questions to go - present the next one without any model call
+        if not examiner.is_exam_ready_for_grading():
+            next_question, question_error = await examiner.agenerate_next_question()
+            if question_error:
+                history.pop()
+                return history, "", question_error, f"🤖 **Current AI Model:** {examiner.get_current_model()}", exam_status, True
+            
+            await checkpoint_session(session)
+            current, total = examiner.get_progress()
+            history[-1][1] = f"**Examiner:** ✅ Answer recorded.\n\n---\n**Question {current} of {total}:**\n{next_question}"
+            return history, "", "", f"🤖 **Current AI Model:** {examiner.get_current_model()}", exam_status, False
+        
+        # All answered - grade everything in one request
+        results, grade_error = await examiner.agrade_exam()
+        
+        if grade_error:
+            # Keep the answer in the input so Retry can grade again
+            history.pop()
+            return history, message, grade_error, f"🤖 **Current AI Model:** {examiner.get_current_model()}", exam_status, True
+        
+        session.session_active = False
+        await checkpoint_session(session)
+        response = f"{results}\n\n---\n✅ **Examination Complete!** You can now export the report or upload a new PDF to start another session."
+        history[-1][1] = f"**Examiner:** {response}"
+        return history, "", "", f"🤖 **Grading Model:** {examiner.get_current_model()}", exam_status, False
+        
+    except Exception as e:
+        history.pop()
+        return history, message, f"❌ An unexpected error occurred: {str(e)}", f"🤖 **Current AI Model:** {examiner.get_current_model()}", exam_status, True
+
+
+async def use_lifeline(lifeline_type: str, history: List, request: gr.Request = None) -> Tuple[List, str, str, str]:
     """
     Handle lifeline usage (rephrase or new question).
     
     Args:
         lifeline_type: 'rephrase' or 'new'
         history: Chat history
+        request: Gradio request identifying the user's session
         
     Returns:
         Tuple[List, str, str, str]: (Updated history, error, model info, lifelines status)
     """
-    if not session_active:
+    session = await get_session(request)
+    examiner = session.examiner
+    
+    if not session.session_active:
         return history, "⚠️ Please start an examination first.", "", ""
     
+    if examiner.state.exam_mode:
+        return history, "⚠️ Lifelines are not available in exam mode.", f"🤖 **Current AI Model:** {examiner.get_current_model()}", "📝 **Exam Mode:** answers are graded together at the end"
+    
     # Check if lifelines are available
     lifelines_remaining, lifelines_total = examiner.get_lifelines_status()
     
@@ -255,11 +388,15 @@ def use_lifeline(lifeline_type: str, history: List) -> Tuple[List, str, str, str
     
     try:
         # Generate new/rephrased question
-        question, error = examiner.generate_next_question()
+        question, error = await examiner.agenerate_next_question()
         
         if error:
             return history, error, f"🤖 **Current AI Model:** {examiner.get_current_model()}", f"🎯 **Lifelines:** {lifelines_remaining-1}/{lifelines_total}"
         
+        # The old prefetch was dropped with the lifeline - start a new one
+        await examiner.aprefetch_next_question()
+        await checkpoint_session(session)
+        
         # Add to history
         lifeline_msg = "🔄 **Rephrased Question**" if lifeline_type == "rephrase" else "🆕 **New Question**"
         history.append([None, f"**Examiner:** {lifeline_msg}\n\n{question}"])
@@ -274,200 +411,128 @@ def use_lifeline(lifeline_type: str, history: List) -> Tuple[List, str, str, str
         return history, f"❌ Error: {str(e)}", f"🤖 **Current AI Model:** {examiner.get_current_model()}", f"🎯 **Lifelines:** {lifelines_remaining}/{lifelines_total}"
 
 
-def reset_session() -> Tuple[str, List, str, str, str, str, bool]:
+async def reset_session(request: gr.Request = None) -> Tuple[str, List, str, str, str, str, bool]:
     """
     Reset the examination session.
     
+    Args:
+        request: Gradio request identifying the user's session
+        
     Returns:
         Tuple[str, List, str, str, str, str, bool]: (Status message, empty history, cleared input, cleared error, cleared model info, cleared lifelines, hide_retry)
     """
-    global session_active
+    session = await get_session(request)
+    
+    session.examiner.reset_state()
+    session.pdf_handler.reset()
+    session.session_active = False
     
-    examiner.reset_state()
-    pdf_handler.reset()
-    session_active = False
+    # Nothing left to resume - drop the stored checkpoint
+    await checkpoint_session(session)
     
     return "✅ Session reset successfully. Upload a new PDF to begin.", [], "", "", "", "", False
 
 
-def retry_last_action(message: str, history: List) -> Tuple[List, str, str, str, str, bool]:
+async def retry_last_action(message: str, history: List, request: gr.Request = None) -> AsyncIterator[Tuple[List, str, str, str, str, bool]]:
     """
     Retry the last failed action.
     
     Args:
         message: The last user message that failed
         history: Current chat history
+        request: Gradio request identifying the user's session
         
-    Returns:
+    Yields:
         Tuple[List, str, str, str, str, bool]: (Updated history, cleared input, error notification, model info, lifelines status, show_retry)
     """
     # Simply call chat_with_examiner again with the same message
-    return chat_with_examiner(message, history)
+    async for update in chat_with_examiner(message, history, request):
+        yield update
 
 
-def export_report() -> Tuple[str, Optional[str]]:
+async def export_report(request: gr.Request = None) -> Tuple[str, Optional[str]]:
     """
     Export the examination session as a PDF report.
     
+    The report is rendered by the background report workers, so exports
+    never hold up examination turns.
+    
+    Args:
+        request: Gradio request identifying the user's session
+        
     Returns:
         Tuple[str, Optional[str]]: (file_path, error_message)
     """
-    if not session_active and not examiner.state.questions_asked:
+    session = await get_session(request)
+    examiner = session.examiner
+    
+    if not session.session_active and not examiner.state.questions_asked:
         return None, "⚠️ No session data available. Complete an examination first."
     
     try:
-        # Get session data
-        session_data = examiner.get_session_data()
-        
-        # Create meaningful filename
-        doc_title = session_data['document_title'].replace(' ', '_')
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"Examination_Report_{doc_title}_{timestamp}.pdf"
-        
-        # Create temporary PDF file with meaningful name
-        import tempfile
-        temp_dir = tempfile.gettempdir()
-        temp_path = os.path.join(temp_dir, filename)
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(temp_path, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#2196F3'),
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        )
+        # Unchanged sessions reuse the report file rendered last time
+        job = get_report_jobs().submit(examiner.get_session_data())
+        return await asyncio.wrap_future(job.result), None
         
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#1976D2'),
-            spaceAfter=12,
-            spaceBefore=12,
-            fontName='Helvetica-Bold'
-        )
+    except Exception as e:
+        return None, f"⚠️ Error generating report: {str(e)}"
+
+
+def instructor_export_enabled() -> bool:
+    """
+    Check whether the instructor cohort export is configured.
+    
+    Returns:
+        bool: True if INSTRUCTOR_TOKEN is set
+    """
+    return bool(os.getenv('INSTRUCTOR_TOKEN'))
+
+
+async def export_cohort(token: str, export_format: str) -> AsyncIterator[Tuple[str, Optional[str]]]:
+    """
+    Export the reports of every live session as one ZIP or merged PDF.
+    
+    Progress is reported while the background workers render the reports.
+    
+    Args:
+        token: Instructor token, checked against INSTRUCTOR_TOKEN
+        export_format: 'zip' or 'pdf'
         
-        normal_style = styles['Normal']
-        normal_style.fontSize = 10
-        normal_style.leading = 14
-        
-        # Title
-        story.append(Paragraph("🎓 EXAMINATION REPORT", title_style))
-        story.append(Spacer(1, 0.2*inch))
-        
-        # Document Information
-        story.append(Paragraph("📄 Document Information", heading_style))
-        doc_info = [
-            ['Document Title:', session_data['document_title']],
-            ['Examination Date:', datetime.now().strftime('%B %d, %Y at %H:%M')],
-            ['Total Questions:', str(session_data['total_questions'])],
-        ]
-        doc_table = Table(doc_info, colWidths=[2*inch, 4*inch])
-        doc_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#E3F2FD')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-        ]))
-        story.append(doc_table)
-        story.append(Spacer(1, 0.3*inch))
-        
-        # Results Summary
-        story.append(Paragraph("📊 Results Summary", heading_style))
-        percentage = session_data['percentage']
-        status = session_data['status']
-        status_color = colors.green if status == 'PASS' else colors.red
-        
-        results = [
-            ['Total Marks:', f"{session_data['total_marks']}/{session_data['max_marks']}"],
-            ['Percentage:', f"{percentage:.1f}%"],
-            ['Status:', status],
-            ['Lifelines Used:', f"{session_data['lifelines_used']}/{session_data['lifelines_total']}"],
-        ]
-        results_table = Table(results, colWidths=[2*inch, 4*inch])
-        results_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#E8F5E9' if status == 'PASS' else '#FFEBEE')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('TEXTCOLOR', (1, 2), (1, 2), status_color),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 2), (1, 2), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-        ]))
-        story.append(results_table)
-        story.append(Spacer(1, 0.3*inch))
-        
-        # Overall Evaluation
-        if session_data.get('final_evaluation'):
-            story.append(Paragraph("🎓 Overall Evaluation", heading_style))
-            eval_text = session_data['final_evaluation'].replace('**', '')
-            story.append(Paragraph(eval_text, normal_style))
-            story.append(Spacer(1, 0.3*inch))
-        
-        # Question-wise Breakdown
-        story.append(Paragraph("📝 Question-wise Performance", heading_style))
-        
-        for i, (question, answer, evaluation, mark) in enumerate(zip(
-            session_data['questions'],
-            session_data['answers'],
-            session_data['evaluations'],
-            session_data['marks']
-        ), 1):
-            # Question
-            story.append(Paragraph(f"<b>Question {i}:</b>", normal_style))
-            story.append(Paragraph(question, normal_style))
-            story.append(Spacer(1, 0.1*inch))
-            
-            # Answer
-            story.append(Paragraph(f"<b>Your Answer:</b>", normal_style))
-            story.append(Paragraph(answer, normal_style))
-            story.append(Spacer(1, 0.1*inch))
-            
-            # Evaluation and Marks
-            story.append(Paragraph(f"<b>Evaluation:</b>", normal_style))
-            eval_clean = evaluation.replace('**', '')
-            story.append(Paragraph(eval_clean, normal_style))
-            
-            # Marks box
-            mark_color = colors.green if mark >= 7 else colors.orange if mark >= 4 else colors.red
-            marks_table = Table([[f"Marks: {mark}/10"]], colWidths=[6*inch])
-            marks_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), mark_color),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ]))
-            story.append(marks_table)
-            story.append(Spacer(1, 0.2*inch))
-            
-            if i < len(session_data['questions']):
-                story.append(Spacer(1, 0.1*inch))
+    Yields:
+        Tuple[str, Optional[str]]: (status_message, file_path)
+    """
+    expected = os.getenv('INSTRUCTOR_TOKEN', '')
+    if not expected or not hmac.compare_digest((token or '').encode(), expected.encode()):
+        yield "⚠️ Invalid instructor token.", None
+        return
+    
+    if registry is None:
+        yield "⚠️ Application not initialized.", None
+        return
+    
+    sessions = registry.snapshot_session_data()
+    if not sessions:
+        yield "⚠️ No sessions with answered questions to export.", None
+        return
+    
+    try:
+        jobs = get_report_jobs()
+        job = jobs.submit_batch(sessions, export_format if export_format in BATCH_FORMATS else 'zip')
         
-        # Build PDF
-        doc.build(story)
+        while not job.result.done():
+            status = jobs.get_status(job.job_id) or {}
+            yield f"⏳ Rendering reports: {status.get('completed', 0)}/{job.total}", None
+            await asyncio.sleep(0.5)
         
-        return temp_path, None
+        path = job.result.result()
+        status = jobs.get_status(job.job_id) or {}
+        message = f"✅ Exported {status.get('completed', job.total)} report(s)."
+        if status.get('failed'):
+            message += f" ⚠️ {status['failed']} report(s) could not be rendered."
+        yield message, path
         
     except Exception as e:
-        return None, f"⚠️ Error generating report: {str(e)}"
+        yield f"⚠️ Error exporting reports: {str(e)}", None
 
 
 # Custom CSS for better appearance
@@ -592,8 +657,14 @@ custom_css = """
 """
 
 # Build the Gradio interface
-def create_interface():
-    """Create and configure the Gradio interface."""
+def create_interface(queue_settings: Optional[QueueSettings] = None):
+    """
+    Create and configure the Gradio interface.
+    
+    Args:
+        queue_settings: Queue size and concurrency limits, defaults to the environment configuration
+    """
+    queue_settings = queue_settings or create_queue_settings()
     
     with gr.Blocks(
         css=custom_css, 
@@ -633,6 +704,12 @@ def create_interface():
                     info="Select how many questions you want (1-10)"
                 )
                 
+                exam_mode_input = gr.Checkbox(
+                    label="📝 Exam Mode",
+                    value=False,
+                    info="Answer every question first - all answers are graded together at the end"
+                )
+                
                 process_btn = gr.Button("📊 Analyze & Start Examination", variant="primary", size="lg")
                 
                 status_output = gr.Markdown(
@@ -650,6 +727,18 @@ def create_interface():
                 # Hidden file output for download
                 report_file = gr.File(label="Download Report", visible=False)
                 
+                # Cohort export - only shown when an instructor token is configured
+                with gr.Accordion("🧑‍🏫 Instructor Export", open=False, visible=instructor_export_enabled()):
+                    instructor_token = gr.Textbox(label="Instructor Token", type="password")
+                    cohort_format = gr.Radio(
+                        choices=[("ZIP of reports", "zip"), ("Merged PDF", "pdf")],
+                        value="zip",
+                        label="Format"
+                    )
+                    cohort_btn = gr.Button("📦 Export All Sessions", variant="secondary", size="sm")
+                    cohort_status = gr.Markdown("")
+                    cohort_file = gr.File(label="Download Reports")
+                
                 gr.Markdown("""
                 ### 📋 How it works:
                 1. **Upload** your PDF document
@@ -724,48 +813,67 @@ def create_interface():
         """)
         
         # Event handlers
-        def process_and_update(pdf_file, num_q):
-            status, initial_msg, error, model_info, lifelines_info = process_pdf(pdf_file, num_q)
+        async def process_and_update(pdf_file, num_q, exam_mode, request: gr.Request):
+            status, initial_msg, error, model_info, lifelines_info = await process_pdf(pdf_file, num_q, exam_mode, request)
             if initial_msg:
                 return status, [[None, initial_msg]], error, model_info, lifelines_info
             return status, [], error, model_info, lifelines_info
         
-        def export_and_download():
-            file_path, error = export_report()
+        async def export_and_download(request: gr.Request):
+            file_path, error = await export_report(request)
             if error:
                 return None, error
             return file_path, ""
         
+        async def rephrase_question(history, request: gr.Request):
+            return await use_lifeline("rephrase", history, request)
+        
+        async def new_question(history, request: gr.Request):
+            return await use_lifeline("new", history, request)
+        
         # Process PDF - only update outputs that change, keeping others static
         process_btn.click(
             fn=process_and_update,
-            inputs=[pdf_input, num_questions],
+            inputs=[pdf_input, num_questions, exam_mode_input],
             outputs=[status_output, chatbot, error_notification, model_indicator, lifelines_status],
-            show_progress="minimal"
+            show_progress="minimal",
+            **queue_settings.event_options('setup')
         )
         
         export_btn.click(
             fn=export_and_download,
             outputs=[report_file, error_notification],
-            show_progress="minimal"
+            show_progress="minimal",
+            **queue_settings.event_options('export')
         ).then(
             fn=lambda: gr.File(visible=True),
-            outputs=[report_file]
+            outputs=[report_file],
+            **queue_settings.event_options('light')
+        )
+        
+        cohort_btn.click(
+            fn=export_cohort,
+            inputs=[instructor_token, cohort_format],
+            outputs=[cohort_status, cohort_file],
+            show_progress="minimal",
+            **queue_settings.event_options('export')
         )
         
         # Lifeline buttons - show loading only in chatbot
         rephrase_btn.click(
-            fn=lambda h: use_lifeline("rephrase", h),
+            fn=rephrase_question,
             inputs=[chatbot],
             outputs=[chatbot, error_notification, model_indicator, lifelines_status],
-            show_progress="minimal"
+            show_progress="minimal",
+            **queue_settings.event_options('chat')
         )
         
         new_question_btn.click(
-            fn=lambda h: use_lifeline("new", h),
+            fn=new_question,
             inputs=[chatbot],
             outputs=[chatbot, error_notification, model_indicator, lifelines_status],
-            show_progress="minimal"
+            show_progress="minimal",
+            **queue_settings.event_options('chat')
         )
         
         # Submit answer - immediate user message, then loading in chatbot only
@@ -773,46 +881,54 @@ def create_interface():
             fn=chat_with_examiner,
             inputs=[msg_input, chatbot],
             outputs=[chatbot, msg_input, error_notification, model_indicator, lifelines_status, retry_btn],
-            show_progress="minimal"
+            show_progress="minimal",
+            **queue_settings.event_options('chat')
         ).then(
             fn=lambda show_retry: gr.Button(visible=show_retry),
             inputs=[retry_btn],
-            outputs=[retry_btn]
+            outputs=[retry_btn],
+            **queue_settings.event_options('light')
         )
         
         submit_btn.click(
             fn=chat_with_examiner,
             inputs=[msg_input, chatbot],
             outputs=[chatbot, msg_input, error_notification, model_indicator, lifelines_status, retry_btn],
-            show_progress="minimal"
+            show_progress="minimal",
+            **queue_settings.event_options('chat')
         ).then(
             fn=lambda show_retry: gr.Button(visible=show_retry),
             inputs=[retry_btn],
-            outputs=[retry_btn]
+            outputs=[retry_btn],
+            **queue_settings.event_options('light')
         )
         
         retry_btn.click(
             fn=retry_last_action,
             inputs=[msg_input, chatbot],
             outputs=[chatbot, msg_input, error_notification, model_indicator, lifelines_status, retry_btn],
-            show_progress="minimal"
+            show_progress="minimal",
+            **queue_settings.event_options('chat')
         ).then(
             fn=lambda show_retry: gr.Button(visible=show_retry),
             inputs=[retry_btn],
-            outputs=[retry_btn]
+            outputs=[retry_btn],
+            **queue_settings.event_options('light')
         )
         
         reset_btn.click(
             fn=reset_session,
             outputs=[status_output, chatbot, msg_input, error_notification, model_indicator, lifelines_status, retry_btn],
-            show_progress="minimal"
+            show_progress="minimal",
+            **queue_settings.event_options('light')
         ).then(
             fn=lambda show_retry: gr.Button(visible=show_retry),
             inputs=[retry_btn],
-            outputs=[retry_btn]
+            outputs=[retry_btn],
+            **queue_settings.event_options('light')
         )
     
-    return demo
+    return queue_settings.apply(demo)
 
 
 # Main execution
@@ -830,13 +946,20 @@ if __name__ == "__main__":
         print("\nGet your API key at: https://makersuite.google.com/app/apikey")
         print("="*50 + "\n")
     
+    # Model call metrics for Prometheus (only when METRICS_PORT is set)
+    metrics_port = serve_metrics()
+    if metrics_port:
+        print(f"📈 Metrics available on port {metrics_port} at /metrics")
+    
     # Create and launch the interface
-    demo = create_interface()
+    queue_settings = create_queue_settings()
+    demo = create_interface(queue_settings)
     
     # Launch with configuration suitable for Hugging Face Spaces
     demo.launch(
         server_name="0.0.0.0",  # Listen on all interfaces (required for Docker/HF Spaces)
         server_port=7860,        # Default port for Gradio/HF Spaces
         share=False,             # Don't create a public link (HF Spaces handles this)
-        show_error=True          # Show detailed errors
+        show_error=True,         # Show detailed errors
+        **queue_settings.launch_options()
     )
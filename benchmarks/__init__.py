@@ -0,0 +1,5 @@
+"""
+Offline benchmarks for the examiner.
+
+Run from the repository root, e.g. ``python -m benchmarks.session_benchmark``.
+"""
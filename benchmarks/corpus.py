@@ -0,0 +1,225 @@
+"""
+Synthetic Document Corpus
+=========================
+Generates PDF documents with ReportLab for the benchmarks, so that runs
+are reproducible and need no real (possibly private) documents.
+
+Document kinds:
+    - text: a heading and paragraphs per page
+    - multicolumn: two text columns per page
+    - tables: a gridded table per page
+    - scanned: a page-sized noise image and no text layer, like a scan
+    - mixed: text, table and scanned pages in rotation
+
+Every document is written with a sidecar "<name>.pdf.txt" holding the
+text that was placed on its pages, so extraction yield can be measured.
+
+Dependencies:
+    - reportlab: PDF generation
+    - Pillow (installed with pdfplumber): images of scanned-like pages
+"""
+
+import io
+import os
+import random
+from typing import List, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import (
+    BaseDocTemplate, Flowable, Frame, FrameBreak, PageBreak, PageTemplate, Paragraph, SimpleDocTemplate, Table,
+    TableStyle
+)
+
+
+WORDS = (
+    "system model data network learning method results analysis design evaluation performance "
+    "approach framework training accuracy dataset baseline architecture layer feature optimization "
+    "experiment hypothesis sample variance regression signal protocol latency throughput memory "
+    "security privacy user interface requirement implementation module testing deployment cost"
+).split()
+
+DOCUMENT_KINDS = ('text', 'multicolumn', 'tables', 'scanned', 'mixed')
+
+STYLES = getSampleStyleSheet()
+
+
+def paragraph(rng: random.Random, sentences: int = 5) -> str:
+    """
+    Generate a paragraph of pseudo-academic sentences.
+
+    Args:
+        rng (random.Random): Random source
+        sentences (int): Number of sentences
+
+    Returns:
+        str: Paragraph text
+    """
+    out = []
+    for _ in range(sentences):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 18))]
+        out.append(" ".join(words).capitalize() + ".")
+    return " ".join(out)
+
+
+class ScannedPage(Flowable):
+    """A page-sized noise image without any text, like an image-only scan."""
+
+    def __init__(self, seed: int, width: float, height: float):
+        super().__init__()
+        self.seed = seed
+        self.width = width
+        self.height = height
+
+    def wrap(self, available_width, available_height):
+        return self.width, self.height
+
+    def draw(self):
+        from PIL import Image
+
+        rng = random.Random(self.seed)
+        image = Image.effect_noise((120, 170), 40 + rng.randint(0, 40)).convert('L')
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        buffer.seek(0)
+        self.canv.drawImage(ImageReader(buffer), 0, 0, self.width, self.height)
+
+
+def _text_page(rng: random.Random, number: int, paragraphs: int) -> Tuple[list, List[str]]:
+    """Flowables and text of a heading plus paragraphs."""
+    heading = f"Section {number}: {rng.choice(WORDS).title()} {rng.choice(WORDS)}"
+    texts = [paragraph(rng) for _ in range(paragraphs)]
+    story = [Paragraph(heading, STYLES['Heading2'])] + [Paragraph(text, STYLES['Normal']) for text in texts]
+    return story, [heading] + texts
+
+
+def _table_page(rng: random.Random, number: int, rows: int = 14) -> Tuple[list, List[str]]:
+    """Flowables and text of a gridded results table."""
+    heading = f"Table {number}: {rng.choice(WORDS).title()} results"
+    data = [["Experiment", "Model", "Dataset", "Accuracy", "Latency"]]
+    for row in range(rows):
+        data.append([
+            f"{rng.choice(WORDS)}-{row + 1}", rng.choice(WORDS), rng.choice(WORDS),
+            f"{rng.uniform(50, 99):.1f}", f"{rng.randint(5, 900)}ms"
+        ])
+    table = Table(data, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ]))
+    return [Paragraph(heading, STYLES['Heading2']), table], [heading] + [" ".join(row) for row in data]
+
+
+def build_story(kind: str, pages: int, seed: int, frame_size: Tuple[float, float]) -> Tuple[list, str]:
+    """
+    Build the flowables of a document.
+
+    Args:
+        kind (str): One of DOCUMENT_KINDS
+        pages (int): Number of pages
+        seed (int): Random seed
+        frame_size (Tuple[float, float]): Size of a full-page frame, for scanned pages
+
+    Returns:
+        Tuple[list, str]: (flowables, expected text)
+    """
+    rng = random.Random(seed)
+    story, expected = [], []
+    for page in range(pages):
+        page_kind = kind if kind != 'mixed' else ('text', 'tables', 'text', 'scanned')[page % 4]
+        if page_kind == 'scanned':
+            flowables, texts = [ScannedPage(seed * 100003 + page, *frame_size)], []
+        elif page_kind == 'tables':
+            flowables, texts = _table_page(rng, page + 1)
+        elif page_kind == 'multicolumn':
+            left, left_texts = _text_page(rng, page + 1, 3)
+            right, right_texts = _text_page(rng, page + 1, 3)
+            flowables, texts = left + [FrameBreak()] + right, left_texts + right_texts
+        else:
+            flowables, texts = _text_page(rng, page + 1, 6)
+        story.extend(flowables)
+        expected.extend(texts)
+        if page < pages - 1:
+            story.append(PageBreak())
+    return story, "\n".join(expected)
+
+
+def write_kind(path: str, kind: str = 'text', pages: int = 3, seed: int = 0) -> str:
+    """
+    Write a document of one kind, plus its expected-text sidecar.
+
+    Args:
+        path (str): Output file
+        kind (str): One of DOCUMENT_KINDS
+        pages (int): Number of pages
+        seed (int): Seed, so that the same seed gives the same document
+
+    Returns:
+        str: The output path
+
+    Raises:
+        ValueError: If the kind is unknown
+    """
+    if kind not in DOCUMENT_KINDS:
+        raise ValueError(f"Unknown document kind '{kind}', use one of {', '.join(DOCUMENT_KINDS)}")
+
+    margin = 2 * cm
+    width, height = A4[0] - 2 * margin, A4[1] - 2 * margin
+    if kind == 'multicolumn':
+        doc = BaseDocTemplate(path, pagesize=A4, leftMargin=margin, rightMargin=margin,
+                              topMargin=margin, bottomMargin=margin)
+        gap = 0.8 * cm
+        column = (width - gap) / 2
+        frames = [
+            Frame(margin, margin, column, height, id='left'),
+            Frame(margin + column + gap, margin, column, height, id='right'),
+        ]
+        doc.addPageTemplates([PageTemplate(id='columns', frames=frames)])
+    else:
+        doc = SimpleDocTemplate(path, pagesize=A4, leftMargin=margin, rightMargin=margin,
+                                topMargin=margin, bottomMargin=margin)
+
+    # Frames pad their content by 6pt on every side
+    story, expected = build_story(kind, pages, seed, (width - 12, height - 12))
+    doc.build(story)
+    with open(path + '.txt', 'w', encoding='utf-8') as f:
+        f.write(expected)
+    return path
+
+
+def write_document(path: str, seed: int = 0, pages: int = 3) -> str:
+    """
+    Write a text PDF with headings and paragraphs.
+
+    Args:
+        path (str): Output file
+        seed (int): Seed, so that the same seed gives the same text
+        pages (int): Number of pages
+
+    Returns:
+        str: The output path
+    """
+    return write_kind(path, 'text', pages, seed)
+
+
+def write_corpus(directory: str, count: int, pages: int = 3) -> List[str]:
+    """
+    Write `count` distinct text documents.
+
+    Args:
+        directory (str): Output directory (created if needed)
+        count (int): Number of documents
+        pages (int): Pages per document
+
+    Returns:
+        List[str]: Paths of the documents
+    """
+    os.makedirs(directory, exist_ok=True)
+    return [
+        write_document(os.path.join(directory, f"synthetic_document_{i:03d}.pdf"), seed=i, pages=pages)
+        for i in range(count)
+    ]
@@ -0,0 +1,349 @@
+"""
+PDF Extraction Benchmark
+========================
+Measures PDFHandler's extraction modes on a synthetic corpus (see
+benchmarks/corpus.py): wall time, peak RSS and text yield, with
+regression thresholds.
+
+Modes:
+    - pymupdf: PyMuPDF page streaming only
+    - pdfplumber: pdfplumber only
+    - auto: extract_text() as the app runs it, serially (per-page engine selection)
+    - unrouted: extract_text() without per-page routing (whole-document pdfplumber
+      fallback when PyMuPDF finds almost no text)
+    - parallel: extract_text() with page ranges split across worker processes
+    - bounded: extract_text() with a character budget (stops reading early)
+
+Each measurement runs in a fresh process, so peak RSS belongs to that
+extraction alone (worker processes of the parallel mode are not
+included). Yield is the share of the words placed on the pages that
+appear in the extracted text; line yield is the share of short lines
+(headings, table rows) found as whole lines, which shows whether table
+rows survive. Scanned-like pages have no text layer, so their documents
+only report the characters extracted.
+
+Thresholds (benchmarks/extraction_thresholds.json) set a minimum yield
+and line yield per document kind and mode, a maximum time per page per
+mode and kind (only on documents long enough for worker start-up not to
+dominate), a maximum time relative to another mode on the same document
+(per-page routing must never cost more than pdfplumber alone) and a peak
+RSS ceiling for the streaming modes. With --baseline, medians are also
+compared with an earlier --json run.
+
+Usage:
+    python -m benchmarks.extraction_benchmark --sizes 1,10,100 --check
+    python -m benchmarks.extraction_benchmark --sizes 1000 --modes pymupdf,auto,parallel --json after.json --baseline before.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import DOCUMENT_KINDS, write_kind
+
+
+MODES = ('pymupdf', 'pdfplumber', 'auto', 'unrouted', 'parallel', 'bounded')
+
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extraction_thresholds.json')
+
+# Baseline medians shorter than this are too noisy to compare
+MIN_COMPARABLE_SECONDS = 0.05
+
+# Expected lines up to this many words count towards the line yield
+MAX_LINE_WORDS = 12
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _words(text: str) -> Counter:
+    return Counter(re.findall(r'[a-z0-9]+', (text or "").lower()))
+
+
+def text_yield(extracted: str, expected: str) -> Optional[float]:
+    """
+    Share of the expected words found in the extracted text.
+
+    Args:
+        extracted (str): Extracted text
+        expected (str): Text placed on the pages
+
+    Returns:
+        Optional[float]: Recall between 0 and 1, or None if nothing was expected
+    """
+    expected_words = _words(expected)
+    total = sum(expected_words.values())
+    if not total:
+        return None
+    found = _words(extracted)
+    return sum(min(count, found[word]) for word, count in expected_words.items()) / total
+
+
+def line_yield(extracted: str, expected: str) -> Optional[float]:
+    """
+    Share of the short expected lines (headings, table rows) found as whole lines.
+
+    Args:
+        extracted (str): Extracted text
+        expected (str): Text placed on the pages, one heading/row/paragraph per line
+
+    Returns:
+        Optional[float]: Ratio between 0 and 1, or None without short lines
+    """
+    wanted = [" ".join(line.split()) for line in expected.splitlines() if 0 < len(line.split()) <= MAX_LINE_WORDS]
+    if not wanted:
+        return None
+    found = {" ".join(line.split()) for line in (extracted or "").splitlines()}
+    return sum(line in found for line in wanted) / len(wanted)
+
+
+def _extract(mode: str, pdf_path: str, workers: int, max_chars: int):
+    """Run one extraction mode, returning the text and the handler."""
+    from pdf_handler import PDFHandler
+
+    if mode == 'pymupdf':
+        handler = PDFHandler(use_cache=False, parallel_workers=1, page_routing=False)
+        return handler._extract_with_pymupdf(pdf_path), handler
+    if mode == 'pdfplumber':
+        handler = PDFHandler(use_cache=False, parallel_workers=1)
+        return handler._extract_with_pdfplumber(pdf_path), handler
+    if mode == 'parallel':
+        handler = PDFHandler(use_cache=False, parallel_workers=workers, parallel_min_pages=1)
+    elif mode == 'bounded':
+        handler = PDFHandler(use_cache=False, parallel_workers=1, max_chars=max_chars)
+    elif mode == 'unrouted':
+        handler = PDFHandler(use_cache=False, parallel_workers=1, page_routing=False)
+    else:
+        handler = PDFHandler(use_cache=False, parallel_workers=1)
+    return handler.extract_text(pdf_path), handler
+
+
+def measure(mode: str, pdf_path: str, repeats: int, workers: int, max_chars: int) -> Dict:
+    """
+    Time one mode on one document (runs in a fresh process).
+
+    Args:
+        mode (str): One of MODES
+        pdf_path (str): Document, with its expected-text sidecar next to it
+        repeats (int): Timed runs
+        workers (int): Worker processes for the parallel mode
+        max_chars (int): Character budget of the bounded mode
+
+    Returns:
+        Dict: median/min seconds, peak RSS, characters, yields and pages routed to pdfplumber
+    """
+    # Import cost is not part of the extraction
+    import pdf_handler  # noqa: F401
+
+    baseline_rss = _peak_rss_mb()
+    times, text, handler = [], "", None
+    for _ in range(max(1, repeats)):
+        start = time.perf_counter()
+        text, handler = _extract(mode, pdf_path, workers, max_chars)
+        text = text or ""
+        times.append(time.perf_counter() - start)
+
+    with open(pdf_path + '.txt', encoding='utf-8') as f:
+        expected = f.read()
+    score, lines = text_yield(text, expected), line_yield(text, expected)
+    # The bounded mode reads only the start of the document on purpose
+    if mode == 'bounded' and score is not None and len(text) < len(expected):
+        score = lines = None
+
+    from pdf_handler import _extraction_pool
+    if _extraction_pool is not None:
+        _extraction_pool.shutdown()
+
+    return {
+        'median_seconds': statistics.median(times),
+        'min_seconds': min(times),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'rss_growth_mb': round(_peak_rss_mb() - baseline_rss, 1),
+        'chars': len(text),
+        'yield': None if score is None else round(score, 4),
+        'line_yield': None if lines is None else round(lines, 4),
+        'routed_pages': len(handler.routed_pages),
+    }
+
+
+def build_corpus(directory: str, kinds: List[str], sizes: List[int]) -> Dict[str, str]:
+    """
+    Write (or reuse) one document per kind and size.
+
+    Args:
+        directory (str): Corpus directory
+        kinds (List[str]): Document kinds
+        sizes (List[int]): Page counts
+
+    Returns:
+        Dict[str, str]: "kind/pages" -> path
+    """
+    os.makedirs(directory, exist_ok=True)
+    documents = {}
+    for kind in kinds:
+        for pages in sizes:
+            path = os.path.join(directory, f"{kind}_{pages}.pdf")
+            if not (os.path.exists(path) and os.path.exists(path + '.txt')):
+                write_kind(path, kind, pages, seed=pages)
+            documents[f"{kind}/{pages}"] = path
+    return documents
+
+
+def check_results(results: List[Dict], thresholds: Dict, baseline: Optional[List[Dict]] = None,
+                  max_slowdown: float = 1.5) -> List[str]:
+    """
+    Compare results with the thresholds and an optional baseline run.
+
+    Args:
+        results (List[Dict]): Rows from run()
+        thresholds (Dict): 'min_yield' and 'min_line_yield' (kind -> mode -> ratio), 'max_ms_per_page'
+            (mode -> ms, or mode -> kind/'default' -> ms; checked from 'timing_min_pages' pages on),
+            'max_time_ratio' (mode -> other mode -> ratio of medians on the same document)
+            and 'max_peak_rss_mb' (mode -> MB)
+        baseline (Optional[List[Dict]]): Rows of an earlier run
+        max_slowdown (float): Allowed ratio of median time over the baseline
+
+    Returns:
+        List[str]: Violations, empty if everything passed
+    """
+    failures = []
+    previous = {(row['kind'], row['pages'], row['mode']): row for row in baseline or []}
+    current = {(row['kind'], row['pages'], row['mode']): row for row in results}
+    for row in results:
+        name = f"{row['kind']}/{row['pages']} {row['mode']}"
+        min_yield = thresholds.get('min_yield', {}).get(row['kind'], {}).get(row['mode'])
+        if min_yield is not None and row['yield'] is not None and row['yield'] < min_yield:
+            failures.append(f"{name}: yield {row['yield']:.3f} < {min_yield}")
+
+        min_lines = thresholds.get('min_line_yield', {}).get(row['kind'], {}).get(row['mode'])
+        if min_lines is not None and row['line_yield'] is not None and row['line_yield'] < min_lines:
+            failures.append(f"{name}: line yield {row['line_yield']:.3f} < {min_lines}")
+
+        max_ms = thresholds.get('max_ms_per_page', {}).get(row['mode'])
+        if isinstance(max_ms, dict):
+            max_ms = max_ms.get(row['kind'], max_ms.get('default'))
+        timed = row['pages'] >= thresholds.get('timing_min_pages', 1)
+        if max_ms is not None and timed and row['ms_per_page'] > max_ms:
+            failures.append(f"{name}: {row['ms_per_page']:.1f} ms/page > {max_ms}")
+
+        for other, max_ratio in thresholds.get('max_time_ratio', {}).get(row['mode'], {}).items():
+            reference = current.get((row['kind'], row['pages'], other))
+            if timed and reference and row['median_seconds'] > max_ratio * reference['median_seconds']:
+                ratio = row['median_seconds'] / reference['median_seconds']
+                failures.append(f"{name}: {ratio:.2f}x the time of {other} > {max_ratio}")
+
+        max_rss = thresholds.get('max_peak_rss_mb', {}).get(row['mode'])
+        if max_rss is not None and row['peak_rss_mb'] > max_rss:
+            failures.append(f"{name}: peak RSS {row['peak_rss_mb']:.0f} MB > {max_rss}")
+
+        before = previous.get((row['kind'], row['pages'], row['mode']))
+        if before and before['median_seconds'] >= MIN_COMPARABLE_SECONDS:
+            ratio = row['median_seconds'] / before['median_seconds']
+            if ratio > max_slowdown:
+                failures.append(f"{name}: {ratio:.2f}x slower than the baseline")
+    return failures
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.3f}"
+
+
+def run(documents: Dict[str, str], modes: List[str], repeats: int, workers: int, max_chars: int) -> List[Dict]:
+    """
+    Measure every mode on every document, each in a fresh process.
+
+    Args:
+        documents (Dict[str, str]): "kind/pages" -> path
+        modes (List[str]): Modes to measure
+        repeats (int): Timed runs per measurement
+        workers (int): Worker processes for the parallel mode
+        max_chars (int): Character budget of the bounded mode
+
+    Returns:
+        List[Dict]: One row per (document, mode)
+    """
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for name, path in documents.items():
+        kind, pages = name.split('/')
+        for mode in modes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                row = pool.submit(measure, mode, path, repeats, workers, max_chars).result()
+            row.update(kind=kind, pages=int(pages), mode=mode,
+                       ms_per_page=round(row['median_seconds'] * 1000 / int(pages), 2))
+            results.append(row)
+            print(f"{kind:<12}{pages:>6}  {mode:<11}{row['median_seconds']:>9.3f}{row['ms_per_page']:>10.2f}"
+                  f"{row['peak_rss_mb']:>9.1f}{row['chars']:>10}"
+                  f"{_fmt(row['yield']):>8}{_fmt(row['line_yield']):>8}{row['routed_pages']:>8}", flush=True)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark PDF extraction modes on a synthetic corpus.")
+    parser.add_argument("--kinds", default=",".join(DOCUMENT_KINDS), help="Document kinds (default: all)")
+    parser.add_argument("--sizes", default="1,10,100", help="Page counts, e.g. 1,10,100,1000 (default 1,10,100)")
+    parser.add_argument("--modes", default=",".join(MODES), help="Extraction modes (default: all)")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per measurement (default 3)")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Worker processes for the parallel mode")
+    parser.add_argument("--max-chars", type=int, default=20000, help="Character budget of the bounded mode")
+    parser.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), 'examiner_ai', 'extraction_corpus'),
+                        help="Where the corpus is written (reused between runs)")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS, help="Threshold file")
+    parser.add_argument("--baseline", help="Results of an earlier --json run to compare with")
+    parser.add_argument("--max-slowdown", type=float, default=1.5, help="Allowed slowdown over the baseline")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if a threshold is violated")
+    parser.add_argument("--json", dest="json_path", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    kinds = [kind for kind in args.kinds.split(',') if kind]
+    modes = [mode for mode in args.modes.split(',') if mode]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(unknown)}")
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+
+    print(f"Building corpus in {args.corpus_dir}...")
+    documents = build_corpus(args.corpus_dir, kinds, sizes)
+
+    print(f"\n{'kind':<12}{'pages':>6}  {'mode':<11}{'median s':>9}{'ms/page':>10}{'RSS MB':>9}{'chars':>10}{'yield':>8}{'lines':>8}{'routed':>8}")
+    results = run(documents, modes, args.repeats, args.workers, args.max_chars)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    with open(args.thresholds) as f:
+        thresholds = json.load(f)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    failures = check_results(results, thresholds, baseline, args.max_slowdown)
+    if failures:
+        print("\n⚠️ Threshold violations:")
+        for failure in failures:
+            print(f"  - {failure}")
+    else:
+        print("\n✅ All thresholds met")
+    return 1 if failures and args.check else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
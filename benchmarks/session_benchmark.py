@@ -0,0 +1,279 @@
+"""
+Session Benchmark
+=================
+Drives complete examination sessions through the app's own handlers
+(process_pdf -> N x chat_with_examiner -> export_report) against the fake
+model backend, at a configurable concurrency, and reports throughput and
+p50/p95/p99 latency per stage. No API quota is used.
+
+Stages:
+    - setup: PDF upload handling, analysis and the first question
+    - first_feedback: time until the first streamed evaluation update
+    - turn: a full answer turn (evaluation + next question)
+    - final_turn: the last answer turn (evaluation + final summary)
+    - export: PDF report
+    - session: the whole session
+
+The client-side rate limiter stays active, so by default a run also shows
+how the free-tier RPM limits queue requests; use --rpm-scale to lift them.
+
+Usage:
+    python -m benchmarks.session_benchmark --sessions 20 --concurrency 5 --questions 3
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import tempfile
+import time
+import types
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import write_corpus
+
+
+STAGES = ('setup', 'first_feedback', 'turn', 'final_turn', 'export', 'session')
+
+ANSWER = ("The document proposes a method and evaluates it against a baseline. Its results show better "
+          "performance, and the design trades memory for latency, which the analysis section justifies.")
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values (List[float]): Samples
+        q (float): Percentile between 0 and 100
+
+    Returns:
+        Optional[float]: The percentile, or None without samples
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Samples and error counts of a benchmark run.
+
+    Attributes:
+        samples: Stage -> durations in seconds
+        errors: Stage -> failed attempts
+        completed: Sessions that finished, including the export
+        failed: Sessions abandoned after an error
+        wall_seconds: Duration of the whole run
+    """
+    samples: Dict[str, List[float]] = field(default_factory=lambda: {stage: [] for stage in STAGES})
+    errors: Dict[str, int] = field(default_factory=lambda: {stage: 0 for stage in STAGES})
+    completed: int = 0
+    failed: int = 0
+    wall_seconds: float = 0.0
+
+    def summary(self) -> Dict:
+        """
+        Summarize the run.
+
+        Returns:
+            Dict: Throughput and per-stage count/errors/p50/p95/p99/mean/max
+        """
+        turns = len(self.samples['turn']) + len(self.samples['final_turn'])
+        stages = {}
+        for stage, values in self.samples.items():
+            stages[stage] = {
+                'count': len(values),
+                'errors': self.errors[stage],
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99),
+                'mean': sum(values) / len(values) if values else None,
+                'max': max(values) if values else None,
+            }
+        wall = max(self.wall_seconds, 1e-9)
+        return {
+            'sessions_completed': self.completed,
+            'sessions_failed': self.failed,
+            'wall_seconds': round(self.wall_seconds, 3),
+            'sessions_per_minute': round(self.completed * 60 / wall, 2),
+            'turns_per_second': round(turns / wall, 3),
+            'stages': stages,
+        }
+
+
+async def run_session(app, index: int, pdf_path: str, questions: int, retries: int, result: BenchmarkResult):
+    """
+    Run one examination session through the app handlers.
+
+    Args:
+        app: The imported app module
+        index (int): Session number, used for the session id
+        pdf_path (str): Document to upload
+        questions (int): Questions in the examination
+        retries (int): Times a failed turn is resent before the session is abandoned
+        result (BenchmarkResult): Where samples are recorded
+    """
+    request = types.SimpleNamespace(session_hash=f"benchmark-{index}")
+    session_start = time.perf_counter()
+    try:
+        start = time.perf_counter()
+        _, initial_msg, error, _, _ = await app.process_pdf(types.SimpleNamespace(name=pdf_path), questions, False, request)
+        if error or not initial_msg:
+            result.errors['setup'] += 1
+            result.failed += 1
+            return
+        result.samples['setup'].append(time.perf_counter() - start)
+
+        history = [[None, initial_msg]]
+        for turn in range(questions):
+            stage = 'final_turn' if turn == questions - 1 else 'turn'
+            for _ in range(retries + 1):
+                start, first, last = time.perf_counter(), None, None
+                async for update in app.chat_with_examiner(ANSWER, history, request):
+                    if first is None and not update[2]:
+                        first = time.perf_counter() - start
+                    last = update
+                if last is not None and not last[2]:
+                    break
+                result.errors[stage] += 1
+            else:
+                result.failed += 1
+                return
+            result.samples[stage].append(time.perf_counter() - start)
+            if first is not None:
+                result.samples['first_feedback'].append(first)
+
+        start = time.perf_counter()
+        path, error = await app.export_report(request)
+        if error or not path:
+            result.errors['export'] += 1
+            result.failed += 1
+            return
+        result.samples['export'].append(time.perf_counter() - start)
+
+        result.samples['session'].append(time.perf_counter() - session_start)
+        result.completed += 1
+    finally:
+        if app.registry is not None:
+            app.registry.remove(request.session_hash)
+
+
+async def run_benchmark(app, documents: List[str], sessions: int, concurrency: int,
+                        questions: int, retries: int) -> BenchmarkResult:
+    """
+    Run sessions with at most `concurrency` in flight.
+
+    Args:
+        app: The imported app module
+        documents (List[str]): Documents, used round-robin
+        sessions (int): Sessions to run
+        concurrency (int): Sessions in flight at once
+        questions (int): Questions per session
+        retries (int): Resends of a failed turn
+
+    Returns:
+        BenchmarkResult: Samples of the run
+    """
+    result = BenchmarkResult()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def limited(index: int):
+        async with semaphore:
+            await run_session(app, index, documents[index % len(documents)], questions, retries, result)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(i) for i in range(sessions)))
+    result.wall_seconds = time.perf_counter() - start
+    return result
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.3f}"
+
+
+def print_report(summary: Dict, call_stats: Dict):
+    """Print the run summary and the per-prompt-kind model latencies."""
+    print(f"\nSessions: {summary['sessions_completed']} completed, {summary['sessions_failed']} failed "
+          f"in {summary['wall_seconds']}s")
+    print(f"Throughput: {summary['sessions_per_minute']} sessions/min, {summary['turns_per_second']} turns/s\n")
+
+    print(f"{'stage':<16}{'count':>7}{'errors':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'mean':>9}{'max':>9}")
+    for stage, stats in summary['stages'].items():
+        print(f"{stage:<16}{stats['count']:>7}{stats['errors']:>8}{_fmt(stats['p50']):>9}{_fmt(stats['p95']):>9}"
+              f"{_fmt(stats['p99']):>9}{_fmt(stats['mean']):>9}{_fmt(stats['max']):>9}")
+
+    print(f"\n{'prompt kind':<22}{'attempts':>9}{'ok':>6}{'429':>6}{'404':>6}{'p50':>8}{'p95':>8}")
+    for kind, stats in sorted(call_stats.get('by_kind', {}).items()):
+        print(f"{kind:<22}{stats['attempts']:>9}{stats['success']:>6}{stats['rate_limited']:>6}{stats['not_found']:>6}"
+              f"{_fmt(stats.get('p50_seconds')):>8}{_fmt(stats.get('p95_seconds')):>8}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark full examination sessions against the fake model backend.")
+    parser.add_argument("--sessions", type=int, default=20, help="Sessions to run (default 20)")
+    parser.add_argument("--concurrency", type=int, default=5, help="Sessions in flight at once (default 5)")
+    parser.add_argument("--questions", type=int, default=3, help="Questions per session (default 3)")
+    parser.add_argument("--documents", type=int, default=5, help="Distinct synthetic documents (default 5)")
+    parser.add_argument("--pages", type=int, default=3, help="Pages per document (default 3)")
+    parser.add_argument("--latency", default="lognormal:1.5:0.4", help="Flash model latency distribution")
+    parser.add_argument("--premium-latency", default="lognormal:6:0.5", help="Premium model latency distribution")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Probability of an injected 429")
+    parser.add_argument("--rate-404", type=float, default=0.0, help="Probability of an injected 404")
+    parser.add_argument("--rpm-scale", type=float, default=1.0, help="Multiplier for the client-side RPM limits")
+    parser.add_argument("--retries", type=int, default=1, help="Resends of a failed turn (default 1)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the fake backend (default 1)")
+    parser.add_argument("--warm-caches", action="store_true",
+                        help="Keep the analysis/question/PDF caches enabled (default: disabled for cold runs)")
+    parser.add_argument("--json", dest="json_path", help="Also write the summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="examiner_benchmark_")
+    os.environ.update({
+        'MODEL_BACKEND': 'fake',
+        'FAKE_LATENCY': args.latency,
+        'FAKE_PREMIUM_LATENCY': args.premium_latency,
+        'FAKE_429_RATE': str(args.rate_429),
+        'FAKE_404_RATE': str(args.rate_404),
+        'FAKE_SEED': str(args.seed),
+        'RATE_LIMIT_RPM_SCALE': str(args.rpm_scale),
+        'REPORT_DIR': os.path.join(workdir, 'reports'),
+        'SESSION_STORE_PATH': os.path.join(workdir, 'sessions.db'),
+        'MAX_SESSIONS': str(max(500, args.sessions)),
+    })
+    if not args.warm_caches:
+        os.environ.update({'ANALYSIS_CACHE_ENABLED': 'false', 'QUESTION_BANK_ENABLED': 'false', 'PDF_CACHE_ENABLED': 'false'})
+
+    # Imported after the environment is set, since the app reads it on first use
+    import app
+    from instrumentation import get_call_metrics
+    from report_jobs import get_report_jobs
+
+    status = app.initialize_app()
+    if app.registry is None:
+        print(status)
+        return 1
+
+    documents = write_corpus(os.path.join(workdir, 'documents'), max(1, args.documents), args.pages)
+    print(f"Running {args.sessions} sessions x {args.questions} questions, concurrency {args.concurrency}...")
+    try:
+        result = asyncio.run(run_benchmark(app, documents, args.sessions, args.concurrency, args.questions, args.retries))
+    finally:
+        get_report_jobs().shutdown()
+
+    summary = result.summary()
+    call_stats = get_call_metrics().get_stats()
+    print_report(summary, call_stats)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(dict(summary, calls=call_stats, config=vars(args)), f, indent=2)
+    return 0 if result.completed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,13 +6,145 @@ It handles question generation, answer evaluation, and conversation management
 using Google's Gemini API.
 
 Dependencies:
-    - google.generativeai: For AI model interaction
+    - model_backends: Gemini models (or a local fake for benchmarks)
 """
 
 import os
-import google.generativeai as genai
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass, field
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+from dataclasses import dataclass, field, fields
+from rate_limiter import RateLimitScheduler, get_scheduler
+from analysis_cache import AnalysisCache, get_analysis_cache, hash_text
+from question_bank import QuestionBank, get_question_bank
+from retrieval import get_document_index
+from prompt_budget import CHARS_PER_TOKEN, TokenCounter, TokenUsage, create_token_counter, document_chars
+from instrumentation import CallMetrics, CallTimer, get_call_metrics
+from model_backends import ModelBackend, create_backend, uses_fake_backend
+from structured_output import (
+    DocumentAnalysis, Evaluation, ExamGrading, ExamQuestions, FocusAreas, ParseStats,
+    QuestionBankItems, ResponseParseError, build_repair_prompt, generation_config, get_parse_stats, parse_response,
+    partial_string_field
+)
+
+
+# Thread pool for background question prefetching in sync mode
+# (created on first use)
+_prefetch_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_prefetch_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool used for background prefetching in sync mode.
+    
+    Returns:
+        ThreadPoolExecutor: Shared prefetch executor
+    """
+    global _prefetch_executor
+    if _prefetch_executor is None:
+        _prefetch_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('EXAMINER_PREFETCH_WORKERS', '8')),
+            thread_name_prefix="question-prefetch"
+        )
+    return _prefetch_executor
+
+
+@dataclass
+class ConversationContext:
+    """
+    Previous Q&A shown to the model, maintained incrementally.
+    
+    Each answered turn is rendered once when it is added. Recent turns are
+    kept in full while they fit the token budget; older turns are compacted
+    into one-line digests (the question and the start of the answer), and
+    the oldest digests are dropped if even those outgrow the budget. The
+    rendered text is therefore bounded no matter how many questions are asked.
+    
+    Attributes:
+        token_budget: Approximate token budget for the whole context
+        digest_chars: Maximum length of a compacted turn
+        turns: Recent turns, rendered in full
+        digests: Older turns, compacted
+        omitted: Number of turns dropped entirely
+    """
+    token_budget: int = 1000
+    digest_chars: int = 200
+    turns: List[Tuple[str, str]] = field(default_factory=list)
+    digests: List[str] = field(default_factory=list)
+    omitted: int = 0
+    _turn_chars: int = 0
+    _digest_chars: int = 0
+    _rendered: Optional[str] = None
+    
+    def add_turn(self, number: int, question: str, answer: str):
+        """
+        Append an answered question.
+        
+        Args:
+            number (int): 1-based question number
+            question (str): Question asked
+            answer (str): Student's answer
+        """
+        entry = f"Q{number}: {question}\nA{number}: {answer}"
+        
+        # A single long answer may use at most half the budget
+        max_entry = self.token_budget * CHARS_PER_TOKEN // 2
+        if len(entry) > max_entry:
+            entry = entry[:max_entry - 3].rstrip() + "..."
+        self.turns.append((entry, self._digest(number, question, answer)))
+        self._turn_chars += len(entry)
+        self._compact()
+        self._rendered = None
+    
+    def _digest(self, number: int, question: str, answer: str) -> str:
+        """Compact one turn into a single bounded line."""
+        answer = " ".join(answer.split())
+        digest = f"Q{number}: {' '.join(question.split())} (answered: {answer})"
+        if len(digest) > self.digest_chars:
+            digest = digest[:self.digest_chars - 4].rstrip() + "...)"
+        return digest
+    
+    def _compact(self):
+        """Move the oldest full turns into digests until the context fits."""
+        budget = self.token_budget * CHARS_PER_TOKEN
+        
+        # Always keep the latest turn in full
+        while len(self.turns) > 1 and self._turn_chars + self._digest_chars > budget:
+            entry, digest = self.turns.pop(0)
+            self._turn_chars -= len(entry)
+            self.digests.append(digest)
+            self._digest_chars += len(digest)
+        
+        while self.digests and self._turn_chars + self._digest_chars > budget:
+            self._digest_chars -= len(self.digests.pop(0))
+            self.omitted += 1
+    
+    def render(self, pending_questions: Optional[List[Tuple[int, str]]] = None) -> str:
+        """
+        Get the previous Q&A section of a question prompt.
+        
+        Args:
+            pending_questions (Optional[List[Tuple[int, str]]]): (number, question)
+                pairs asked but not answered yet
+            
+        Returns:
+            str: Context text, empty if nothing has been asked
+        """
+        if self._rendered is None:
+            lines = []
+            if self.omitted:
+                lines.append(f"({self.omitted} earlier questions omitted)")
+            if self.digests:
+                lines.append("\n".join(self.digests))
+            lines.extend(entry for entry, _ in self.turns)
+            self._rendered = "\n\n".join(lines)
+        
+        pending = "\n\n".join(
+            f"Q{number}: {question}\nA{number}: (not answered yet)"
+            for number, question in (pending_questions or [])
+        )
+        body = "\n\n".join(part for part in (self._rendered, pending) if part)
+        return f"\n\nPrevious Q&A:\n{body}\n\n" if body else ""
 
 
 @dataclass
@@ -22,6 +154,7 @@ class ConversationState:
     
     Attributes:
         document_text: The extracted PDF content
+        document_hash: SHA-256 of document_text, used as a cache key
         questions_asked: List of questions already asked
         answers_given: List of answers provided by the user
         evaluations: List of evaluations for each answer
@@ -37,8 +170,12 @@ class ConversationState:
         lifelines_used: List of (question_index, lifeline_type) tuples
         awaiting_lifeline_response: Flag indicating if waiting for lifeline response
         last_lifeline_type: Type of last lifeline used ('rephrase' or 'new')
+        context: Previous Q&A for question prompts, bounded in size
+        exam_mode: Whether answers are collected first and graded together at the end
+        exam_questions: Pre-generated exam questions not yet presented
     """
     document_text: str = ""
+    document_hash: str = ""
     questions_asked: List[str] = field(default_factory=list)
     answers_given: List[str] = field(default_factory=list)
     evaluations: List[str] = field(default_factory=list)
@@ -55,6 +192,60 @@ class ConversationState:
     awaiting_lifeline_response: bool = False
     last_lifeline_type: str = ""
     final_evaluation: str = ""
+    context: ConversationContext = field(default_factory=lambda: ConversationContext(
+        token_budget=int(os.getenv('EXAMINER_CONTEXT_TOKENS', '1000'))
+    ))
+    exam_mode: bool = False
+    exam_questions: List[str] = field(default_factory=list)
+    
+    def record_answer(self, answer: str):
+        """
+        Store the answer to the oldest unanswered question.
+        
+        Args:
+            answer (str): Student's answer
+        """
+        self.answers_given.append(answer)
+        number = len(self.answers_given)
+        if number <= len(self.questions_asked):
+            self.context.add_turn(number, self.questions_asked[number - 1], answer)
+    
+    def to_dict(self) -> Dict:
+        """
+        Serialize the state for a checkpoint.
+        
+        The document text is left out: it is stored once per document_hash,
+        not once per session.
+        
+        Returns:
+            Dict: JSON-serializable state
+        """
+        data = {f.name: getattr(self, f.name) for f in fields(self) if f.name not in ('document_text', 'context')}
+        data['context'] = {f.name: getattr(self.context, f.name) for f in fields(self.context) if f.name != '_rendered'}
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict, document_text: str = "") -> "ConversationState":
+        """
+        Rebuild a state from a checkpoint.
+        
+        Args:
+            data (Dict): Output of to_dict(), possibly round-tripped through JSON
+            document_text (str): Text of the document the state refers to
+            
+        Returns:
+            ConversationState: The restored state
+        """
+        names = {f.name for f in fields(cls)} - {'document_text', 'context'}
+        state = cls(document_text=document_text, **{k: v for k, v in data.items() if k in names})
+        state.lifelines_used = [tuple(item) for item in state.lifelines_used]
+        
+        context = data.get('context')
+        if context:
+            context_names = {f.name for f in fields(ConversationContext)}
+            state.context = ConversationContext(**{k: v for k, v in context.items() if k in context_names})
+            state.context.turns = [tuple(turn) for turn in state.context.turns]
+        return state
 
 
 class ExaminerAI:
@@ -65,39 +256,139 @@ class ExaminerAI:
     generating questions, and evaluating answers using Google Gemini.
     """
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, rate_limiter: Optional[RateLimitScheduler] = None,
+                 parallel_setup: Optional[bool] = None, prefetch_questions: Optional[bool] = None,
+                 analysis_cache: Optional[AnalysisCache] = None,
+                 question_bank: Optional[QuestionBank] = None,
+                 use_retrieval: Optional[bool] = None,
+                 token_counter: Optional[TokenCounter] = None,
+                 parse_stats: Optional[ParseStats] = None,
+                 stream_responses: Optional[bool] = None,
+                 premium_fallback: Optional[bool] = None,
+                 hedge_after: Optional[float] = None,
+                 call_metrics: Optional[CallMetrics] = None,
+                 backend: Optional[ModelBackend] = None):
         """
         Initialize the ExaminerAI with Gemini API credentials.
         
         Args:
             api_key (str): Google Gemini API key
+            rate_limiter (Optional[RateLimitScheduler]): Scheduler for model quotas,
+                defaults to the process-wide scheduler
+            parallel_setup (Optional[bool]): Run document setup calls concurrently,
+                defaults to the EXAMINER_PARALLEL_SETUP environment variable
+            prefetch_questions (Optional[bool]): Generate the next question while the
+                user is answering, defaults to the EXAMINER_PREFETCH environment variable
+            analysis_cache (Optional[AnalysisCache]): Cache of document analyses,
+                defaults to the process-wide cache
+            question_bank (Optional[QuestionBank]): Pre-generated questions,
+                defaults to the process-wide bank
+            use_retrieval (Optional[bool]): Send the document chunks relevant to each
+                question instead of the start of the document, defaults to the
+                RETRIEVAL_ENABLED environment variable
+            token_counter (Optional[TokenCounter]): Counts prompt tokens and enforces
+                per-model input budgets, defaults to one configured from the environment
+            parse_stats (Optional[ParseStats]): Counters of structured response parsing,
+                defaults to the process-wide counters
+            stream_responses (Optional[bool]): Stream evaluations as they are generated,
+                defaults to the EXAMINER_STREAMING environment variable
+            premium_fallback (Optional[bool]): Fall back to the flash models when the premium
+                model fails, defaults to the PREMIUM_FALLBACK environment variable
+            hedge_after (Optional[float]): Seconds after which a slow premium request is hedged
+                with a fast-model request in async mode (0 disables), defaults to PREMIUM_HEDGE_SECONDS
+            call_metrics (Optional[CallMetrics]): Latency and outcome of every model call,
+                defaults to the process-wide metrics
+            backend (Optional[ModelBackend]): Creates the model objects, defaults to the
+                backend selected by the MODEL_BACKEND environment variable
         """
-        genai.configure(api_key=api_key)
+        self.backend = backend or create_backend(api_key)
         
         # Multiple models for different tasks and fallback
         # Models ordered by rate limits (higher RPM = better for fallback)
         
         # Primary model for quick Q&A (10 RPM)
-        self.primary_model = genai.GenerativeModel('gemini-2.5-flash')
+        self.primary_model = self.backend.model('gemini-2.5-flash')
         self.primary_model_name = "gemini-2.5-flash"
         
         # Fallback models in order of preference (by RPM)
         self.fallback_models = [
-            (genai.GenerativeModel('gemini-2.0-flash-lite'), "gemini-2.0-flash-lite", "30 RPM"),
-            (genai.GenerativeModel('gemini-2.5-flash-lite'), "gemini-2.5-flash-lite", "15 RPM"),
-            (genai.GenerativeModel('gemini-2.0-flash'), "gemini-2.0-flash", "15 RPM"),
+            (self.backend.model('gemini-2.0-flash-lite'), "gemini-2.0-flash-lite", "30 RPM"),
+            (self.backend.model('gemini-2.5-flash-lite'), "gemini-2.5-flash-lite", "15 RPM"),
+            (self.backend.model('gemini-2.0-flash'), "gemini-2.0-flash", "15 RPM"),
         ]
         
         # Premium model for final evaluation (3 RPM - most powerful)
-        self.premium_model = genai.GenerativeModel('gemini-2.5-pro')
+        self.premium_model = self.backend.model('gemini-2.5-pro')
         self.premium_model_name = "gemini-2.5-pro"
         
+        # Premium requests fall back to the flash models, strongest first
+        fallbacks = {name: (model, name, rpm) for model, name, rpm in self.fallback_models}
+        self.premium_fallback_models = [(self.primary_model, self.primary_model_name, "15 RPM")] + [
+            fallbacks[name] for name in ("gemini-2.0-flash", "gemini-2.5-flash-lite", "gemini-2.0-flash-lite")
+        ]
+        if premium_fallback is None:
+            premium_fallback = os.getenv('PREMIUM_FALLBACK', 'true').lower() in ('1', 'true', 'yes')
+        self.premium_fallback = premium_fallback
+        
+        # Hedge slow premium requests with a fast model (bounded tail latency)
+        if hedge_after is None:
+            hedge_after = float(os.getenv('PREMIUM_HEDGE_SECONDS', '0'))
+        self.hedge_after = hedge_after
+        self.hedge_grace = float(os.getenv('PREMIUM_HEDGE_GRACE', '0'))
+        
         # Track current model being used
         self.current_model_name = self.primary_model_name
         
+        # Client-side rate limiting, shared across sessions by default
+        self.rate_limiter = rate_limiter or get_scheduler()
+        
+        # Document analysis and focus areas, shared across sessions
+        self.analysis_cache = analysis_cache or get_analysis_cache()
+        
+        # Pre-generated questions served instead of live generation
+        self.question_bank = question_bank or get_question_bank()
+        self._bank_available = False
+        self._bank_seen: List[str] = []
+        self._bank_rephrasings: Dict[str, str] = {}
+        
+        # Issue classification, focus areas and question 1 concurrently
+        if parallel_setup is None:
+            parallel_setup = os.getenv('EXAMINER_PARALLEL_SETUP', 'true').lower() in ('1', 'true', 'yes')
+        self.parallel_setup = parallel_setup
+        
+        # Generate the next question in the background while the user answers
+        if prefetch_questions is None:
+            prefetch_questions = os.getenv('EXAMINER_PREFETCH', 'true').lower() in ('1', 'true', 'yes')
+        self.prefetch_questions = prefetch_questions
+        
+        # Pick relevant chunks from the whole document for each prompt
+        if use_retrieval is None:
+            use_retrieval = os.getenv('RETRIEVAL_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.use_retrieval = use_retrieval
+        self.retrieval_top_k = int(os.getenv('RETRIEVAL_TOP_K', '3'))
+        
+        # Prompt budgets and per-session token usage
+        self.token_counter = token_counter or create_token_counter()
+        self.token_usage = TokenUsage()
+        
+        # JSON responses: validation failures get a bounded number of repair requests
+        self.parse_stats = parse_stats or get_parse_stats()
+        self.repair_attempts = int(os.getenv('STRUCTURED_REPAIR_ATTEMPTS', '1'))
+        
+        # Per-attempt latency, tokens, outcome and fallback depth
+        self.call_metrics = call_metrics or get_call_metrics()
+        
+        # Show evaluation feedback while it is being generated
+        if stream_responses is None:
+            stream_responses = os.getenv('EXAMINER_STREAMING', 'true').lower() in ('1', 'true', 'yes')
+        self.stream_responses = stream_responses
+        
         # Conversation state
         self.state = ConversationState()
         
+        # Question generated ahead of time: (question_index, question or pending request)
+        self._prefetched_question: Optional[Tuple[int, Union[str, Future, asyncio.Task]]] = None
+        
         # System personality
         self.examiner_personality = """You are a professional academic examiner with a friendly yet formal demeanor.
 Your role is to:
@@ -108,299 +399,1412 @@ Your role is to:
 - Be encouraging but maintain academic rigor
 Keep responses concise and focused."""
     
-    def _generate_with_fallback(self, prompt: str, use_premium: bool = False) -> Tuple[str, Optional[str]]:
+    def _models_to_try(self, use_premium: bool = False) -> List[Tuple]:
         """
-        Generate content with automatic fallback to alternative models.
+        Get the ordered list of models to try for a request.
         
         Args:
-            prompt (str): The prompt to send to the model
             use_premium (bool): Whether to use the premium model first
             
         Returns:
-            Tuple[str, Optional[str]]: (generated_text, error_message)
+            List[Tuple]: (model, model_name, rpm_limit) tuples in order of preference
         """
         if use_premium:
-            models_to_try = [(self.premium_model, self.premium_model_name, "3 RPM")]
-        else:
-            models_to_try = [(self.primary_model, self.primary_model_name, "15 RPM")] + self.fallback_models
-        
-        last_error = None
-        for i, (model, model_name, rpm_limit) in enumerate(models_to_try):
-            try:
-                self.current_model_name = model_name  # Track current model
-                response = model.generate_content(prompt)
-                return response.text, None
-            except Exception as e:
-                error_str = str(e)
-                last_error = error_str
-                
-                # Check if it's a rate limit error
-                if "429" in error_str or "quota" in error_str.lower() or "rate limit" in error_str.lower():
-                    if i < len(models_to_try) - 1:
-                        # Try next model
-                        next_model_name = models_to_try[i + 1][1]
-                        continue
-                    else:
-                        return "", f"⚠️ **Rate Limit Reached** - All available models have hit their rate limits. Please wait a moment and try again.\n\n*Tip: The models have limits of {rpm_limit} requests per minute.*"
-                
-                # Check if it's a model not found error
-                elif "404" in error_str or "not found" in error_str.lower():
-                    if i < len(models_to_try) - 1:
-                        continue
-                    else:
-                        return "", "⚠️ **Model Error** - The AI model is temporarily unavailable. Please try again."
-                
-                # Other errors
-                else:
-                    if i < len(models_to_try) - 1:
-                        continue
-                    else:
-                        return "", f"⚠️ **AI Error** - An unexpected error occurred: {error_str}"
-        
-        return "", f"⚠️ **Service Unavailable** - Unable to connect to AI service. Error: {last_error}"
+            premium = [(self.premium_model, self.premium_model_name, "3 RPM")]
+            return premium + (self.premium_fallback_models if self.premium_fallback else [])
+        return [(self.primary_model, self.primary_model_name, "15 RPM")] + self.fallback_models
     
-    def get_current_model(self) -> str:
+    @staticmethod
+    def _is_rate_limit_error(error_str: str) -> bool:
         """
-        Get the name of the currently active model.
+        Check whether an error means the model's quota is exhausted.
         
+        Args:
+            error_str (str): Error raised by the model
+            
         Returns:
-            str: Current model name
+            bool: True for rate limit / quota errors
         """
-        return self.current_model_name
+        return "429" in error_str or "quota" in error_str.lower() or "rate limit" in error_str.lower()
     
-    def is_examination_complete(self) -> bool:
+    def _record_model_failure(self, model_name: str, error_str: str):
         """
-        Check if all questions have been asked.
+        Report a failed request to the rate limit scheduler.
         
-        Returns:
-            bool: True if all questions have been asked
+        Args:
+            model_name (str): Model that failed
+            error_str (str): Error raised by the model
         """
-        return self.state.current_question_index >= self.state.total_questions
+        if self._is_rate_limit_error(error_str):
+            self.rate_limiter.record_rate_limited(model_name, error_str)
+        else:
+            self.rate_limiter.record_error(model_name)
     
-    def set_total_questions(self, total: int):
+    def _call_timer(self, model_name: str, kind: str, models: List[Tuple], remaining: List[Tuple],
+                    streamed: bool = False) -> CallTimer:
         """
-        Set the total number of questions for the examination.
+        Start timing an attempt on a model.
         
         Args:
-            total (int): Number of questions (1-10)
+            model_name (str): Model the request is sent to
+            kind (str): Prompt kind
+            models (List[Tuple]): All models of the request
+            remaining (List[Tuple]): Models not tried yet
+            streamed (bool): Whether the response is streamed
+            
+        Returns:
+            CallTimer: Records the attempt when it finishes
         """
-        if 1 <= total <= 10:
-            self.state.total_questions = total
-            # Calculate lifelines (20% of total questions, minimum 1)
-            self.state.lifelines_total = max(1, int(total * 0.2))
-            self.state.lifelines_remaining = self.state.lifelines_total
+        depth = len(models) - len(remaining) - 1
+        return CallTimer(self.call_metrics, model_name, kind, depth, streamed)
     
-    def use_lifeline(self, lifeline_type: str) -> bool:
+    def _fallback_error_message(self, error_str: str, rpm_limit: str) -> str:
         """
-        Use a lifeline (rephrase or new question).
+        Build the user-facing error message once every model has failed.
         
         Args:
-            lifeline_type (str): 'rephrase' or 'new'
+            error_str (str): Error raised by the last model tried
+            rpm_limit (str): Rate limit of the last model tried
             
         Returns:
-            bool: True if lifeline was used successfully
+            str: Formatted error message
         """
-        if self.state.lifelines_remaining > 0:
-            self.state.lifelines_remaining -= 1
-            self.state.lifelines_used.append((self.state.current_question_index - 1, lifeline_type))
-            self.state.awaiting_lifeline_response = True
-            self.state.last_lifeline_type = lifeline_type
-            return True
-        return False
+        # Check if it's a rate limit error
+        if self._is_rate_limit_error(error_str):
+            return f"⚠️ **Rate Limit Reached** - All available models have hit their rate limits. Please wait a moment and try again.\n\n*Tip: The models have limits of {rpm_limit} requests per minute.*"
+        
+        # Check if it's a model not found error
+        elif "404" in error_str or "not found" in error_str.lower():
+            return "⚠️ **Model Error** - The AI model is temporarily unavailable. Please try again."
+        
+        # Other errors
+        return f"⚠️ **AI Error** - An unexpected error occurred: {error_str}"
     
-    def get_lifelines_status(self) -> Tuple[int, int]:
+    def _generate_with_fallback(self, prompt: str, use_premium: bool = False, kind: str = "other",
+                                generation_config: Optional[Dict] = None) -> Tuple[str, Optional[str]]:
         """
-        Get lifelines status.
+        Generate content with automatic fallback to alternative models.
+        
+        The prompt is trimmed to each model's input budget before sending,
+        and the tokens of the successful call are added to token_usage.
         
+        Args:
+            prompt (str): The prompt to send to the model
+            use_premium (bool): Whether to use the premium model first
+            kind (str): Prompt kind used for token accounting
+            generation_config (Optional[Dict]): SDK generation config, e.g. a JSON response schema
+            
         Returns:
-            Tuple[int, int]: (remaining, total)
+            Tuple[str, Optional[str]]: (generated_text, error_message)
         """
-        return (self.state.lifelines_remaining, self.state.lifelines_total)
+        text, error, _ = self._generate_on(self._models_to_try(use_premium), prompt, kind, generation_config)
+        return text, error
     
-    def _get_generic_focus_areas(self) -> List[str]:
+    def _generate_on(self, models: List[Tuple], prompt: str, kind: str,
+                     generation_config: Optional[Dict] = None) -> Tuple[str, Optional[str], str]:
         """
-        Get generic focus areas that work for any document type.
+        Try a list of models in order until one succeeds.
         
+        Args:
+            models (List[Tuple]): (model, model_name, rpm_limit) tuples in order of preference
+            prompt (str): The prompt to send to the model
+            kind (str): Prompt kind used for token accounting
+            generation_config (Optional[Dict]): SDK generation config
+            
         Returns:
-            List[str]: Generic focus areas
+            Tuple[str, Optional[str], str]: (generated_text, error_message, model_name)
         """
-        return [
-            "the main topic and central purpose — what is this document about and why does it matter?",
-            "the scope and boundaries — what is included, what is excluded, and what are the limitations?",
-            "the key points, arguments, or findings — what are the main claims, conclusions, or discoveries?",
-            "the evidence, methods, or reasoning — how are conclusions supported and validated?",
-            "the implications, significance, and future directions — what impact does this have and what comes next?"
-        ]
+        remaining = list(models)
+        
+        last_error = None
+        model_name = ""
+        while remaining:
+            # Skip models the scheduler knows are saturated (waits briefly if all are)
+            index = self.rate_limiter.acquire([(name, rpm) for _, name, rpm in remaining])
+            if index is None:
+                return "", self._fallback_error_message("429 rate limit", remaining[-1][2]), model_name
+            
+            model, model_name, rpm_limit = remaining.pop(index)
+            timer = self._call_timer(model_name, kind, models, remaining)
+            try:
+                self.current_model_name = model_name  # Track current model
+                sent = self.token_counter.fit(prompt, model_name, model)
+                response = model.generate_content(sent, generation_config=generation_config)
+                self.rate_limiter.record_success(model_name)
+                timer.success(self.token_usage.record(model_name, kind, sent, response))
+                return response.text, None, model_name
+            except Exception as e:
+                last_error = str(e)
+                timer.failure(last_error)
+                self._record_model_failure(model_name, last_error)
+                
+                # Try the next model; only report once all have failed
+                if remaining:
+                    continue
+                return "", self._fallback_error_message(last_error, rpm_limit), model_name
+        
+        return "", f"⚠️ **Service Unavailable** - Unable to connect to AI service. Error: {last_error}", model_name
     
-    def _generate_focus_areas_from_document(self) -> Tuple[List[str], Optional[str]]:
+    async def agenerate_with_fallback(self, prompt: str, use_premium: bool = False, kind: str = "other",
+                                      generation_config: Optional[Dict] = None) -> Tuple[str, Optional[str]]:
         """
-        Generate dynamic focus areas based on document type and content.
+        Async variant of _generate_with_fallback using the SDK's async API.
         
+        The request is awaited on the running event loop, so no worker
+        thread is held while the model is generating.
+        
+        Args:
+            prompt (str): The prompt to send to the model
+            use_premium (bool): Whether to use the premium model first
+            kind (str): Prompt kind used for token accounting
+            generation_config (Optional[Dict]): SDK generation config, e.g. a JSON response schema
+            
         Returns:
-            Tuple[List[str], Optional[str]]: (focus_areas, error_message)
+            Tuple[str, Optional[str]]: (generated_text, error_message)
         """
-        prompt = f"""{self.examiner_personality}
-
-You are preparing examination questions for a student who has READ this document.
-
-Document Type: {self.state.document_type}
-Document Content (excerpt):
-{self.state.document_text[:2500]}...
-
-Generate EXACTLY 5 focus areas that examination questions should cover.
-
-CRITICAL: Focus areas must be about the SUBJECT MATTER/CONTENT, NOT about:
-- Document formatting or structure
-- Author/submitter details
-- Page numbers or layout
-- Metadata or administrative information
-
-Instead, focus on:
-- The main concepts, ideas, or arguments
-- The methodology, approach, or techniques
-- The objectives, goals, or purpose
-- The results, findings, or outcomes
-- The implementation details or design
-
-Examples by document type:
-- Research paper: "the research methodology and experimental design", "the results and their interpretation"
-- Proposal: "the problem being addressed and its significance", "the proposed solution and approach"
-- Tutorial: "the step-by-step implementation process", "the practical applications and use cases"
-- Topic: "the fundamental concepts and definitions", "the real-world examples and applications"
-
-Format as a numbered list:
-1. [Content aspect to examine]
-2. [Content aspect to examine]
-3. [Content aspect to examine]
-4. [Content aspect to examine]
-5. [Content aspect to examine]
-
-Focus on understanding the CONTENT, not analyzing the document structure."""
-
-        response, error = self._generate_with_fallback(prompt)
+        text, error, _ = await self._agenerate_on(self._models_to_try(use_premium), prompt, kind, generation_config)
+        return text, error
+    
+    async def _agenerate_on(self, models: List[Tuple], prompt: str, kind: str,
+                            generation_config: Optional[Dict] = None) -> Tuple[str, Optional[str], str]:
+        """
+        Async variant of _generate_on.
         
-        if error or not response:
-            # Fallback to generic areas
-            return self._get_generic_focus_areas(), error
+        Args:
+            models (List[Tuple]): (model, model_name, rpm_limit) tuples in order of preference
+            prompt (str): The prompt to send to the model
+            kind (str): Prompt kind used for token accounting
+            generation_config (Optional[Dict]): SDK generation config
+            
+        Returns:
+            Tuple[str, Optional[str], str]: (generated_text, error_message, model_name)
+        """
+        remaining = list(models)
         
-        # Parse the numbered list
-        import re
-        lines = response.strip().split('\n')
-        focus_areas = []
+        last_error = None
+        model_name = ""
+        while remaining:
+            # Skip models the scheduler knows are saturated (waits briefly if all are)
+            index = await self.rate_limiter.aacquire([(name, rpm) for _, name, rpm in remaining])
+            if index is None:
+                return "", self._fallback_error_message("429 rate limit", remaining[-1][2]), model_name
+            
+            model, model_name, rpm_limit = remaining.pop(index)
+            timer = self._call_timer(model_name, kind, models, remaining)
+            try:
+                self.current_model_name = model_name  # Track current model
+                sent = await self._afit_prompt(prompt, model_name, model)
+                response = await model.generate_content_async(sent, generation_config=generation_config)
+                self.rate_limiter.record_success(model_name)
+                timer.success(self.token_usage.record(model_name, kind, sent, response))
+                return response.text, None, model_name
+            except asyncio.CancelledError:
+                # e.g. the losing request of a hedge
+                timer.cancelled()
+                raise
+            except Exception as e:
+                last_error = str(e)
+                timer.failure(last_error)
+                self._record_model_failure(model_name, last_error)
+                
+                # Try the next model; only report once all have failed
+                if remaining:
+                    continue
+                return "", self._fallback_error_message(last_error, rpm_limit), model_name
         
-        for line in lines:
-            # Match patterns like "1.", "1)", "1 -", etc.
-            match = re.match(r'^\d+[\.\)\-\:]\s*(.+)$', line.strip())
-            if match:
-                focus_areas.append(match.group(1).strip())
+        return "", f"⚠️ **Service Unavailable** - Unable to connect to AI service. Error: {last_error}", model_name
+    
+    def _generate_premium(self, prompt: str, kind: str) -> Tuple[str, Optional[str]]:
+        """
+        Generate content with the premium chain.
         
-        # If we didn't get 5 areas, use generic ones
-        if len(focus_areas) < 5:
-            return self._get_generic_focus_areas(), None
+        Only async mode hedges slow premium requests (see _agenerate_premium):
+        a thread cannot be cancelled, so a losing sync hedge would keep
+        spending quota after its answer was thrown away.
         
-        return focus_areas[:5], None  # Take first 5 if more than 5
+        Args:
+            prompt (str): The prompt to send to the model
+            kind (str): Prompt kind used for token accounting
+            
+        Returns:
+            Tuple[str, Optional[str]]: (generated_text, error_message)
+        """
+        return self._generate_with_fallback(prompt, use_premium=True, kind=kind)
     
-    def analyze_document(self, document_text: str, document_title: str = "Unknown Document") -> Tuple[str, Optional[str]]:
+    async def _agenerate_premium(self, prompt: str, kind: str) -> Tuple[str, Optional[str]]:
         """
-        Analyze the uploaded PDF document to understand its content and determine focus areas.
+        Generate content with the premium chain, hedging slow requests.
+        
+        If the premium request has not finished after hedge_after seconds,
+        the same prompt is also sent to the fast models and whichever
+        succeeds first is used; the losing request is cancelled. A premium
+        response that is ready at that point (or within hedge_grace
+        seconds) is preferred.
         
         Args:
-            document_text (str): Extracted text from the PDF
-            document_title (str): Title of the document
+            prompt (str): The prompt to send to the model
+            kind (str): Prompt kind used for token accounting
             
         Returns:
-            Tuple[str, Optional[str]]: (analysis_summary, error_message)
+            Tuple[str, Optional[str]]: (generated_text, error_message)
         """
-        self.state.document_text = document_text
-        self.state.document_title = document_title
+        if self.hedge_after <= 0:
+            return await self.agenerate_with_fallback(prompt, use_premium=True, kind=kind)
         
-        # First, analyze and classify the document
-        prompt = f"""{self.examiner_personality}
-
-You are analyzing a document to prepare for an examination. Identify the document type and provide a brief summary.
-
-Document Title: {document_title}
-Document Content:
-{document_text[:3000]}...
-
-Provide ONLY:
-1. Document Type: Choose ONE from (research_paper, thesis, proposal, book_chapter, book, technical_report, essay, case_study, review_article, tutorial, topic, general)
-   - "book" = complete books with multiple chapters
-   - "book_chapter" = single chapter from a book
-   - "topic" = documents explaining a specific concept (e.g., "Types of AI Models")
-   - "general" = if none fit
-
-2. Brief Summary: Write 2-3 concise sentences describing:
-   - What this document is about
-   - The main subject/focus
-   - Key themes covered
-
-Format EXACTLY as:
-**Type:** [document_type]
-**Summary:** [3-4 sentences only]
-
-Keep the summary brief and factual. Do NOT include suggestions for improvement."""
-
-        analysis, error = self._generate_with_fallback(prompt)
+        premium = asyncio.ensure_future(self._agenerate_on(self._models_to_try(use_premium=True), prompt, kind))
+        done, _ = await asyncio.wait({premium}, timeout=self.hedge_after)
+        if done:
+            return self._hedge_result(premium.result())
         
-        if analysis:
-            self.state.document_analysis = analysis
-            
-            # Extract document type from analysis
-            import re
-            type_match = re.search(r'\*\*Type:\*\*\s*(\w+)', analysis)
-            if type_match:
-                self.state.document_type = type_match.group(1).lower()
-            else:
-                self.state.document_type = "general"
-            
-            # Generate dynamic focus areas based on document type
-            focus_areas, focus_error = self._generate_focus_areas_from_document()
-            self.state.focus_areas = focus_areas
+        hedge = asyncio.ensure_future(self._agenerate_on(self._models_to_try(), prompt, f"{kind}_hedge"))
+        pending = {premium, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if premium in done and not premium.result()[1]:
+                    return self._hedge_result(premium.result())
+                if hedge in done and not hedge.result()[1]:
+                    # Quality preference: take the premium response if it is about to land
+                    if premium in pending:
+                        await asyncio.wait({premium}, timeout=self.hedge_grace)
+                        if premium.done() and not premium.result()[1]:
+                            return self._hedge_result(premium.result())
+                    return self._hedge_result(hedge.result(), hedged=True)
             
-            # If focus area generation failed but document analysis succeeded, 
-            # don't return the error (we have fallback areas)
-            if not error:
-                error = None
-        
-        return analysis, error
+            # Both failed - report the premium chain's error
+            return self._hedge_result(premium.result())
+        finally:
+            for task in (premium, hedge):
+                if not task.done():
+                    task.cancel()
     
-    def generate_next_question(self) -> Tuple[Optional[str], Optional[str]]:
+    def _hedge_result(self, result: Tuple[str, Optional[str], str], hedged: bool = False) -> Tuple[str, Optional[str]]:
         """
-        Generate the next examination question based on the document.
+        Take the result of a hedged request.
         
+        Args:
+            result (Tuple[str, Optional[str], str]): (generated_text, error_message, model_name)
+            hedged (bool): Whether the fast-model hedge won
+            
         Returns:
-            Tuple[Optional[str], Optional[str]]: (question, error_message)
+            Tuple[str, Optional[str]]: (generated_text, error_message)
         """
-        if self.state.current_question_index >= self.state.total_questions:
-            return None, None
-        
-        # Check if this is a lifeline request
-        if self.state.awaiting_lifeline_response and self.state.last_lifeline_type:
-            return self._handle_lifeline_question()
+        text, error, model_name = result
+        if model_name:
+            # Concurrent requests overwrite the tracked model - report the one used
+            self.current_model_name = model_name
+        if hedged:
+            print(f"Premium request hedged: answered by {model_name}")
+        return text, error
+    
+    async def _afit_prompt(self, prompt: str, model_name: str, model) -> str:
+        """
+        Trim a prompt to a model's input budget without blocking the event loop.
         
-        # Use dynamically generated focus areas, or fallback to generic ones
-        if not self.state.focus_areas:
-            self.state.focus_areas = self._get_generic_focus_areas()
+        Args:
+            prompt (str): The prompt to send
+            model_name (str): Model the prompt is sent to
+            model: SDK model, used for exact counts when enabled
+            
+        Returns:
+            str: The prompt, trimmed if it exceeded the budget
+        """
+        if self.token_counter.use_sdk:
+            # Exact counts are a blocking request
+            return await asyncio.to_thread(self.token_counter.fit, prompt, model_name, model)
+        return self.token_counter.fit(prompt, model_name)
+    
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        """
+        Get the text of a streamed response chunk.
+        
+        Args:
+            chunk: SDK response chunk
+            
+        Returns:
+            str: Chunk text ("" for chunks without text, e.g. the final one)
+        """
+        try:
+            return chunk.text
+        except (ValueError, AttributeError):
+            return ""
+    
+    def _stream_with_fallback(self, prompt: str, use_premium: bool = False, kind: str = "other",
+                              generation_config: Optional[Dict] = None) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        Stream generated content, with the same fallback as _generate_with_fallback.
+        
+        Yields the text received so far after every chunk. If a model fails
+        (even part-way through), the next model starts over, so consumers
+        should always show the latest text rather than append to it. When
+        every model has failed, a final ("", error_message) is yielded.
+        
+        Args:
+            prompt (str): The prompt to send to the model
+            use_premium (bool): Whether to use the premium model first
+            kind (str): Prompt kind used for token accounting
+            generation_config (Optional[Dict]): SDK generation config, e.g. a JSON response schema
+            
+        Yields:
+            Tuple[str, Optional[str]]: (text_so_far, error_message)
+        """
+        models = self._models_to_try(use_premium)
+        remaining = list(models)
+        
+        last_error = None
+        while remaining:
+            # Skip models the scheduler knows are saturated (waits briefly if all are)
+            index = self.rate_limiter.acquire([(name, rpm) for _, name, rpm in remaining])
+            if index is None:
+                yield "", self._fallback_error_message("429 rate limit", remaining[-1][2])
+                return
+            
+            model, model_name, rpm_limit = remaining.pop(index)
+            timer = self._call_timer(model_name, kind, models, remaining, streamed=True)
+            try:
+                self.current_model_name = model_name  # Track current model
+                sent = self.token_counter.fit(prompt, model_name, model)
+                response = model.generate_content(sent, generation_config=generation_config, stream=True)
+                text = ""
+                for chunk in response:
+                    piece = self._chunk_text(chunk)
+                    if piece:
+                        timer.first_token()
+                        text += piece
+                        yield text, None
+                self.rate_limiter.record_success(model_name)
+                timer.success(self.token_usage.record(model_name, kind, sent, response))
+                return
+            except GeneratorExit:
+                # The consumer stopped reading
+                timer.cancelled()
+                raise
+            except Exception as e:
+                last_error = str(e)
+                timer.failure(last_error)
+                self._record_model_failure(model_name, last_error)
+                
+                # Try the next model; only report once all have failed
+                if remaining:
+                    continue
+                yield "", self._fallback_error_message(last_error, rpm_limit)
+                return
+        
+        yield "", f"⚠️ **Service Unavailable** - Unable to connect to AI service. Error: {last_error}"
+    
+    async def astream_with_fallback(self, prompt: str, use_premium: bool = False, kind: str = "other",
+                                    generation_config: Optional[Dict] = None) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """
+        Async variant of _stream_with_fallback using the SDK's async API.
+        
+        Args:
+            prompt (str): The prompt to send to the model
+            use_premium (bool): Whether to use the premium model first
+            kind (str): Prompt kind used for token accounting
+            generation_config (Optional[Dict]): SDK generation config, e.g. a JSON response schema
+            
+        Yields:
+            Tuple[str, Optional[str]]: (text_so_far, error_message)
+        """
+        models = self._models_to_try(use_premium)
+        remaining = list(models)
+        
+        last_error = None
+        while remaining:
+            # Skip models the scheduler knows are saturated (waits briefly if all are)
+            index = await self.rate_limiter.aacquire([(name, rpm) for _, name, rpm in remaining])
+            if index is None:
+                yield "", self._fallback_error_message("429 rate limit", remaining[-1][2])
+                return
+            
+            model, model_name, rpm_limit = remaining.pop(index)
+            timer = self._call_timer(model_name, kind, models, remaining, streamed=True)
+            try:
+                self.current_model_name = model_name  # Track current model
+                sent = await self._afit_prompt(prompt, model_name, model)
+                response = await model.generate_content_async(sent, generation_config=generation_config, stream=True)
+                text = ""
+                async for chunk in response:
+                    piece = self._chunk_text(chunk)
+                    if piece:
+                        timer.first_token()
+                        text += piece
+                        yield text, None
+                self.rate_limiter.record_success(model_name)
+                timer.success(self.token_usage.record(model_name, kind, sent, response))
+                return
+            except (GeneratorExit, asyncio.CancelledError):
+                # The consumer stopped reading or the request was cancelled
+                timer.cancelled()
+                raise
+            except Exception as e:
+                last_error = str(e)
+                timer.failure(last_error)
+                self._record_model_failure(model_name, last_error)
+                
+                # Try the next model; only report once all have failed
+                if remaining:
+                    continue
+                yield "", self._fallback_error_message(last_error, rpm_limit)
+                return
+        
+        yield "", f"⚠️ **Service Unavailable** - Unable to connect to AI service. Error: {last_error}"
+    
+    def _generate_structured(self, prompt: str, response_model: type, kind: str,
+                             use_premium: bool = False, **constraints) -> Tuple[Optional[object], Optional[str]]:
+        """
+        Generate a JSON response and validate it against a response model.
+        
+        Args:
+            prompt (str): The prompt to send to the model
+            response_model (type): Response model class from structured_output
+            kind (str): Prompt kind used for accounting
+            use_premium (bool): Whether to use the premium model first
+            **constraints: Extra validation arguments (e.g. question_count)
+            
+        Returns:
+            Tuple[Optional[object], Optional[str]]: (validated response, error_message)
+        """
+        response, error = self._generate_with_fallback(prompt, use_premium, kind, generation_config(response_model))
+        return self._validate_structured(response, error, response_model, kind, **constraints)
+    
+    async def _agenerate_structured(self, prompt: str, response_model: type, kind: str,
+                                    use_premium: bool = False, **constraints) -> Tuple[Optional[object], Optional[str]]:
+        """
+        Async variant of _generate_structured.
+        
+        Args:
+            prompt (str): The prompt to send to the model
+            response_model (type): Response model class from structured_output
+            kind (str): Prompt kind used for accounting
+            use_premium (bool): Whether to use the premium model first
+            **constraints: Extra validation arguments (e.g. question_count)
+            
+        Returns:
+            Tuple[Optional[object], Optional[str]]: (validated response, error_message)
+        """
+        response, error = await self.agenerate_with_fallback(prompt, use_premium, kind, generation_config(response_model))
+        return await self._avalidate_structured(response, error, response_model, kind, **constraints)
+    
+    def _validate_structured(self, response: str, error: Optional[str], response_model: type, kind: str,
+                             **constraints) -> Tuple[Optional[object], Optional[str]]:
+        """
+        Validate a JSON response, repairing it if needed.
+        
+        A response that does not validate is sent back once (or
+        repair_attempts times) with only the bad reply and the schema,
+        instead of repeating the whole request.
+        
+        Args:
+            response (str): Model response
+            error (Optional[str]): Error from the request
+            response_model (type): Response model class from structured_output
+            kind (str): Prompt kind used for accounting
+            **constraints: Extra validation arguments (e.g. question_count)
+            
+        Returns:
+            Tuple[Optional[object], Optional[str]]: (validated response, error_message)
+        """
+        for attempt in range(self.repair_attempts + 1):
+            if error:
+                return None, error
+            try:
+                result = parse_response(response, response_model, **constraints)
+                self.parse_stats.record(kind, 'repaired' if attempt else 'parsed')
+                return result, None
+            except ResponseParseError as e:
+                problem = str(e)
+                if attempt == self.repair_attempts:
+                    break
+                response, error = self._generate_with_fallback(
+                    build_repair_prompt(response, response_model, problem), kind=f"{kind}_repair",
+                    generation_config=generation_config(response_model)
+                )
+        
+        return None, self._parse_failure(kind, problem)
+    
+    async def _avalidate_structured(self, response: str, error: Optional[str], response_model: type, kind: str,
+                                    **constraints) -> Tuple[Optional[object], Optional[str]]:
+        """
+        Async variant of _validate_structured.
+        
+        Args:
+            response (str): Model response
+            error (Optional[str]): Error from the request
+            response_model (type): Response model class from structured_output
+            kind (str): Prompt kind used for accounting
+            **constraints: Extra validation arguments (e.g. question_count)
+            
+        Returns:
+            Tuple[Optional[object], Optional[str]]: (validated response, error_message)
+        """
+        for attempt in range(self.repair_attempts + 1):
+            if error:
+                return None, error
+            try:
+                result = parse_response(response, response_model, **constraints)
+                self.parse_stats.record(kind, 'repaired' if attempt else 'parsed')
+                return result, None
+            except ResponseParseError as e:
+                problem = str(e)
+                if attempt == self.repair_attempts:
+                    break
+                response, error = await self.agenerate_with_fallback(
+                    build_repair_prompt(response, response_model, problem), kind=f"{kind}_repair",
+                    generation_config=generation_config(response_model)
+                )
+        
+        return None, self._parse_failure(kind, problem)
+    
+    def _parse_failure(self, kind: str, problem: str) -> str:
+        """
+        Record a response that could not be used, even after repair.
+        
+        Args:
+            kind (str): Prompt kind
+            problem (str): Why validation failed
+            
+        Returns:
+            str: User-facing error message
+        """
+        self.parse_stats.record(kind, 'failed')
+        print(f"Unusable {kind} response: {problem}")
+        return "⚠️ **Response Error** - The AI returned a response that could not be read. Please try again."
+    
+    def get_parse_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get structured response parse counters for monitoring.
+        
+        Returns:
+            Dict: Prompt kind -> parsed/repaired/failed counts and failure rates
+        """
+        return self.parse_stats.get_stats()
+    
+    def get_call_stats(self) -> Dict[str, Dict]:
+        """
+        Get model call latency and outcome summaries for monitoring.
+        
+        Returns:
+            Dict: 'by_model' and 'by_kind' -> attempts, outcome counts and latency percentiles
+        """
+        return self.call_metrics.get_stats()
+    
+    def get_rate_limit_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get per-model rate limit counters for monitoring.
+        
+        Returns:
+            Dict: Model name -> request, skip, 429 and wait counters
+        """
+        return self.rate_limiter.get_stats()
+    
+    def get_current_model(self) -> str:
+        """
+        Get the name of the currently active model.
+        
+        Returns:
+            str: Current model name
+        """
+        return self.current_model_name
+    
+    def is_examination_complete(self) -> bool:
+        """
+        Check if all questions have been asked.
+        
+        Returns:
+            bool: True if all questions have been asked
+        """
+        return self.state.current_question_index >= self.state.total_questions
+    
+    def set_total_questions(self, total: int):
+        """
+        Set the total number of questions for the examination.
+        
+        Args:
+            total (int): Number of questions (1-10)
+        """
+        if 1 <= total <= 10:
+            self.state.total_questions = total
+            # Calculate lifelines (20% of total questions, minimum 1)
+            self.state.lifelines_total = max(1, int(total * 0.2))
+            self.state.lifelines_remaining = self.state.lifelines_total
+    
+    def set_exam_mode(self, enabled: bool):
+        """
+        Switch between interactive and exam mode.
+        
+        In exam mode the whole question set is generated up front, answers
+        are collected without feedback, and all of them are graded in one
+        request at the end. Lifelines are not available.
+        
+        Args:
+            enabled (bool): True for exam mode
+        """
+        self.state.exam_mode = enabled
+        self.state.exam_questions = []
+        if enabled:
+            self._invalidate_prefetch()
+            self.state.lifelines_total = 0
+            self.state.lifelines_remaining = 0
+    
+    def use_lifeline(self, lifeline_type: str) -> bool:
+        """
+        Use a lifeline (rephrase or new question).
+        
+        Args:
+            lifeline_type (str): 'rephrase' or 'new'
+            
+        Returns:
+            bool: True if lifeline was used successfully
+        """
+        if self.state.lifelines_remaining > 0:
+            # The prefetched next question was based on the question being replaced
+            self._invalidate_prefetch()
+            self.state.lifelines_remaining -= 1
+            self.state.lifelines_used.append((self.state.current_question_index - 1, lifeline_type))
+            self.state.awaiting_lifeline_response = True
+            self.state.last_lifeline_type = lifeline_type
+            return True
+        return False
+    
+    def get_lifelines_status(self) -> Tuple[int, int]:
+        """
+        Get lifelines status.
+        
+        Returns:
+            Tuple[int, int]: (remaining, total)
+        """
+        return (self.state.lifelines_remaining, self.state.lifelines_total)
+    
+    def _get_generic_focus_areas(self) -> List[str]:
+        """
+        Get generic focus areas that work for any document type.
+        
+        Returns:
+            List[str]: Generic focus areas
+        """
+        return [
+            "the main topic and central purpose — what is this document about and why does it matter?",
+            "the scope and boundaries — what is included, what is excluded, and what are the limitations?",
+            "the key points, arguments, or findings — what are the main claims, conclusions, or discoveries?",
+            "the evidence, methods, or reasoning — how are conclusions supported and validated?",
+            "the implications, significance, and future directions — what impact does this have and what comes next?"
+        ]
+    
+    def _build_focus_areas_prompt(self, document_type: Optional[str] = None) -> str:
+        """
+        Build the prompt asking for document-specific focus areas.
+        
+        Args:
+            document_type (Optional[str]): Document type to use instead of the
+                detected one, e.g. while classification is still running
+            
+        Returns:
+            str: Focus area prompt
+        """
+        document_type = document_type or self.state.document_type
+        
+        return f"""{self.examiner_personality}
+
+You are preparing examination questions for a student who has READ this document.
+
+Document Type: {document_type}
+Document Content (excerpt):
+{self.state.document_text[:document_chars('focus_areas')]}...
+
+Generate EXACTLY 5 focus areas that examination questions should cover.
+
+CRITICAL: Focus areas must be about the SUBJECT MATTER/CONTENT, NOT about:
+- Document formatting or structure
+- Author/submitter details
+- Page numbers or layout
+- Metadata or administrative information
+
+Instead, focus on:
+- The main concepts, ideas, or arguments
+- The methodology, approach, or techniques
+- The objectives, goals, or purpose
+- The results, findings, or outcomes
+- The implementation details or design
+
+Examples by document type:
+- Research paper: "the research methodology and experimental design", "the results and their interpretation"
+- Proposal: "the problem being addressed and its significance", "the proposed solution and approach"
+- Tutorial: "the step-by-step implementation process", "the practical applications and use cases"
+- Topic: "the fundamental concepts and definitions", "the real-world examples and applications"
+
+Focus on understanding the CONTENT, not analyzing the document structure.
+
+Respond with a JSON object: {{"focus_areas": ["content aspect to examine", ...]}} containing exactly 5 focus areas."""
+    
+    def _focus_areas_or_generic(self, result: Optional[FocusAreas]) -> List[str]:
+        """
+        Get the generated focus areas, or the generic ones if generation failed.
+        
+        Args:
+            result (Optional[FocusAreas]): Validated focus area response
+            
+        Returns:
+            List[str]: Focus areas
+        """
+        return result.areas if result else self._get_generic_focus_areas()
+    
+    def _generate_focus_areas_from_document(self) -> Tuple[List[str], Optional[str]]:
+        """
+        Generate dynamic focus areas based on document type and content.
+        
+        Returns:
+            Tuple[List[str], Optional[str]]: (focus_areas, error_message)
+        """
+        result, error = self._generate_structured(self._build_focus_areas_prompt(), FocusAreas, "focus_areas")
+        return self._focus_areas_or_generic(result), error
+    
+    async def _agenerate_focus_areas_from_document(self) -> Tuple[List[str], Optional[str]]:
+        """
+        Async variant of _generate_focus_areas_from_document.
+        
+        Returns:
+            Tuple[List[str], Optional[str]]: (focus_areas, error_message)
+        """
+        result, error = await self._agenerate_structured(self._build_focus_areas_prompt(), FocusAreas, "focus_areas")
+        return self._focus_areas_or_generic(result), error
+    
+    def _build_analysis_prompt(self, document_text: str, document_title: str) -> str:
+        """
+        Build the document classification and summary prompt.
+        
+        Args:
+            document_text (str): Extracted text from the PDF
+            document_title (str): Title of the document
+            
+        Returns:
+            str: Analysis prompt
+        """
+        return f"""{self.examiner_personality}
+
+You are analyzing a document to prepare for an examination. Identify the document type and provide a brief summary.
+
+Document Title: {document_title}
+Document Content:
+{document_text[:document_chars('analysis')]}...
+
+Provide ONLY:
+1. Document Type: Choose ONE from (research_paper, thesis, proposal, book_chapter, book, technical_report, essay, case_study, review_article, tutorial, topic, general)
+   - "book" = complete books with multiple chapters
+   - "book_chapter" = single chapter from a book
+   - "topic" = documents explaining a specific concept (e.g., "Types of AI Models")
+   - "general" = if none fit
+
+2. Brief Summary: Write 2-3 concise sentences describing:
+   - What this document is about
+   - The main subject/focus
+   - Key themes covered
+
+Keep the summary brief and factual. Do NOT include suggestions for improvement.
+
+Respond with a JSON object: {{"document_type": "...", "summary": "..."}}"""
+    
+    def _apply_analysis(self, analysis: DocumentAnalysis) -> str:
+        """
+        Store the document type and summary.
+        
+        Args:
+            analysis (DocumentAnalysis): Validated analysis response
+            
+        Returns:
+            str: The analysis as shown to the user
+        """
+        self.state.document_type = analysis.document_type
+        self.state.document_analysis = analysis.to_text()
+        return self.state.document_analysis
+    
+    def _apply_setup_results(self, analysis: DocumentAnalysis, focus_result: Optional[FocusAreas]) -> bool:
+        """
+        Apply the classification and focus areas of a parallel document setup.
+        
+        Args:
+            analysis (DocumentAnalysis): Validated analysis response
+            focus_result (Optional[FocusAreas]): Validated focus areas, or None if they failed
+            
+        Returns:
+            bool: True if focus area generation must be retried with the detected document type
+        """
+        self._apply_analysis(analysis)
+        self.state.focus_areas = self._focus_areas_or_generic(focus_result)
+        
+        # Focus areas fell back to generic ones - retry now that the type is known
+        return focus_result is None
+    
+    def _apply_speculative_question(self, question_result: Tuple[str, Optional[str]]):
+        """
+        Keep the speculative question 1 and the focus area it was asked about.
+        
+        Question 1 is generated before any focus area exists, for the first
+        generic area (the document's main topic), so that area replaces the
+        first generated one: the focus areas then describe what was examined.
+        
+        Args:
+            question_result (Tuple[str, Optional[str]]): Response and error of the speculative question 1
+        """
+        question, question_error = question_result
+        if not question or question_error:
+            return
+        
+        self.state.focus_areas = [self._get_generic_focus_areas()[0]] + list(self.state.focus_areas[1:])
+        self._prefetched_question = (0, question.strip())
+    
+    def _build_setup_prompts(self, document_text: str, document_title: str) -> Tuple[str, str, Optional[str]]:
+        """
+        Build the independent prompts used by the parallel setup.
+        
+        Focus areas are requested from the raw excerpt without waiting for
+        the document type (they are only generated again with the detected
+        type if this fails), and question 1 is generated speculatively for
+        the first generic focus area (the document's main topic). Exam mode
+        generates its questions as a set, so it skips the speculative question.
+        
+        Args:
+            document_text (str): Extracted text from the PDF
+            document_title (str): Title of the document
+            
+        Returns:
+            Tuple[str, str, Optional[str]]: (analysis_prompt, focus_areas_prompt, question_prompt or None)
+        """
+        unknown_type = "unknown (infer it from the content)"
+        question_prompt = None
+        if not self.state.exam_mode:
+            question_prompt = self._build_question_prompt(
+                focus_area=self._get_generic_focus_areas()[0], document_type=unknown_type
+            )
+        return (
+            self._build_analysis_prompt(document_text, document_title),
+            self._build_focus_areas_prompt(document_type=unknown_type),
+            question_prompt
+        )
+    
+    def analyze_document(self, document_text: str, document_title: str = "Unknown Document") -> Tuple[str, Optional[str]]:
+        """
+        Analyze the uploaded PDF document to understand its content and determine focus areas.
+        
+        In parallel setup mode the classification, focus area and first
+        question requests are issued concurrently.
         
-        # Select focus area for current question
-        # If more questions than focus areas, cycle through or use the last one
-        focus_index = min(self.state.current_question_index, len(self.state.focus_areas) - 1)
-        current_focus = self.state.focus_areas[focus_index]
+        Args:
+            document_text (str): Extracted text from the PDF
+            document_title (str): Title of the document
+            
+        Returns:
+            Tuple[str, Optional[str]]: (analysis_summary, error_message)
+        """
+        # Documents analyzed before (by anyone) need no LLM calls
+        if self._start_analysis(document_text, document_title):
+            return self.state.document_analysis, None
         
-        # Build context from previous Q&A
-        previous_context = ""
-        if self.state.questions_asked:
-            previous_context = "\n\nPrevious Q&A:\n"
-            for i, (q, a) in enumerate(zip(self.state.questions_asked, self.state.answers_given)):
-                previous_context += f"Q{i+1}: {q}\nA{i+1}: {a}\n\n"
+        if self.parallel_setup:
+            analysis, error = self._analyze_document_parallel(document_text, document_title)
+        else:
+            # First, analyze and classify the document
+            prompt = self._build_analysis_prompt(document_text, document_title)
+            analysis, error = self._generate_structured(prompt, DocumentAnalysis, "analysis")
+            
+            if analysis:
+                self._apply_analysis(analysis)
+                
+                # Generate dynamic focus areas based on document type
+                # (focus area errors are ignored - we have fallback areas)
+                focus_areas, focus_error = self._generate_focus_areas_from_document()
+                self.state.focus_areas = focus_areas
+        
+        if not analysis:
+            return "", error
+        
+        self._store_cached_analysis()
+        return self.state.document_analysis, None
+    
+    def _analyze_document_parallel(self, document_text: str, document_title: str) -> Tuple[Optional[DocumentAnalysis], Optional[str]]:
+        """
+        Run classification, focus areas and question 1 on worker threads.
+        
+        Args:
+            document_text (str): Extracted text from the PDF
+            document_title (str): Title of the document
+            
+        Returns:
+            Tuple[Optional[DocumentAnalysis], Optional[str]]: (analysis, error_message)
+        """
+        analysis_prompt, focus_prompt, question_prompt = self._build_setup_prompts(document_text, document_title)
+        
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            analysis_future = pool.submit(self._generate_structured, analysis_prompt, DocumentAnalysis, "analysis")
+            focus_future = pool.submit(self._generate_structured, focus_prompt, FocusAreas, "focus_areas")
+            question_future = None
+            if question_prompt:
+                question_future = pool.submit(self._generate_with_fallback, question_prompt, False, "question")
+            
+            analysis, error = analysis_future.result()
+            focus_result, _ = focus_future.result()
+            question_result = question_future.result() if question_future else ("", None)
+        
+        if analysis:
+            if self._apply_setup_results(analysis, focus_result):
+                self.state.focus_areas, _ = self._generate_focus_areas_from_document()
+            self._apply_speculative_question(question_result)
+        
+        return analysis, error
+    
+    async def aanalyze_document(self, document_text: str, document_title: str = "Unknown Document") -> Tuple[str, Optional[str]]:
+        """
+        Async variant of analyze_document.
+        
+        Args:
+            document_text (str): Extracted text from the PDF
+            document_title (str): Title of the document
+            
+        Returns:
+            Tuple[str, Optional[str]]: (analysis_summary, error_message)
+        """
+        # The question bank and analysis cache are SQLite - query them off the event loop
+        self._load_document(document_text, document_title)
+        self._bank_available = await asyncio.to_thread(self._has_bank, self.state.document_hash)
+        if await asyncio.to_thread(self._load_cached_analysis):
+            return self.state.document_analysis, None
+        
+        if self.parallel_setup:
+            analysis_prompt, focus_prompt, question_prompt = self._build_setup_prompts(document_text, document_title)
+            requests = [
+                self._agenerate_structured(analysis_prompt, DocumentAnalysis, "analysis"),
+                self._agenerate_structured(focus_prompt, FocusAreas, "focus_areas")
+            ]
+            if question_prompt:
+                requests.append(self.agenerate_with_fallback(question_prompt, kind="question"))
+            results = await asyncio.gather(*requests)
+            
+            (analysis, error), (focus_result, _) = results[0], results[1]
+            question_result = results[2] if question_prompt else ("", None)
+            
+            if analysis:
+                if self._apply_setup_results(analysis, focus_result):
+                    self.state.focus_areas, _ = await self._agenerate_focus_areas_from_document()
+                self._apply_speculative_question(question_result)
+        else:
+            prompt = self._build_analysis_prompt(document_text, document_title)
+            analysis, error = await self._agenerate_structured(prompt, DocumentAnalysis, "analysis")
+            
+            if analysis:
+                self._apply_analysis(analysis)
+                focus_areas, focus_error = await self._agenerate_focus_areas_from_document()
+                self.state.focus_areas = focus_areas
+        
+        if not analysis:
+            return "", error
+        
+        await asyncio.to_thread(self._store_cached_analysis)
+        return self.state.document_analysis, None
+    
+    def _start_analysis(self, document_text: str, document_title: str) -> bool:
+        """
+        Load a new document into the state and try the analysis cache.
+        
+        Args:
+            document_text (str): Extracted text from the PDF
+            document_title (str): Title of the document
+            
+        Returns:
+            bool: True if the analysis and focus areas were served from the cache
+        """
+        self._load_document(document_text, document_title)
+        self._bank_available = self._has_bank(self.state.document_hash)
+        return self._load_cached_analysis()
+    
+    def _load_document(self, document_text: str, document_title: str):
+        """
+        Load a new document into the state.
+        
+        The caller checks whether the document has a question bank (a
+        database read, so the async path runs it off the event loop).
+        
+        Args:
+            document_text (str): Extracted text from the PDF
+            document_title (str): Title of the document
+        """
+        self.state.document_text = document_text
+        self.state.document_title = document_title
+        self.state.document_hash = hash_text(document_text)
+        self._invalidate_prefetch()
+        self._reset_bank()
+    
+    def _load_cached_analysis(self) -> bool:
+        """
+        Serve the analysis and focus areas of the current document from the cache.
+        
+        Returns:
+            bool: True on a cache hit
+        """
+        if not self.analysis_cache:
+            return False
+        
+        cached = self.analysis_cache.get(self.state.document_hash, self.primary_model_name)
+        if not cached:
+            return False
+        
+        self.state.document_analysis = cached['document_analysis']
+        self.state.document_type = cached['document_type']
+        self.state.focus_areas = cached['focus_areas']
+        return True
+    
+    def _store_cached_analysis(self):
+        """Save a successful document analysis for other sessions."""
+        # Generic focus areas mean generation failed - don't make that permanent
+        if not self.analysis_cache or self.state.focus_areas == self._get_generic_focus_areas():
+            return
+        
+        self.analysis_cache.put(
+            self.state.document_hash,
+            self.primary_model_name,
+            self.state.document_analysis,
+            self.state.document_type,
+            self.state.focus_areas
+        )
+    
+    def _can_prefetch(self) -> bool:
+        """
+        Check whether the next question may be generated ahead of time.
+        
+        Returns:
+            bool: True if prefetching is enabled and useful right now
+        """
+        if not self.prefetch_questions or not self.state.questions_asked or self._bank_available:
+            return False
+        if self.state.exam_mode:
+            return False
+        if self.state.awaiting_lifeline_response or self.is_examination_complete():
+            return False
+        
+        # Already prefetching for this question
+        return not (self._prefetched_question and
+                    self._prefetched_question[0] == self.state.current_question_index)
+    
+    def prefetch_next_question(self) -> bool:
+        """
+        Start generating the next question on a background thread.
+        
+        Call this as soon as the current question is shown. The request
+        runs while the user is answering, so the next question is usually
+        ready by the time the answer has been evaluated. Because the answer
+        is not known yet, the prompt lists the current question as
+        unanswered.
+        
+        Returns:
+            bool: True if a prefetch was started
+        """
+        if not self._can_prefetch():
+            return False
+        
+        self._invalidate_prefetch()
+        future = _get_prefetch_executor().submit(
+            self._generate_with_fallback, self._build_question_prompt(), False, "question_prefetch"
+        )
+        self._prefetched_question = (self.state.current_question_index, future)
+        return True
+    
+    async def aprefetch_next_question(self) -> bool:
+        """
+        Async variant of prefetch_next_question, running as a task on the event loop.
+        
+        Returns:
+            bool: True if a prefetch was started
+        """
+        if not self._can_prefetch():
+            return False
+        
+        self._invalidate_prefetch()
+        task = asyncio.ensure_future(self.agenerate_with_fallback(
+            self._build_question_prompt(), kind="question_prefetch"
+        ))
+        self._prefetched_question = (self.state.current_question_index, task)
+        return True
+    
+    def _invalidate_prefetch(self):
+        """Discard any question generated ahead of time."""
+        prefetched, self._prefetched_question = self._prefetched_question, None
+        if prefetched and not isinstance(prefetched[1], str):
+            prefetched[1].cancel()
+    
+    def _pop_prefetch(self) -> Optional[Union[str, Future, asyncio.Task]]:
+        """
+        Take the prefetch slot if it belongs to the current question index.
+        
+        Returns:
+            Optional[Union[str, Future, asyncio.Task]]: The question or pending request
+        """
+        prefetched, self._prefetched_question = self._prefetched_question, None
+        if not prefetched:
+            return None
+        if prefetched[0] != self.state.current_question_index:
+            if not isinstance(prefetched[1], str):
+                prefetched[1].cancel()
+            return None
+        return prefetched[1]
+    
+    @staticmethod
+    def _prefetch_result(result: Tuple[str, Optional[str]]) -> Optional[str]:
+        """Get the question from a finished prefetch, or None if it failed."""
+        question, error = result
+        return question.strip() if question and not error else None
+    
+    def _take_prefetched_question(self) -> Optional[str]:
+        """
+        Take the question generated ahead of time for the current index.
+        
+        Waits for a pending background request. Requests started on an
+        event loop cannot be waited for here and are discarded.
+        
+        Returns:
+            Optional[str]: The prefetched question, or None if none is ready
+        """
+        source = self._pop_prefetch()
+        if isinstance(source, str):
+            return source
+        if isinstance(source, Future):
+            return self._prefetch_result(source.result())
+        if source is not None:
+            source.cancel()
+        return None
+    
+    async def _atake_prefetched_question(self) -> Optional[str]:
+        """
+        Async variant of _take_prefetched_question.
+        
+        Returns:
+            Optional[str]: The prefetched question, or None if none is ready
+        """
+        source = self._pop_prefetch()
+        if source is None or isinstance(source, str):
+            return source
+        if isinstance(source, Future):
+            source = asyncio.wrap_future(source)
+        return self._prefetch_result(await source)
+    
+    def _reset_bank(self, document_hash: str = ""):
+        """
+        Forget bank usage and check whether a document has a question bank.
+        
+        Args:
+            document_hash (str): SHA-256 of the new document text, if any
+        """
+        self._bank_seen = []
+        self._bank_rephrasings = {}
+        self._bank_available = self._has_bank(document_hash)
+    
+    def _has_bank(self, document_hash: str) -> bool:
+        """
+        Check whether a document has a question bank.
+        
+        Args:
+            document_hash (str): SHA-256 of the document text, if any
+            
+        Returns:
+            bool: True if banked questions can be drawn for the document
+        """
+        return bool(document_hash and self.question_bank and self.question_bank.has_bank(document_hash))
+    
+    def _current_focus_index(self) -> int:
+        """
+        Get the focus area index for the current question.
+        
+        Returns:
+            int: Index into the focus areas (the last one once they run out)
+        """
+        focus_count = len(self.state.focus_areas) or len(self._get_generic_focus_areas())
+        return min(self.state.current_question_index, focus_count - 1)
+    
+    def _draw_banked_question(self, focus_index: Optional[int] = None) -> Optional[str]:
+        """
+        Draw an unseen question for the current focus area from the bank.
+        
+        Args:
+            focus_index (Optional[int]): Focus area to draw from instead of the current one
+            
+        Returns:
+            Optional[str]: A banked question, or None if none is available
+        """
+        if not self._bank_available:
+            return None
+        
+        drawn = self.question_bank.draw(
+            self.state.document_hash,
+            self._current_focus_index() if focus_index is None else focus_index,
+            exclude=self.state.questions_asked + self._bank_seen
+        )
+        if not drawn:
+            return None
+        
+        question, rephrasing = drawn
+        self._bank_seen.append(question)
+        self._bank_rephrasings[question.strip()] = rephrasing
+        return question
+    
+    async def _adraw_banked_question(self, focus_index: Optional[int] = None) -> Optional[str]:
+        """
+        Async variant of _draw_banked_question, reading the bank on a worker thread.
+        
+        Args:
+            focus_index (Optional[int]): Focus area to draw from instead of the current one
+            
+        Returns:
+            Optional[str]: A banked question, or None if none is available
+        """
+        if not self._bank_available:
+            return None
+        return await asyncio.to_thread(self._draw_banked_question, focus_index)
+    
+    def _banked_rephrasing(self) -> Optional[str]:
+        """
+        Get the stored rephrasing of the last question, if it came from the bank.
+        
+        Returns:
+            Optional[str]: Rephrased question, or None
+        """
+        if not self.state.questions_asked:
+            return None
+        
+        last_question = self.state.questions_asked[-1]
+        rephrasing = self._bank_rephrasings.get(last_question)
+        if rephrasing and rephrasing.strip() != last_question:
+            return rephrasing
+        return None
+    
+    def _document_excerpt(self, query: str, kind: str) -> str:
+        """
+        Get the part of the document to show in a prompt.
+        
+        With retrieval enabled, the chunks most relevant to the query are
+        taken from anywhere in the document; otherwise (or for documents
+        that fit whole) the start of the document is used.
+        
+        Args:
+            query (str): Focus area or question the prompt is about
+            kind (str): Prompt kind, which sets the excerpt's token budget
+            
+        Returns:
+            str: Document excerpt
+        """
+        max_chars = document_chars(kind)
+        document_text = self.state.document_text
+        if not self.use_retrieval or len(document_text) <= max_chars:
+            return document_text[:max_chars]
+        
+        index = get_document_index(self.state.document_hash or hash_text(document_text), document_text)
+        return index.excerpt(query, max_chars, self.retrieval_top_k)
+    
+    def _build_question_bank_prompt(self, focus_area: str, count: int) -> str:
+        """
+        Build the prompt for a batch of banked questions on one focus area.
         
-        prompt = f"""{self.examiner_personality}
+        Args:
+            focus_area (str): Focus area to write questions about
+            count (int): Number of questions to write
+            
+        Returns:
+            str: Question bank prompt
+        """
+        return f"""{self.examiner_personality}
 
 Document Type: {self.state.document_type}
 
 Document Content:
-{self.state.document_text[:2000]}...
+{self._document_excerpt(focus_area, 'question_bank')}...
+
+Write EXACTLY {count} DIFFERENT examination questions that test the student's understanding of {focus_area}
+
+For each question also write a clearer, simpler rephrasing with the same focus, to be offered if the student asks for the question to be rephrased.
+
+IMPORTANT RULES:
+- Ask about the PROJECT/TOPIC content, NOT about document formatting or metadata
+- Do NOT ask about student names, IDs, submission details, or page layout
+- Focus on the SUBJECT MATTER: concepts, methodology, design, implementation, etc.
+- The student should demonstrate they READ and UNDERSTOOD the content
+- Each question must be clear, direct and answerable on its own
+- Do not repeat the same question in different words
+
+Respond with a JSON object: {{"questions": [{{"question": "...", "rephrasing": "..."}}, ...]}} containing exactly {count} questions."""
+    
+    def build_question_bank(self, questions_per_area: int = 5) -> Tuple[int, Optional[str]]:
+        """
+        Generate and store banked questions for the analyzed document.
+        
+        Makes one request per focus area. Call after analyze_document().
+        
+        Args:
+            questions_per_area (int): Questions to generate per focus area
+            
+        Returns:
+            Tuple[int, Optional[str]]: (questions_stored, error_message)
+        """
+        if not self.question_bank:
+            return 0, "⚠️ Question bank is disabled."
+        if not self.state.document_hash:
+            return 0, "⚠️ No document has been analyzed yet."
+        
+        focus_areas = self.state.focus_areas or self._get_generic_focus_areas()
+        stored = 0
+        first_error = None
+        
+        for focus_index, focus_area in enumerate(focus_areas):
+            result, error = self._generate_structured(
+                self._build_question_bank_prompt(focus_area, questions_per_area), QuestionBankItems, "question_bank",
+                question_count=questions_per_area
+            )
+            if not result:
+                first_error = first_error or error
+                continue
+            
+            self.question_bank.store(self.state.document_hash, focus_index, focus_area, result.items)
+            stored += len(result.items)
+        
+        self._bank_available = stored > 0
+        return stored, first_error
+    
+    def _build_question_prompt(self, focus_area: Optional[str] = None, document_type: Optional[str] = None) -> str:
+        """
+        Build the prompt for the next examination question.
+        
+        Picks the focus area for the current question index, falling back
+        to generic focus areas if none were generated.
+        
+        Args:
+            focus_area (Optional[str]): Focus area to use instead of the current one
+            document_type (Optional[str]): Document type to use instead of the detected one
+            
+        Returns:
+            str: Question prompt
+        """
+        if focus_area:
+            current_focus = focus_area
+        else:
+            # Use dynamically generated focus areas, or fallback to generic ones
+            if not self.state.focus_areas:
+                self.state.focus_areas = self._get_generic_focus_areas()
+            
+            # Select focus area for current question
+            # If more questions than focus areas, cycle through or use the last one
+            current_focus = self.state.focus_areas[self._current_focus_index()]
+        
+        document_type = document_type or self.state.document_type
+        
+        # Previous Q&A, plus a question still being answered (when prefetching the next one)
+        answered = len(self.state.answers_given)
+        previous_context = self.state.context.render([
+            (i + 1, question) for i, question in enumerate(self.state.questions_asked[answered:], answered)
+        ])
+        
+        return f"""{self.examiner_personality}
+
+Document Type: {document_type}
+
+Document Content:
+{self._document_excerpt(current_focus, 'question')}...
 
 {previous_context}
 
@@ -425,13 +1829,122 @@ Example BAD questions (NEVER ask these):
 - "Analyze the adequacy of identifying information on Page 1"
 
 Respond with ONLY the question, no additional text."""
+    
+    def _apply_question(self, question: str) -> Optional[str]:
+        """
+        Record a newly generated question.
+        
+        Args:
+            question (str): Model response to the question prompt
+            
+        Returns:
+            Optional[str]: The cleaned question, or None if empty
+        """
+        if not question:
+            return None
+        
+        self.state.questions_asked.append(question.strip())
+        self.state.current_question_index += 1
+        return question.strip()
+    
+    def generate_next_question(self) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Generate the next examination question based on the document.
+        
+        Returns:
+            Tuple[Optional[str], Optional[str]]: (question, error_message)
+        """
+        if self.state.current_question_index >= self.state.total_questions:
+            return None, None
+        
+        # Check if this is a lifeline request
+        if self.state.awaiting_lifeline_response and self.state.last_lifeline_type:
+            return self._handle_lifeline_question()
+        
+        # Exam mode presents the pre-generated set in order
+        if self.state.exam_questions:
+            return self._apply_question(self.state.exam_questions.pop(0)), None
+        
+        # Use a question generated ahead of time if one is ready
+        prefetched = self._take_prefetched_question() or self._draw_banked_question()
+        if prefetched:
+            return self._apply_question(prefetched), None
+        
+        question, error = self._generate_with_fallback(self._build_question_prompt(), kind="question")
+        return self._apply_question(question), error
+    
+    async def agenerate_next_question(self) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Async variant of generate_next_question.
+        
+        Returns:
+            Tuple[Optional[str], Optional[str]]: (question, error_message)
+        """
+        if self.state.current_question_index >= self.state.total_questions:
+            return None, None
+        
+        if self.state.awaiting_lifeline_response and self.state.last_lifeline_type:
+            return await self._ahandle_lifeline_question()
+        
+        if self.state.exam_questions:
+            return self._apply_question(self.state.exam_questions.pop(0)), None
+        
+        prefetched = await self._atake_prefetched_question() or await self._adraw_banked_question()
+        if prefetched:
+            return self._apply_question(prefetched), None
+        
+        question, error = await self.agenerate_with_fallback(self._build_question_prompt(), kind="question")
+        return self._apply_question(question), error
+    
+    def _build_rephrase_prompt(self) -> str:
+        """
+        Build the prompt for rephrasing the last question.
+        
+        Returns:
+            str: Rephrase prompt
+        """
+        last_question = self.state.questions_asked[-1] if self.state.questions_asked else ""
+        
+        return f"""{self.examiner_personality}
+
+Original question: {last_question}
 
-        question, error = self._generate_with_fallback(prompt)
+Document excerpt:
+{self._document_excerpt(last_question, 'rephrase')}...
+
+Rephrase this question to make it clearer and easier to understand while maintaining the same focus.
+Keep it simple and direct.
+
+Respond with ONLY the rephrased question, no additional text."""
+    
+    def _apply_rephrased_question(self, question: str) -> Optional[str]:
+        """
+        Replace the last question with its rephrased version.
+        
+        Args:
+            question (str): Model response to the rephrase prompt
+            
+        Returns:
+            Optional[str]: The cleaned question, or None if empty
+        """
         if question:
-            self.state.questions_asked.append(question.strip())
-            self.state.current_question_index += 1
+            # Replace the last question with rephrased one
+            self.state.questions_asked[-1] = question.strip()
+        
+        self.state.last_lifeline_type = ""
+        return question.strip() if question else None
+    
+    def _discard_current_question(self):
+        """Drop the current question so a new one can take its place."""
+        # Decrement question index since we're replacing the current question
+        if self.state.current_question_index > 0:
+            self.state.current_question_index -= 1
+        
+        # Remove the last question (and don't serve it again from the bank)
+        if self.state.questions_asked:
+            self._bank_seen.append(self.state.questions_asked.pop())
         
-        return question.strip() if question else None, error
+        self.state.last_lifeline_type = ""
     
     def _handle_lifeline_question(self) -> Tuple[Optional[str], Optional[str]]:
         """
@@ -443,65 +1956,61 @@ Respond with ONLY the question, no additional text."""
         self.state.awaiting_lifeline_response = False
         
         if self.state.last_lifeline_type == "rephrase":
-            # Rephrase the last question
-            last_question = self.state.questions_asked[-1] if self.state.questions_asked else ""
-            
-            prompt = f"""{self.examiner_personality}
-
-Original question: {last_question}
-
-Document excerpt:
-{self.state.document_text[:2000]}...
-
-Rephrase this question to make it clearer and easier to understand while maintaining the same focus.
-Keep it simple and direct.
-
-Respond with ONLY the rephrased question, no additional text."""
-
-            question, error = self._generate_with_fallback(prompt)
-            if question:
-                # Replace the last question with rephrased one
-                self.state.questions_asked[-1] = question.strip()
+            # Banked questions come with a ready-made rephrasing
+            banked = self._banked_rephrasing()
+            if banked:
+                return self._apply_rephrased_question(banked), None
             
-            self.state.last_lifeline_type = ""
-            return question.strip() if question else None, error
+            # Rephrase the last question
+            question, error = self._generate_with_fallback(self._build_rephrase_prompt(), kind="rephrase")
+            return self._apply_rephrased_question(question), error
             
         elif self.state.last_lifeline_type == "new":
             # Generate a completely new question on a different topic
-            # Decrement question index since we're replacing the current question
-            if self.state.current_question_index > 0:
-                self.state.current_question_index -= 1
+            self._discard_current_question()
+            return self.generate_next_question()
+        
+        return None, None
+    
+    async def _ahandle_lifeline_question(self) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Async variant of _handle_lifeline_question.
+        
+        Returns:
+            Tuple[Optional[str], Optional[str]]: (question, error_message)
+        """
+        self.state.awaiting_lifeline_response = False
+        
+        if self.state.last_lifeline_type == "rephrase":
+            banked = self._banked_rephrasing()
+            if banked:
+                return self._apply_rephrased_question(banked), None
             
-            # Remove the last question
-            if self.state.questions_asked:
-                self.state.questions_asked.pop()
+            question, error = await self.agenerate_with_fallback(self._build_rephrase_prompt(), kind="rephrase")
+            return self._apply_rephrased_question(question), error
             
-            # Generate new question
-            self.state.last_lifeline_type = ""
-            return self.generate_next_question()
+        elif self.state.last_lifeline_type == "new":
+            self._discard_current_question()
+            return await self.agenerate_next_question()
         
         return None, None
     
-    def evaluate_answer(self, user_answer: str) -> Tuple[str, Optional[str]]:
+    def _build_evaluation_prompt(self, user_answer: str) -> str:
         """
-        Evaluate the user's answer and provide constructive feedback with marks.
+        Build the prompt for grading an answer to the current question.
         
         Args:
             user_answer (str): The user's answer to the current question
             
         Returns:
-            Tuple[str, Optional[str]]: (evaluation_with_marks, error_message)
+            str: Evaluation prompt
         """
-        if not self.state.questions_asked:
-            return "No question has been asked yet.", None
-        
         current_question = self.state.questions_asked[-1]
-        self.state.answers_given.append(user_answer)
         
-        # Build context
-        document_excerpt = self.state.document_text[:2000]
+        # Build context from the parts of the document the question is about
+        document_excerpt = self._document_excerpt(current_question, 'evaluation')
         
-        prompt = f"""{self.examiner_personality}
+        return f"""{self.examiner_personality}
 
 Document excerpt:
 {document_excerpt}...
@@ -522,45 +2031,356 @@ Evaluate this answer and provide:
    - If score is 4-6: Point out what's good and what needs improvement
    - If score is 0-3: Provide specific guidance for improvement
 
-Format your response EXACTLY as:
-**Marks: X/10**
+Be fair and constructive. Keep feedback concise.
+
+Respond with a JSON object: {{"feedback": "...", "marks": <score from 0 to 10>}}"""
+    
+    def _apply_evaluation(self, user_answer: str, evaluation: Optional[Evaluation]) -> str:
+        """
+        Record an answer together with its validated marks and feedback.
+        
+        Nothing is recorded if the evaluation failed, so a retry grades
+        the same answer again instead of duplicating it.
+        
+        Args:
+            user_answer (str): The user's answer to the current question
+            evaluation (Optional[Evaluation]): Validated evaluation response
+            
+        Returns:
+            str: The evaluation text, or "" if it failed
+        """
+        if not evaluation:
+            return ""
+        
+        self.state.record_answer(user_answer)
+        self.state.marks.append(evaluation.marks)
+        self.state.evaluations.append(evaluation.to_text())
+        return evaluation.to_text()
+    
+    def evaluate_answer(self, user_answer: str) -> Tuple[str, Optional[str]]:
+        """
+        Evaluate the user's answer and provide constructive feedback with marks.
+        
+        Args:
+            user_answer (str): The user's answer to the current question
+            
+        Returns:
+            Tuple[str, Optional[str]]: (evaluation_with_marks, error_message)
+        """
+        if not self.state.questions_asked:
+            return "No question has been asked yet.", None
+        
+        evaluation, error = self._generate_structured(self._build_evaluation_prompt(user_answer), Evaluation, "evaluation")
+        return self._apply_evaluation(user_answer, evaluation), error
+    
+    async def aevaluate_answer(self, user_answer: str) -> Tuple[str, Optional[str]]:
+        """
+        Async variant of evaluate_answer.
+        
+        Args:
+            user_answer (str): The user's answer to the current question
+            
+        Returns:
+            Tuple[str, Optional[str]]: (evaluation_with_marks, error_message)
+        """
+        if not self.state.questions_asked:
+            return "No question has been asked yet.", None
+        
+        evaluation, error = await self._agenerate_structured(
+            self._build_evaluation_prompt(user_answer), Evaluation, "evaluation"
+        )
+        return self._apply_evaluation(user_answer, evaluation), error
+    
+    def stream_evaluation(self, user_answer: str) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        Evaluate an answer, yielding the feedback while it is generated.
+        
+        Partial updates carry the feedback received so far. The last item
+        is the result of evaluate_answer(): the complete evaluation with
+        marks, or ("", error_message). Marks are only parsed once the
+        response is complete.
+        
+        Args:
+            user_answer (str): The user's answer to the current question
+            
+        Yields:
+            Tuple[str, Optional[str]]: (evaluation_text, error_message)
+        """
+        if not self.stream_responses or not self.state.questions_asked:
+            yield self.evaluate_answer(user_answer)
+            return
+        
+        response, error, shown = "", None, ""
+        for response, error in self._stream_with_fallback(
+            self._build_evaluation_prompt(user_answer), kind="evaluation", generation_config=generation_config(Evaluation)
+        ):
+            feedback = partial_string_field(response, "feedback")
+            if feedback != shown and not error:
+                shown = feedback
+                yield feedback, None
+        
+        evaluation, error = self._validate_structured(response, error, Evaluation, "evaluation")
+        yield self._apply_evaluation(user_answer, evaluation), error
+    
+    async def astream_evaluation(self, user_answer: str) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """
+        Async variant of stream_evaluation.
+        
+        Args:
+            user_answer (str): The user's answer to the current question
+            
+        Yields:
+            Tuple[str, Optional[str]]: (evaluation_text, error_message)
+        """
+        if not self.stream_responses or not self.state.questions_asked:
+            yield await self.aevaluate_answer(user_answer)
+            return
+        
+        response, error, shown = "", None, ""
+        async for response, error in self.astream_with_fallback(
+            self._build_evaluation_prompt(user_answer), kind="evaluation", generation_config=generation_config(Evaluation)
+        ):
+            feedback = partial_string_field(response, "feedback")
+            if feedback != shown and not error:
+                shown = feedback
+                yield feedback, None
+        
+        evaluation, error = await self._avalidate_structured(response, error, Evaluation, "evaluation")
+        yield self._apply_evaluation(user_answer, evaluation), error
+    
+    def _build_exam_questions_prompt(self) -> str:
+        """
+        Build the prompt for the whole exam question set.
+        
+        Returns:
+            str: Exam questions prompt
+        """
+        if not self.state.focus_areas:
+            self.state.focus_areas = self._get_generic_focus_areas()
+        
+        total = self.state.total_questions
+        focus_list = "\n".join(
+            f"{i}. {self.state.focus_areas[min(i - 1, len(self.state.focus_areas) - 1)]}"
+            for i in range(1, total + 1)
+        )
+        
+        return f"""{self.examiner_personality}
+
+Document Type: {self.state.document_type}
+
+Document Content:
+{self._document_excerpt(" ".join(self.state.focus_areas), 'exam_questions')}...
 
-[Your feedback here]
+Write an examination of EXACTLY {total} questions. Question N must test the student's understanding of focus area N:
+{focus_list}
 
-Be fair and constructive. Keep feedback concise."""
+IMPORTANT RULES:
+- Ask about the PROJECT/TOPIC content, NOT about document formatting or metadata
+- Do NOT ask about student names, IDs, submission details, or page layout
+- Focus on the SUBJECT MATTER: concepts, methodology, design, implementation, etc.
+- The student should demonstrate they READ and UNDERSTOOD the content
+- Each question must be clear, direct and answerable on its own
+- Do not ask the same thing twice
 
-        evaluation, error = self._generate_with_fallback(prompt)
-        if evaluation:
-            # Extract marks from evaluation
-            import re
-            marks_match = re.search(r'\*\*Marks:\s*(\d+)/10\*\*', evaluation)
-            if marks_match:
-                marks = int(marks_match.group(1))
-                self.state.marks.append(marks)
-            else:
-                # Default to 5 if marks not found
-                self.state.marks.append(5)
-                evaluation = "**Marks: 5/10**\n\n" + evaluation
+Respond with a JSON object: {{"questions": ["question 1", "question 2", ...]}}"""
+    
+    def _apply_exam_questions(self, result: Optional[ExamQuestions], error: Optional[str]) -> Tuple[List[str], Optional[str]]:
+        """
+        Store the generated exam question set.
+        
+        Args:
+            result (Optional[ExamQuestions]): Validated question set
+            error (Optional[str]): Error from the request
             
-            self.state.evaluations.append(evaluation.strip())
+        Returns:
+            Tuple[List[str], Optional[str]]: (questions, error_message)
+        """
+        if not result:
+            return [], error
         
-        return evaluation.strip() if evaluation else "", error
+        self.state.exam_questions = list(result.questions)
+        return list(result.questions), None
     
-    def generate_final_summary(self) -> Tuple[str, Optional[str]]:
+    def _draw_banked_exam(self) -> Optional[List[str]]:
         """
-        Generate a final overall evaluation summary using the premium model.
+        Assemble the exam question set from the question bank.
         
         Returns:
-            Tuple[str, Optional[str]]: (summary_with_total_marks, error_message)
+            Optional[List[str]]: One question per position, or None if the
+            bank cannot cover every position
         """
-        if not self.state.questions_asked:
-            return "No questions were asked during this session.", None
+        if not self._bank_available:
+            return None
         
-        # Calculate total marks and percentage
-        total_marks = sum(self.state.marks)
-        max_marks = len(self.state.marks) * 10
-        percentage = (total_marks / max_marks * 100) if max_marks > 0 else 0
-        status = "PASS ✅" if percentage >= 50 else "FAIL ❌"
+        focus_count = len(self.state.focus_areas) or len(self._get_generic_focus_areas())
+        questions = []
+        for i in range(self.state.total_questions):
+            question = self._draw_banked_question(min(i, focus_count - 1))
+            if not question:
+                return None
+            questions.append(question)
+        
+        self.state.exam_questions = questions
+        return list(questions)
+    
+    def generate_exam_questions(self) -> Tuple[List[str], Optional[str]]:
+        """
+        Generate the whole exam question set in one request (exam mode).
+        
+        Uses the question bank instead when it has questions for every
+        focus area. Call after analyze_document() and set_total_questions();
+        the questions are then presented by generate_next_question().
+        
+        Returns:
+            Tuple[List[str], Optional[str]]: (questions, error_message)
+        """
+        banked = self._draw_banked_exam()
+        if banked:
+            return banked, None
+        
+        result, error = self._generate_structured(
+            self._build_exam_questions_prompt(), ExamQuestions, "exam_questions",
+            question_count=self.state.total_questions
+        )
+        return self._apply_exam_questions(result, error)
+    
+    async def agenerate_exam_questions(self) -> Tuple[List[str], Optional[str]]:
+        """
+        Async variant of generate_exam_questions.
+        
+        Returns:
+            Tuple[List[str], Optional[str]]: (questions, error_message)
+        """
+        banked = await asyncio.to_thread(self._draw_banked_exam) if self._bank_available else None
+        if banked:
+            return banked, None
+        
+        result, error = await self._agenerate_structured(
+            self._build_exam_questions_prompt(), ExamQuestions, "exam_questions",
+            question_count=self.state.total_questions
+        )
+        return self._apply_exam_questions(result, error)
+    
+    def record_exam_answer(self, answer: str):
+        """
+        Store the answer to the current exam question without grading it.
+        
+        Args:
+            answer (str): The user's answer
+        """
+        if len(self.state.answers_given) < len(self.state.questions_asked):
+            self.state.record_answer(answer)
+    
+    def is_exam_ready_for_grading(self) -> bool:
+        """
+        Check whether every exam question has been answered.
+        
+        Returns:
+            bool: True if the exam can be graded
+        """
+        return (self.is_examination_complete() and not self.state.exam_questions and
+                len(self.state.answers_given) == len(self.state.questions_asked))
+    
+    def _build_exam_grading_prompt(self) -> str:
+        """
+        Build the prompt grading every exam answer at once.
+        
+        Returns:
+            str: Exam grading prompt
+        """
+        answers = "\n\n".join(
+            f"Question {i}: {q}\nStudent's answer {i}: {a}"
+            for i, (q, a) in enumerate(zip(self.state.questions_asked, self.state.answers_given), 1)
+        )
+        
+        return f"""{self.examiner_personality}
+
+Document: {self.state.document_analysis}
+
+Document excerpt:
+{self._document_excerpt(" ".join(self.state.questions_asked), 'exam_grading')}...
+
+Examination answers:
+
+{answers}
+
+Grade EVERY answer with a score out of 10 based on:
+- Relevance to the question (3 points)
+- Depth of understanding (3 points)
+- Use of document content (2 points)
+- Clarity of expression (2 points)
+
+For each answer give brief feedback (2-3 sentences): acknowledge strengths for 7+, point out what's good and what needs improvement for 4-6, give specific guidance for 0-3.
+
+Then give a final overall evaluation (4-5 sentences) covering overall understanding, strengths, areas for improvement and a final assessment.
+
+Respond with a JSON object:
+{{"results": [{{"question_number": 1, "marks": 0-10, "feedback": "..."}}, ...], "overall_evaluation": "..."}}
+
+Include exactly one result for each of the {len(self.state.questions_asked)} questions. Be fair and constructive."""
+    
+    def _apply_exam_grading(self, result: Optional[ExamGrading], error: Optional[str]) -> Tuple[str, Optional[str]]:
+        """
+        Record the marks and feedback of a graded exam.
+        
+        Args:
+            result (Optional[ExamGrading]): Validated grading, with a mark for every question
+            error (Optional[str]): Error from the request
+            
+        Returns:
+            Tuple[str, Optional[str]]: (results_with_feedback, error_message)
+        """
+        if not result:
+            return "", error
+        
+        self.state.marks = [marks for marks, _ in result.results]
+        self.state.evaluations = [Evaluation(marks, feedback).to_text() for marks, feedback in result.results]
+        
+        breakdown = "\n\n".join(
+            f"**Q{i}:** {q}\n{e}" for i, (q, e) in enumerate(zip(self.state.questions_asked, self.state.evaluations), 1)
+        )
+        return f"{breakdown}\n\n---\n\n{self._apply_final_summary(result.overall_evaluation)}", None
+    
+    def grade_exam(self) -> Tuple[str, Optional[str]]:
+        """
+        Grade all exam answers and write the final evaluation in one request.
+        
+        Returns:
+            Tuple[str, Optional[str]]: (results_with_feedback, error_message)
+        """
+        if not self.is_exam_ready_for_grading():
+            return "", "⚠️ Please answer every question before grading."
+        
+        result, error = self._generate_structured(
+            self._build_exam_grading_prompt(), ExamGrading, "exam_grading",
+            question_count=len(self.state.questions_asked)
+        )
+        return self._apply_exam_grading(result, error)
+    
+    async def agrade_exam(self) -> Tuple[str, Optional[str]]:
+        """
+        Async variant of grade_exam.
+        
+        Returns:
+            Tuple[str, Optional[str]]: (results_with_feedback, error_message)
+        """
+        if not self.is_exam_ready_for_grading():
+            return "", "⚠️ Please answer every question before grading."
+        
+        result, error = await self._agenerate_structured(
+            self._build_exam_grading_prompt(), ExamGrading, "exam_grading",
+            question_count=len(self.state.questions_asked)
+        )
+        return self._apply_exam_grading(result, error)
+    
+    def _build_summary_prompt(self) -> str:
+        """
+        Build the prompt for the final overall evaluation.
+        
+        Returns:
+            str: Final summary prompt
+        """
+        total_marks, max_marks, percentage = self._score()
         
         qa_summary = ""
         for i, (q, a, e, m) in enumerate(zip(
@@ -571,7 +2391,7 @@ Be fair and constructive. Keep feedback concise."""
         ), 1):
             qa_summary += f"\n**Q{i}:** {q}\n**A{i}:** {a[:100]}...\n**Evaluation:** {e}\n**Marks:** {m}/10\n"
         
-        prompt = f"""{self.examiner_personality}
+        return f"""{self.examiner_personality}
 
 Document: {self.state.document_analysis}
 
@@ -587,16 +2407,28 @@ Provide a final overall evaluation (4-5 sentences) covering:
 - Final assessment
 
 Be constructive and encouraging while maintaining academic standards."""
-
-        # Use premium model for final summary
-        summary, error = self._generate_with_fallback(prompt, use_premium=True)
+    
+    def _apply_final_summary(self, summary: str) -> str:
+        """
+        Store the final evaluation and prepend the marks summary.
         
-        if summary:
-            # Store final evaluation
-            self.state.final_evaluation = summary.strip()
+        Args:
+            summary (str): Model response to the final summary prompt
             
-            # Add marks summary at the beginning
-            marks_summary = f"""**📊 EXAMINATION RESULTS**
+        Returns:
+            str: Results block followed by the final evaluation, or "" if empty
+        """
+        if not summary:
+            return ""
+        
+        total_marks, max_marks, percentage = self._score()
+        status = "PASS ✅" if percentage >= 50 else "FAIL ❌"
+        
+        # Store final evaluation
+        self.state.final_evaluation = summary.strip()
+        
+        # Add marks summary at the beginning
+        return f"""**📊 EXAMINATION RESULTS**
 
 **Total Marks:** {total_marks}/{max_marks} ({percentage:.1f}%)
 **Status:** {status}
@@ -606,18 +2438,95 @@ Be constructive and encouraging while maintaining academic standards."""
 **Final Evaluation:**
 
 {summary}"""
-            return marks_summary, error
+    
+    def _score(self) -> Tuple[int, int, float]:
+        """
+        Calculate total marks and percentage so far.
+        
+        Returns:
+            Tuple[int, int, float]: (total_marks, max_marks, percentage)
+        """
+        total_marks = sum(self.state.marks)
+        max_marks = len(self.state.marks) * 10
+        percentage = (total_marks / max_marks * 100) if max_marks > 0 else 0
+        return total_marks, max_marks, percentage
+    
+    def generate_final_summary(self) -> Tuple[str, Optional[str]]:
+        """
+        Generate a final overall evaluation summary using the premium model.
+        
+        Returns:
+            Tuple[str, Optional[str]]: (summary_with_total_marks, error_message)
+        """
+        if not self.state.questions_asked:
+            return "No questions were asked during this session.", None
+        
+        # Use premium model for final summary
+        summary, error = self._generate_premium(self._build_summary_prompt(), kind="summary")
+        return self._apply_final_summary(summary), error
+    
+    async def agenerate_final_summary(self) -> Tuple[str, Optional[str]]:
+        """
+        Async variant of generate_final_summary.
+        
+        Returns:
+            Tuple[str, Optional[str]]: (summary_with_total_marks, error_message)
+        """
+        if not self.state.questions_asked:
+            return "No questions were asked during this session.", None
         
-        return "", error
+        summary, error = await self._agenerate_premium(self._build_summary_prompt(), kind="summary")
+        return self._apply_final_summary(summary), error
     
     def reset(self):
         """Reset the conversation state for a new document."""
         self.state = ConversationState()
+        self.token_usage = TokenUsage()
+        self._invalidate_prefetch()
+        self._reset_bank()
     
     def reset_state(self):
         """Alias for reset() method for backward compatibility."""
         self.reset()
     
+    def checkpoint(self) -> Dict:
+        """
+        Capture what is needed to resume this examination in another process.
+        
+        Questions generated ahead of time are not included; a restored
+        examiner generates the next question when it is needed.
+        
+        Returns:
+            Dict: JSON-serializable checkpoint, without the document text
+        """
+        return {
+            'state': self.state.to_dict(),
+            'current_model_name': self.current_model_name,
+            'token_usage': self.token_usage.get_totals(),
+            'bank_seen': list(self._bank_seen),
+            'bank_rephrasings': dict(self._bank_rephrasings)
+        }
+    
+    def restore(self, checkpoint: Dict, document_text: str = ""):
+        """
+        Resume an examination from a checkpoint.
+        
+        Args:
+            checkpoint (Dict): Output of checkpoint()
+            document_text (str): Text of the examined document
+        """
+        self._invalidate_prefetch()
+        self.state = ConversationState.from_dict(checkpoint['state'], document_text)
+        self.current_model_name = checkpoint.get('current_model_name', self.current_model_name)
+        
+        usage = checkpoint.get('token_usage') or {}
+        usage_fields = {f.name for f in fields(TokenUsage) if not f.name.startswith('_')}
+        self.token_usage = TokenUsage(**{k: v for k, v in usage.items() if k in usage_fields})
+        
+        self._reset_bank(self.state.document_hash)
+        self._bank_seen = list(checkpoint.get('bank_seen', []))
+        self._bank_rephrasings = dict(checkpoint.get('bank_rephrasings', {}))
+    
     def get_progress(self) -> Tuple[int, int]:
         """
         Get the current progress of the examination.
@@ -631,29 +2540,32 @@ Be constructive and encouraging while maintaining academic standards."""
         """
         Get complete session data for report generation.
         
+        The lists are copies, so the snapshot can be handed to another
+        thread or process while the examination goes on.
+        
         Returns:
             Dict: Session data including all Q&A, marks, and metadata
         """
-        total_marks = sum(self.state.marks)
-        max_marks = len(self.state.marks) * 10
-        percentage = (total_marks / max_marks * 100) if max_marks > 0 else 0
+        total_marks, max_marks, percentage = self._score()
         status = "PASS" if percentage >= 50 else "FAIL"
         
         return {
             'document_title': self.state.document_title,
             'document_analysis': self.state.document_analysis,
             'total_questions': self.state.total_questions,
-            'questions': self.state.questions_asked,
-            'answers': self.state.answers_given,
-            'evaluations': self.state.evaluations,
-            'marks': self.state.marks,
+            'questions': list(self.state.questions_asked),
+            'answers': list(self.state.answers_given),
+            'evaluations': list(self.state.evaluations),
+            'marks': list(self.state.marks),
             'total_marks': total_marks,
             'max_marks': max_marks,
             'percentage': percentage,
             'status': status,
             'final_evaluation': self.state.final_evaluation,
             'lifelines_used': len(self.state.lifelines_used),
-            'lifelines_total': self.state.lifelines_total
+            'lifelines_total': self.state.lifelines_total,
+            'exam_mode': self.state.exam_mode,
+            'token_usage': self.token_usage.get_totals()
         }
 
 
@@ -671,7 +2583,7 @@ def create_examiner(api_key: Optional[str] = None) -> ExaminerAI:
     if api_key is None:
         api_key = os.getenv('GEMINI_API_KEY')
     
-    if not api_key:
+    if not api_key and not uses_fake_backend():
         raise ValueError("Gemini API key not found. Set GEMINI_API_KEY environment variable.")
     
     return ExaminerAI(api_key)
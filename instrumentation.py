@@ -0,0 +1,535 @@
+"""
+Instrumentation Module
+======================
+This module records every model call attempt made by the examiner, so
+that per-model latency, fallback frequency, 429 rate and the error mix
+can be monitored in production.
+
+Each attempt produces a CallEvent (model, prompt kind, latency, tokens,
+outcome and fallback depth) which is:
+    - aggregated into Prometheus-style counters and histograms, served
+      as text on /metrics by a small built-in HTTP server (METRICS_PORT)
+    - passed to registered listeners, and optionally printed as one JSON
+      line per event (INSTRUMENTATION_LOG_EVENTS)
+
+Outcomes are 'success', 'rate_limited' (429 / quota), 'not_found',
+'error' and 'cancelled' (e.g. the losing request of a hedge).
+
+Dependencies:
+    - Standard library only
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+
+# Histogram buckets, in seconds
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+
+# Histogram buckets for the number of models tried before the one that answered
+DEPTH_BUCKETS = (0, 1, 2, 3, 4)
+
+OUTCOMES = ('success', 'rate_limited', 'not_found', 'error', 'cancelled')
+
+
+def classify_error(error_str: str) -> str:
+    """
+    Map a model error to an outcome.
+
+    Args:
+        error_str (str): Error raised by the model
+
+    Returns:
+        str: 'rate_limited', 'not_found' or 'error'
+    """
+    lowered = error_str.lower()
+    if "429" in error_str or "quota" in lowered or "rate limit" in lowered:
+        return 'rate_limited'
+    if "404" in error_str or "not found" in lowered:
+        return 'not_found'
+    return 'error'
+
+
+@dataclass
+class CallEvent:
+    """
+    One model call attempt.
+
+    Attributes:
+        model: Model name
+        kind: Prompt kind, e.g. 'analysis', 'question', 'evaluation' or 'summary'
+            ('summary_hedge' for the fast-model hedge of a slow summary)
+        outcome: One of OUTCOMES
+        latency_seconds: Time from preparing the request (prompt fitting included)
+            to the full response or failure
+        fallback_depth: Models tried before this one for the same request (0 = first choice)
+        input_tokens: Prompt tokens (successful calls only)
+        output_tokens: Response tokens (successful calls only)
+        first_token_seconds: Time to the first streamed chunk, for streamed calls
+        streamed: Whether the response was streamed
+        error: Error message of a failed attempt
+        timestamp: When the attempt finished (seconds since epoch)
+    """
+    model: str
+    kind: str
+    outcome: str
+    latency_seconds: float
+    fallback_depth: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    first_token_seconds: Optional[float] = None
+    streamed: bool = False
+    error: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict:
+        """
+        Get the event as a plain dict.
+
+        Returns:
+            Dict: Event fields
+        """
+        return asdict(self)
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    """Format a Prometheus label set."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram per label set (Prometheus semantics).
+
+    Not thread-safe on its own; the owning CallMetrics holds the lock.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        """
+        Initialize the histogram.
+
+        Args:
+            name (str): Metric name
+            help_text (str): Metric description
+            label_names (Sequence[str]): Label names
+            buckets (Sequence[float]): Upper bounds, ascending
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels -> ([count per bucket], sum, count)
+        self._series: Dict[Tuple, List] = {}
+
+    def observe(self, labels: Tuple, value: float):
+        """
+        Add an observation.
+
+        Args:
+            labels (Tuple): Label values, in label_names order
+            value (float): Observed value
+        """
+        series = self._series.setdefault(labels, [[0] * len(self.buckets), 0.0, 0])
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+        series[1] += value
+        series[2] += 1
+
+    def quantile(self, q: float, **match) -> Optional[float]:
+        """
+        Estimate a quantile over the series matching some labels.
+
+        The estimate is the upper bound of the bucket the quantile falls in.
+
+        Args:
+            q (float): Quantile between 0 and 1
+            **match: Label values to select, e.g. kind='evaluation'
+
+        Returns:
+            Optional[float]: Estimated value, or None without observations
+            (inf if it lies beyond the last bucket)
+        """
+        counts, total = [0] * len(self.buckets), 0
+        for labels, series in self._series.items():
+            values = dict(zip(self.label_names, labels))
+            if all(values.get(name) == value for name, value in match.items()):
+                counts = [a + b for a, b in zip(counts, series[0])]
+                total += series[2]
+        if not total:
+            return None
+        for bound, count in zip(self.buckets, counts):
+            if count >= q * total:
+                return bound
+        return float('inf')
+
+    def render(self) -> List[str]:
+        """Render the histogram in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                bucket_labels = _labels(self.label_names, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {bucket_count}")
+            bucket_labels = _labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {round(total, 6)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Counter:
+    """
+    Monotonic counter per label set.
+
+    Not thread-safe on its own; the owning CallMetrics holds the lock.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        """
+        Initialize the counter.
+
+        Args:
+            name (str): Metric name
+            help_text (str): Metric description
+            label_names (Sequence[str]): Label names
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple, amount: float = 1):
+        """
+        Increase the counter.
+
+        Args:
+            labels (Tuple): Label values, in label_names order
+            amount (float): Amount to add
+        """
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, labels: Tuple) -> float:
+        """Get the current value for a label set."""
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        """Render the counter in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class CallMetrics:
+    """
+    Thread-safe aggregation of call events and event fan-out.
+
+    Keeps the most recent events in memory for debugging, and calls every
+    registered listener with each event.
+    """
+
+    def __init__(self, log_events: bool = False, max_recent: int = 500):
+        """
+        Initialize empty metrics.
+
+        Args:
+            log_events (bool): Print every event as a JSON line
+            max_recent (int): Events kept for recent_events()
+        """
+        self.log_events = log_events
+
+        self.calls = Counter("examiner_llm_calls_total", "Model call attempts by outcome.",
+                             ("model", "kind", "outcome"))
+        self.tokens = Counter("examiner_llm_tokens_total", "Tokens of successful model calls.",
+                              ("model", "kind", "direction"))
+        self.latency = Histogram("examiner_llm_call_latency_seconds", "Latency of model call attempts.",
+                                 ("model", "kind", "outcome"), LATENCY_BUCKETS)
+        self.first_token = Histogram("examiner_llm_first_token_seconds", "Time to the first chunk of streamed calls.",
+                                     ("model", "kind"), LATENCY_BUCKETS)
+        self.depth = Histogram("examiner_llm_fallback_depth", "Models tried before the one that answered.",
+                               ("kind",), DEPTH_BUCKETS)
+
+        self._recent: Deque[CallEvent] = deque(maxlen=max(1, max_recent))
+        self._listeners: List[Callable[[CallEvent], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[CallEvent], None]):
+        """
+        Register a callback receiving every event.
+
+        Args:
+            listener (Callable[[CallEvent], None]): Called after each attempt;
+                it runs on the request's thread, so it must be quick
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[CallEvent], None]):
+        """
+        Unregister a callback.
+
+        Args:
+            listener (Callable[[CallEvent], None]): Callback passed to add_listener
+        """
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def record(self, event: CallEvent):
+        """
+        Record one call attempt.
+
+        Args:
+            event (CallEvent): The attempt
+        """
+        with self._lock:
+            self.calls.inc((event.model, event.kind, event.outcome))
+            self.latency.observe((event.model, event.kind, event.outcome), event.latency_seconds)
+            if event.outcome == 'success':
+                self.tokens.inc((event.model, event.kind, 'input'), event.input_tokens)
+                self.tokens.inc((event.model, event.kind, 'output'), event.output_tokens)
+                self.depth.observe((event.kind,), event.fallback_depth)
+            if event.first_token_seconds is not None:
+                self.first_token.observe((event.model, event.kind), event.first_token_seconds)
+            self._recent.append(event)
+            listeners = list(self._listeners)
+
+        if self.log_events:
+            print(json.dumps(dict(event.to_dict(), event="llm_call")))
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Error in instrumentation listener: {str(e)}")
+
+    def recent_events(self) -> List[Dict]:
+        """
+        Get the most recent events, oldest first.
+
+        Returns:
+            List[Dict]: Event dicts
+        """
+        with self._lock:
+            return [event.to_dict() for event in self._recent]
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """
+        Get a per-model and per-kind summary for monitoring.
+
+        Returns:
+            Dict: 'by_model' and 'by_kind' -> name -> attempts, outcome counts,
+            approximate p50/p95 latency of successful calls and mean fallback depth
+        """
+        with self._lock:
+            summary: Dict[str, Dict] = {'by_model': {}, 'by_kind': {}}
+            for (model, kind, outcome), count in self.calls._values.items():
+                for group, key in (('by_model', model), ('by_kind', kind)):
+                    entry = summary[group].setdefault(key, {'attempts': 0, **{o: 0 for o in OUTCOMES}})
+                    entry['attempts'] += count
+                    entry[outcome] += count
+
+            for group, label in (('by_model', 'model'), ('by_kind', 'kind')):
+                for name, entry in summary[group].items():
+                    entry['p50_seconds'] = self.latency.quantile(0.5, outcome='success', **{label: name})
+                    entry['p95_seconds'] = self.latency.quantile(0.95, outcome='success', **{label: name})
+
+            for kind, entry in summary['by_kind'].items():
+                depth = self.depth._series.get((kind,))
+                if depth and depth[2]:
+                    entry['mean_fallback_depth'] = round(depth[1] / depth[2], 3)
+            return summary
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text
+        """
+        with self._lock:
+            lines = []
+            for metric in (self.calls, self.tokens, self.latency, self.first_token, self.depth):
+                lines.extend(metric.render())
+            return "\n".join(lines) + "\n"
+
+
+class CallTimer:
+    """
+    Times one attempt and records it when finished.
+
+    Created by ExaminerAI for each model it sends a request to.
+    """
+
+    def __init__(self, metrics: CallMetrics, model: str, kind: str, fallback_depth: int, streamed: bool = False):
+        """
+        Start timing an attempt.
+
+        Args:
+            metrics (CallMetrics): Where the event is recorded
+            model (str): Model name
+            kind (str): Prompt kind
+            fallback_depth (int): Models tried before this one
+            streamed (bool): Whether the response is streamed
+        """
+        self.metrics = metrics
+        self.model = model
+        self.kind = kind
+        self.fallback_depth = fallback_depth
+        self.streamed = streamed
+        self.started = time.perf_counter()
+        self.first_token_seconds: Optional[float] = None
+        self.finished = False
+
+    def first_token(self):
+        """Mark the arrival of the first streamed chunk."""
+        if self.first_token_seconds is None:
+            self.first_token_seconds = time.perf_counter() - self.started
+
+    def success(self, tokens: Optional[Dict[str, int]] = None):
+        """
+        Record a successful attempt.
+
+        Args:
+            tokens (Optional[Dict[str, int]]): 'input_tokens' / 'output_tokens' of the call
+        """
+        tokens = tokens or {}
+        self._finish('success', input_tokens=tokens.get('input_tokens', 0),
+                     output_tokens=tokens.get('output_tokens', 0))
+
+    def failure(self, error_str: str):
+        """
+        Record a failed attempt.
+
+        Args:
+            error_str (str): Error raised by the model
+        """
+        self._finish(classify_error(error_str), error=error_str[:500])
+
+    def cancelled(self):
+        """Record an attempt abandoned before it finished."""
+        self._finish('cancelled')
+
+    def _finish(self, outcome: str, **fields):
+        """Record the event once."""
+        if self.finished:
+            return
+        self.finished = True
+        self.metrics.record(CallEvent(
+            model=self.model,
+            kind=self.kind,
+            outcome=outcome,
+            latency_seconds=round(time.perf_counter() - self.started, 4),
+            fallback_depth=self.fallback_depth,
+            first_token_seconds=None if self.first_token_seconds is None else round(self.first_token_seconds, 4),
+            streamed=self.streamed,
+            **fields
+        ))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves /metrics (Prometheus text) and /metrics.json (summary)."""
+
+    metrics: CallMetrics
+
+    def do_GET(self):
+        if self.path.split('?')[0] == '/metrics':
+            body, content_type = self.metrics.render().encode(), 'text/plain; version=0.0.4'
+        elif self.path.split('?')[0] == '/metrics.json':
+            body, content_type = json.dumps(self.metrics.get_stats()).encode(), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes would flood the app log
+        pass
+
+
+def start_metrics_server(metrics: CallMetrics, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Serve the metrics over HTTP on a daemon thread.
+
+    Args:
+        metrics (CallMetrics): Metrics to serve
+        port (int): Port to listen on (0 picks a free port)
+        host (str): Interface to listen on
+
+    Returns:
+        ThreadingHTTPServer: The running server
+    """
+    handler = type('MetricsHandler', (_MetricsHandler,), {'metrics': metrics})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+# Process-wide metrics shared by every examiner
+_shared_metrics: Optional[CallMetrics] = None
+_shared_server: Optional[ThreadingHTTPServer] = None
+_shared_lock = threading.Lock()
+
+
+def get_call_metrics() -> CallMetrics:
+    """
+    Get the process-wide call metrics.
+
+    Environment variables:
+        INSTRUMENTATION_LOG_EVENTS: Print each call event as a JSON line (default false)
+
+    Returns:
+        CallMetrics: Shared metrics
+    """
+    global _shared_metrics
+    with _shared_lock:
+        if _shared_metrics is None:
+            _shared_metrics = CallMetrics(
+                log_events=os.getenv('INSTRUMENTATION_LOG_EVENTS', 'false').lower() in ('1', 'true', 'yes')
+            )
+        return _shared_metrics
+
+
+def serve_metrics() -> Optional[int]:
+    """
+    Start the metrics endpoint if METRICS_PORT is set (once per process).
+
+    Environment variables:
+        METRICS_PORT: Port for /metrics and /metrics.json (unset = disabled)
+        METRICS_HOST: Interface to listen on (default 0.0.0.0)
+
+    Returns:
+        Optional[int]: The port being served, or None if disabled or it failed to start
+    """
+    global _shared_server
+    port = os.getenv('METRICS_PORT')
+    if not port:
+        return None
+
+    metrics = get_call_metrics()
+    with _shared_lock:
+        if _shared_server is None:
+            try:
+                _shared_server = start_metrics_server(metrics, int(port), os.getenv('METRICS_HOST', '0.0.0.0'))
+            except (OSError, ValueError) as e:
+                print(f"Error starting metrics server: {str(e)}")
+                return None
+        return _shared_server.server_address[1]
@@ -0,0 +1,399 @@
+"""
+Model Backends Module
+=====================
+This module provides the model objects the examiner sends its prompts to.
+
+A backend turns a model name into an object with the subset of the
+google-generativeai GenerativeModel interface the examiner uses:
+generate_content() and generate_content_async() (optionally streamed),
+and count_tokens(). Two backends are available:
+    - GeminiBackend: the real Gemini API
+    - FakeBackend: local canned responses with configurable latency
+      distributions and injected 429 / 404 errors, for load tests and
+      benchmarks that must not spend API quota
+
+Fake responses follow the request: JSON-mode requests get an object
+that validates against the response schema (sized from the counts
+asked for in the prompt), and plain-text requests get a question,
+question bank pairs or a summary paragraph.
+
+Dependencies:
+    - google.generativeai: GeminiBackend only
+    - prompt_budget: Token estimates for fake usage metadata
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import types
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from prompt_budget import estimate_tokens
+
+
+class ModelBackend(ABC):
+    """
+    Creates the model objects used by ExaminerAI.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def model(self, model_name: str) -> Any:
+        """
+        Get a model object.
+
+        Args:
+            model_name (str): Model name, e.g. 'gemini-2.5-flash'
+
+        Returns:
+            Any: Object with generate_content, generate_content_async and count_tokens
+        """
+
+
+class GeminiBackend(ModelBackend):
+    """
+    The Gemini API through google-generativeai.
+    """
+
+    name = "gemini"
+
+    def __init__(self, api_key: str):
+        """
+        Configure the SDK.
+
+        Args:
+            api_key (str): Google Gemini API key
+        """
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self._genai = genai
+
+    def model(self, model_name: str) -> Any:
+        return self._genai.GenerativeModel(model_name)
+
+
+@dataclass
+class LatencyDistribution:
+    """
+    Distribution of simulated response times.
+
+    Attributes:
+        kind: 'fixed', 'uniform', 'normal' or 'lognormal'
+        a: Fixed value, uniform low bound, normal mean or lognormal median (seconds)
+        b: Uniform high bound, normal standard deviation or lognormal sigma
+    """
+    kind: str = 'lognormal'
+    a: float = 1.5
+    b: float = 0.4
+
+    def sample(self, rng: random.Random) -> float:
+        """
+        Draw one latency.
+
+        Args:
+            rng (random.Random): Random source
+
+        Returns:
+            float: Seconds (never negative)
+        """
+        if self.kind == 'fixed':
+            value = self.a
+        elif self.kind == 'uniform':
+            value = rng.uniform(self.a, self.b)
+        elif self.kind == 'normal':
+            value = rng.gauss(self.a, self.b)
+        else:
+            value = self.a * math.exp(rng.gauss(0, self.b))
+        return max(0.0, value)
+
+
+def parse_latency(spec: str) -> LatencyDistribution:
+    """
+    Parse a latency distribution such as "lognormal:1.5:0.4".
+
+    Accepted forms: "fixed:S", "uniform:LOW:HIGH", "normal:MEAN:SD" and
+    "lognormal:MEDIAN:SIGMA" (all in seconds, except sigma). A bare
+    number is a fixed latency.
+
+    Args:
+        spec (str): Distribution spec
+
+    Returns:
+        LatencyDistribution: Parsed distribution
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    parts = [part.strip() for part in (spec or "").split(':')]
+    try:
+        if len(parts) == 1:
+            return LatencyDistribution('fixed', float(parts[0]), 0.0)
+        kind, values = parts[0].lower(), [float(part) for part in parts[1:]]
+    except ValueError:
+        raise ValueError(f"Invalid latency spec '{spec}'")
+    if kind == 'fixed' and len(values) == 1:
+        return LatencyDistribution('fixed', values[0], 0.0)
+    if kind in ('uniform', 'normal', 'lognormal') and len(values) == 2:
+        return LatencyDistribution(kind, values[0], values[1])
+    raise ValueError(f"Invalid latency spec '{spec}'")
+
+
+def _schema_value(schema: Dict, name: str, index: int, count: int, rng: random.Random) -> Any:
+    """Build a value matching a JSON schema, with examiner-specific field rules."""
+    kind = schema.get('type')
+    if kind == 'object':
+        return {
+            key: _schema_value(sub, key, index, count, rng)
+            for key, sub in schema.get('properties', {}).items()
+        }
+    if kind == 'array':
+        return [_schema_value(schema.get('items', {}), name, i, count, rng) for i in range(1, count + 1)]
+    if kind == 'integer':
+        if name == 'marks':
+            return rng.randint(3, 10)
+        return index
+    if name == 'document_type':
+        return 'research_paper'
+    if name == 'feedback':
+        return "The answer identifies the main idea and uses the document, but it could explain the reasoning in more depth."
+    if name in ('questions', 'focus_areas'):
+        label = 'question' if name == 'questions' else 'focus area'
+        return f"Simulated {label} {index}: how does the document justify its approach to topic {index}?"
+    if name == 'question':
+        return f"Simulated bank question {index}: what problem does section {index} address?"
+    if name == 'rephrasing':
+        return f"In simple terms, what is section {index} about?"
+    return f"Simulated {name.replace('_', ' ')} of the document."
+
+
+def fake_response_text(prompt: str, generation_config: Optional[Dict], rng: random.Random) -> str:
+    """
+    Build a plausible response for a prompt.
+
+    Args:
+        prompt (str): Prompt text
+        generation_config (Optional[Dict]): SDK generation config (a response_schema means JSON mode)
+        rng (random.Random): Random source
+
+    Returns:
+        str: Response text
+    """
+    schema = (generation_config or {}).get('response_schema')
+    if schema:
+        # Size lists from what the prompt asks for ("EXACTLY 5", "each of the 3 questions")
+        match = re.search(r'EXACTLY (\d+)|each of the (\d+) questions|exactly (\d+)', prompt)
+        count = int(next(group for group in match.groups() if group)) if match else 5
+        return json.dumps(_schema_value(schema, '', 1, count, rng))
+
+    if 'rephrased question' in prompt:
+        return "In simpler terms, what is the main idea the document presents here?"
+    if 'ONLY the question' in prompt:
+        return f"Simulated question {rng.randint(1, 10 ** 6)}: how does the document support its main claim?"
+    return ("Overall, the student showed a reasonable understanding of the document. "
+            "Answers were relevant and mostly accurate, with room for more depth and evidence. "
+            "Strengths: clear structure. Areas to improve: use more specific details from the text.")
+
+
+class _FakeStream:
+    """Chunks of a fake streamed response, iterable both sync and async."""
+
+    def __init__(self, text: str, usage: Any, delays: List[float], chunks: List[str]):
+        self.text = text
+        self.usage_metadata = usage
+        self._delays = delays
+        self._chunks = chunks
+
+    def __iter__(self) -> Iterator:
+        for delay, chunk in zip(self._delays, self._chunks):
+            time.sleep(delay)
+            yield types.SimpleNamespace(text=chunk)
+
+    async def __aiter__(self):
+        for delay, chunk in zip(self._delays, self._chunks):
+            await asyncio.sleep(delay)
+            yield types.SimpleNamespace(text=chunk)
+
+
+class FakeModel:
+    """
+    Stand-in for genai.GenerativeModel driven by a FakeBackend.
+    """
+
+    def __init__(self, backend: "FakeBackend", model_name: str):
+        self.backend = backend
+        self.model_name = model_name
+
+    def count_tokens(self, contents: str) -> Any:
+        return types.SimpleNamespace(total_tokens=estimate_tokens(str(contents)))
+
+    def generate_content(self, contents: str, generation_config: Optional[Dict] = None, stream: bool = False, **kwargs):
+        delay, error, text = self.backend.plan(self.model_name, str(contents), generation_config)
+        if error:
+            time.sleep(delay)
+            raise Exception(error)
+        if stream:
+            return self.backend.stream(str(contents), text, delay)
+        time.sleep(delay)
+        return self.backend.response(str(contents), text)
+
+    async def generate_content_async(self, contents: str, generation_config: Optional[Dict] = None,
+                                     stream: bool = False, **kwargs):
+        delay, error, text = self.backend.plan(self.model_name, str(contents), generation_config)
+        if error:
+            await asyncio.sleep(delay)
+            raise Exception(error)
+        if stream:
+            return self.backend.stream(str(contents), text, delay)
+        await asyncio.sleep(delay)
+        return self.backend.response(str(contents), text)
+
+
+class FakeBackend(ModelBackend):
+    """
+    Local fake of the Gemini API for load tests and benchmarks.
+
+    Latencies are drawn per request from a distribution (premium '-pro'
+    models can have their own), and each request fails with a 429 or a
+    404 at the configured rates. Errors come back after a tenth of the
+    drawn latency, like a real quota rejection.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: Optional[LatencyDistribution] = None,
+                 premium_latency: Optional[LatencyDistribution] = None,
+                 rate_429: float = 0.0, rate_404: float = 0.0,
+                 stream_chunks: int = 8, seed: Optional[int] = None):
+        """
+        Initialize the fake.
+
+        Args:
+            latency (Optional[LatencyDistribution]): Response time of the flash models
+            premium_latency (Optional[LatencyDistribution]): Response time of '-pro' models
+            rate_429 (float): Probability that a request is rate limited
+            rate_404 (float): Probability that a request reports the model as not found
+            stream_chunks (int): Chunks per streamed response
+            seed (Optional[int]): Seed for reproducible runs
+        """
+        self.latency = latency or LatencyDistribution('lognormal', 1.5, 0.4)
+        self.premium_latency = premium_latency or LatencyDistribution('lognormal', 6.0, 0.5)
+        self.rate_429 = rate_429
+        self.rate_404 = rate_404
+        self.stream_chunks = max(1, stream_chunks)
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def model(self, model_name: str) -> FakeModel:
+        return FakeModel(self, model_name)
+
+    def plan(self, model_name: str, prompt: str, generation_config: Optional[Dict]):
+        """
+        Decide the latency, error and text of one request.
+
+        Args:
+            model_name (str): Model the request is sent to
+            prompt (str): Prompt text
+            generation_config (Optional[Dict]): SDK generation config
+
+        Returns:
+            Tuple[float, Optional[str], str]: (delay_seconds, error_message, response_text)
+        """
+        with self._lock:
+            self.requests += 1
+            distribution = self.premium_latency if '-pro' in model_name else self.latency
+            delay = distribution.sample(self._rng)
+            roll = self._rng.random()
+            if roll < self.rate_429:
+                return delay / 10, "429 Resource has been exhausted (e.g. check quota).", ""
+            if roll < self.rate_429 + self.rate_404:
+                return delay / 10, f"404 models/{model_name} is not found for API version v1beta", ""
+            return delay, None, fake_response_text(prompt, generation_config, self._rng)
+
+    @staticmethod
+    def _usage(prompt: str, text: str) -> Any:
+        return types.SimpleNamespace(
+            prompt_token_count=estimate_tokens(prompt),
+            candidates_token_count=estimate_tokens(text)
+        )
+
+    def response(self, prompt: str, text: str) -> Any:
+        """Build a complete (non-streamed) response."""
+        return types.SimpleNamespace(text=text, usage_metadata=self._usage(prompt, text))
+
+    def stream(self, prompt: str, text: str, delay: float) -> _FakeStream:
+        """
+        Build a streamed response.
+
+        A third of the latency passes before the first chunk and the rest
+        is spread over the remaining chunks.
+        """
+        step = max(1, math.ceil(len(text) / self.stream_chunks))
+        chunks = [text[i:i + step] for i in range(0, len(text), step)] or [""]
+        rest = delay * 2 / 3 / max(1, len(chunks) - 1) if len(chunks) > 1 else 0.0
+        delays = [delay / 3 if len(chunks) > 1 else delay] + [rest] * (len(chunks) - 1)
+        return _FakeStream(text, self._usage(prompt, text), delays, chunks)
+
+
+def uses_fake_backend() -> bool:
+    """
+    Check whether MODEL_BACKEND selects the fake backend.
+
+    Returns:
+        bool: True if no API key is needed
+    """
+    return os.getenv('MODEL_BACKEND', 'gemini').lower() == 'fake'
+
+
+# Process-wide fake, so all sessions draw latencies and errors from one random stream
+_shared_fake: Optional[FakeBackend] = None
+_shared_lock = threading.Lock()
+
+
+def create_backend(api_key: Optional[str] = None) -> ModelBackend:
+    """
+    Create the model backend selected by environment variables.
+
+    The fake backend is shared by every examiner in the process: one
+    backend per examiner would replay the same seeded sequence in every
+    session, lining up the injected errors across sessions.
+
+    Environment variables:
+        MODEL_BACKEND: 'gemini' (default) or 'fake'
+        FAKE_LATENCY: Flash model latency, e.g. "lognormal:1.5:0.4" (see parse_latency)
+        FAKE_PREMIUM_LATENCY: Premium model latency (default "lognormal:6:0.5")
+        FAKE_429_RATE: Probability of an injected 429 (default 0)
+        FAKE_404_RATE: Probability of an injected 404 (default 0)
+        FAKE_SEED: Random seed (unset = not reproducible)
+
+    Args:
+        api_key (Optional[str]): Gemini API key (not needed for the fake)
+
+    Returns:
+        ModelBackend: Configured backend
+    """
+    if not uses_fake_backend():
+        return GeminiBackend(api_key)
+
+    global _shared_fake
+    with _shared_lock:
+        if _shared_fake is None:
+            seed = os.getenv('FAKE_SEED')
+            _shared_fake = FakeBackend(
+                latency=parse_latency(os.getenv('FAKE_LATENCY', 'lognormal:1.5:0.4')),
+                premium_latency=parse_latency(os.getenv('FAKE_PREMIUM_LATENCY', 'lognormal:6:0.5')),
+                rate_429=float(os.getenv('FAKE_429_RATE', '0')),
+                rate_404=float(os.getenv('FAKE_404_RATE', '0')),
+                seed=int(seed) if seed else None
+            )
+        return _shared_fake
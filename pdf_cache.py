@@ -0,0 +1,254 @@
+"""
+PDF Cache Module
+================
+This module caches PDF extraction results by the content of the file.
+
+The same course handout is often uploaded by many students. Entries are
+keyed by a streaming SHA-256 of the PDF bytes, so any upload of the same
+file skips parsing entirely, regardless of its filename.
+
+Two tiers are used:
+    - An in-memory LRU of recently used entries
+    - A local disk directory of gzip-compressed JSON files, bounded in
+      total size and evicted least-recently-used first
+
+Dependencies:
+    - Standard library only
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+# Bump when extraction output changes so stale entries are not served
+EXTRACTION_VERSION = 3
+
+# Read size used when hashing files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    """
+    Compute the SHA-256 of a file without loading it into memory.
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        str: Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PDFExtractionCache:
+    """
+    Two-tier (memory + disk) cache of PDF extraction results.
+
+    An entry is a dict with the extracted 'text', the PDF 'metadata',
+    the handler's 'summary' and the 'routed_pages' re-read by pdfplumber.
+    """
+
+    def __init__(self, cache_dir: str, max_disk_mb: float = 256, max_memory_entries: int = 32):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str): Directory for the disk tier
+            max_disk_mb (float): Maximum total size of the disk tier
+            max_memory_entries (int): Maximum number of entries kept in memory
+        """
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.max_memory_entries = max(0, max_memory_entries)
+
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, pdf_path: str, variant: str = "") -> str:
+        """
+        Build the cache key for a PDF file.
+
+        Args:
+            pdf_path (str): Path to the PDF file
+            variant (str): Extraction options that change the output
+                (e.g. a character budget), empty for a full extraction
+
+        Returns:
+            str: Content hash combined with the extraction version
+        """
+        key = f"{hash_file(pdf_path)}-v{EXTRACTION_VERSION}"
+        return f"{key}-{variant}" if variant else key
+
+    def _path(self, key: str) -> str:
+        """Disk location of an entry."""
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up an entry, checking memory first and then disk.
+
+        Args:
+            key (str): Cache key from make_key()
+
+        Returns:
+            Optional[Dict]: Cached entry, or None on a miss
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+            # Mark as recently used for disk eviction
+            os.utime(path, None)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, entry: Dict):
+        """
+        Store an entry in both tiers.
+
+        Args:
+            key (str): Cache key from make_key()
+            entry (Dict): Extraction result to cache
+        """
+        with self._lock:
+            self._remember(key, entry)
+
+        path = self._path(key)
+        tmp_path = None
+        try:
+            # Write to a temporary file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                f.write(json.dumps(entry).encode('utf-8'))
+            os.replace(tmp_path, path)
+            self._evict_disk()
+        except OSError as e:
+            print(f"Error writing PDF cache entry: {str(e)}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _remember(self, key: str, entry: Dict):
+        """Add an entry to the memory tier (caller must hold the lock)."""
+        if self.max_memory_entries == 0:
+            return
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """Delete least recently used files until the disk tier fits its budget."""
+        files = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json.gz'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json.gz'):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics for monitoring.
+
+        Returns:
+            Dict: Hits, misses and memory tier size
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'memory_entries': len(self._memory)
+            }
+
+
+# Process-wide cache shared by every PDFHandler
+_shared_cache: Optional[PDFExtractionCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_pdf_cache() -> Optional[PDFExtractionCache]:
+    """
+    Get the process-wide PDF extraction cache.
+
+    Environment variables:
+        PDF_CACHE_ENABLED: Set to "false" to disable caching (default true)
+        PDF_CACHE_DIR: Disk tier directory (default <tmp>/examiner_ai/pdf_cache)
+        PDF_CACHE_MB: Disk tier size limit in MB (default 256)
+        PDF_CACHE_MEMORY_ENTRIES: Entries kept in memory (default 32)
+
+    Returns:
+        Optional[PDFExtractionCache]: Shared cache, or None if disabled
+    """
+    global _shared_cache
+    if os.getenv('PDF_CACHE_ENABLED', 'true').lower() not in ('1', 'true', 'yes'):
+        return None
+
+    with _shared_lock:
+        if _shared_cache is None:
+            cache_dir = os.getenv(
+                'PDF_CACHE_DIR',
+                os.path.join(tempfile.gettempdir(), 'examiner_ai', 'pdf_cache')
+            )
+            try:
+                _shared_cache = PDFExtractionCache(
+                    cache_dir,
+                    max_disk_mb=float(os.getenv('PDF_CACHE_MB', '256')),
+                    max_memory_entries=int(os.getenv('PDF_CACHE_MEMORY_ENTRIES', '32'))
+                )
+            except OSError as e:
+                print(f"Error creating PDF cache directory: {str(e)}")
+                return None
+        return _shared_cache
@@ -7,11 +7,249 @@ It provides functionality to extract text content from uploaded PDF files.
 Dependencies:
     - PyMuPDF (fitz): Primary PDF text extraction
     - pdfplumber: Fallback for complex PDFs
+    - pdf_cache: Content-addressed cache of extraction results
+
+Extraction can be bounded with a character budget (PDF_MAX_CHARS): pages
+are streamed one at a time and reading stops once the budget is filled,
+so very large PDFs cost time and memory proportional to the budget
+rather than to the document.
+
+Engine selection is per page: PyMuPDF reads every page, and pages whose
+text scores poorly (hardly any text for their area, unmapped glyphs, or
+ruled tables whose rows PyMuPDF splits into one line per cell) are
+re-read with pdfplumber. pdfplumber opens the file at most once and only
+parses those pages. PDF_PAGE_ROUTING=false restores the old behaviour of
+re-reading the whole document with pdfplumber when PyMuPDF finds almost
+no text.
 """
 
+import multiprocessing
+import os
+import re
+import threading
 import fitz  # PyMuPDF
 import pdfplumber
-from typing import Optional, Dict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Dict, Iterable, Iterator, List, Tuple
+from pdf_cache import PDFExtractionCache, get_pdf_cache
+
+
+# Process pool for page-parallel extraction (created on first use)
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+_shared_lock = threading.Lock()
+
+# Page quality thresholds: pages below them are re-read with pdfplumber
+MIN_PAGE_DENSITY = 0.5  # visible characters per square inch
+MIN_GLYPH_RATIO = 0.9  # share of visible characters that are mapped glyphs
+MIN_SHORT_LINE_RATIO = 0.25  # share of lines of at most 3 words (table cells) before looking for tables
+TABLE_SHORT_LINE_RATIO = 0.5  # share from which a ruled page is taken as a table without find_tables
+MIN_TABLE_DRAWINGS = 4  # vector drawings on a page before looking for ruled tables
+
+# What PyMuPDF emits for glyphs it cannot map to text
+_UNMAPPED_GLYPHS = re.compile('[\ufffd\ue000-\uf8ff\x00-\x08\x0e-\x1f]')
+
+
+def _get_extraction_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Get the shared process pool used for page-parallel extraction.
+    
+    Workers are spawned rather than forked: a fork of the server would
+    copy the state of its other threads (held locks, open SQLite and
+    MuPDF handles) into every worker.
+    
+    Args:
+        workers (int): Number of worker processes
+        
+    Returns:
+        ProcessPoolExecutor: Shared extraction pool
+    """
+    global _extraction_pool
+    with _shared_lock:
+        if _extraction_pool is None:
+            _extraction_pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return _extraction_pool
+
+
+def _discard_extraction_pool(pool: ProcessPoolExecutor):
+    """
+    Drop the shared pool after one of its workers died, so the next
+    document starts a new one.
+    
+    Args:
+        pool (ProcessPoolExecutor): The broken pool
+    """
+    global _extraction_pool
+    with _shared_lock:
+        if _extraction_pool is not pool:
+            # Already replaced by another extraction
+            return
+        _extraction_pool = None
+    pool.shutdown(wait=False)
+
+
+def score_page(page: fitz.Page, text: str) -> Dict[str, any]:
+    """
+    Score how well PyMuPDF extracted the text of a page.
+    
+    Sparse pages with images are left alone: they are scans without a
+    text layer, which pdfplumber cannot read either. Ruled tables show
+    as vector drawings plus many short lines (PyMuPDF puts each table
+    cell on its own line). Pages that are mostly short lines are taken
+    as tables right away; find_tables, which costs more than re-reading
+    the page with pdfplumber, only settles the ambiguous pages in between.
+    
+    Args:
+        page (fitz.Page): Open PyMuPDF page
+        text (str): Text PyMuPDF extracted from the page
+        
+    Returns:
+        Dict: density (visible characters per square inch), glyph_ratio,
+        short_line_ratio, has_images, tables (find_tables count, None if not run) and
+        reason (why the page should be re-read with pdfplumber, None to
+        keep the text)
+    """
+    visible = len("".join(text.split()))
+    area = max(page.rect.width * page.rect.height / 72 ** 2, 1e-6)
+    lines = [line for line in text.splitlines() if line.strip()]
+    score = {
+        'density': visible / area,
+        'glyph_ratio': max(0.0, 1 - len(_UNMAPPED_GLYPHS.findall(text)) / visible) if visible else 1.0,
+        'short_line_ratio': sum(len(line.split()) <= 3 for line in lines) / len(lines) if lines else 0.0,
+        'has_images': bool(page.get_images()),
+        'tables': None,
+        'reason': None
+    }
+    
+    if score['density'] < MIN_PAGE_DENSITY:
+        if not score['has_images']:
+            score['reason'] = 'sparse'
+        return score
+    if score['glyph_ratio'] < MIN_GLYPH_RATIO:
+        score['reason'] = 'unmapped glyphs'
+        return score
+    
+    if score['short_line_ratio'] < MIN_SHORT_LINE_RATIO or len(page.get_cdrawings()) < MIN_TABLE_DRAWINGS:
+        return score
+    if score['short_line_ratio'] >= TABLE_SHORT_LINE_RATIO:
+        score['reason'] = 'tables'
+        return score
+    
+    score['tables'] = 0
+    try:
+        score['tables'] = len(page.find_tables().tables)
+    except Exception as e:
+        print(f"Error detecting tables: {str(e)}")
+    if score['tables']:
+        score['reason'] = 'tables'
+    return score
+
+
+class _PageRouter:
+    """
+    Reads page text with PyMuPDF, re-reading poorly scoring pages with pdfplumber.
+    
+    pdfplumber opens the file on the first page that needs it and keeps it
+    open for the rest of the pass, parsing only the routed pages.
+    """
+    
+    def __init__(self, pdf_path: str, enabled: bool = True):
+        """
+        Initialize the router for one pass over a document.
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            enabled (bool): Whether pages are scored and routed at all
+        """
+        self.pdf_path = pdf_path
+        self.enabled = enabled
+        self.routed: Dict[int, str] = {}
+        self._pdf = None
+    
+    def page_text(self, page_num: int, page: fitz.Page) -> str:
+        """
+        Get the text of a page from the engine that reads it best.
+        
+        Args:
+            page_num (int): 1-based page number
+            page (fitz.Page): The open PyMuPDF page
+            
+        Returns:
+            str: Page text
+        """
+        text = page.get_text()
+        if not self.enabled:
+            return text
+        
+        reason = score_page(page, text)['reason']
+        if reason is None:
+            return text
+        
+        if self._pdf is None:
+            self._pdf = pdfplumber.open(self.pdf_path)
+        plumber_page = self._pdf.pages[page_num - 1]
+        fallback = plumber_page.extract_text() or ""
+        plumber_page.close()
+        self.routed[page_num] = reason
+        return fallback if fallback.strip() else text
+    
+    def close(self):
+        """Close pdfplumber if it was opened."""
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int,
+                        page_routing: bool = True) -> Tuple[List[Tuple[int, str]], Dict[int, str]]:
+    """
+    Extract the text of a range of pages (runs in a worker process).
+    
+    Each worker opens its own document, since fitz documents cannot be
+    shared between processes, and routes its own problem pages.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        start (int): First page index (0-based, inclusive)
+        end (int): Last page index (0-based, exclusive)
+        page_routing (bool): Whether poorly scoring pages are re-read with pdfplumber
+        
+    Returns:
+        Tuple: (page_number, text) pairs with 1-based page numbers, and
+        the routed page numbers with the reason
+    """
+    router = _PageRouter(pdf_path, page_routing)
+    try:
+        with fitz.open(pdf_path) as doc:
+            pages = [(page_index + 1, router.page_text(page_index + 1, doc[page_index]))
+                     for page_index in range(start, end)]
+    finally:
+        router.close()
+    return pages, router.routed
+
+
+def _split_pages(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    Split pages into contiguous, nearly equal (start, end) ranges.
+    
+    Args:
+        page_count (int): Number of pages
+        parts (int): Number of ranges wanted
+        
+    Returns:
+        List[Tuple[int, int]]: Page index ranges
+    """
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
 
 
 class PDFHandler:
@@ -22,68 +260,271 @@ class PDFHandler:
     using multiple approaches to ensure reliable extraction.
     """
     
-    def __init__(self):
-        """Initialize the PDF handler."""
+    def __init__(self, cache: Optional[PDFExtractionCache] = None, use_cache: bool = True,
+                 parallel_workers: Optional[int] = None, parallel_min_pages: Optional[int] = None,
+                 max_chars: Optional[int] = None, page_routing: Optional[bool] = None):
+        """
+        Initialize the PDF handler.
+        
+        Args:
+            cache (Optional[PDFExtractionCache]): Extraction cache, defaults to the shared cache
+            use_cache (bool): Whether to use an extraction cache at all
+            parallel_workers (Optional[int]): Worker processes for large PDFs,
+                defaults to PDF_PARALLEL_WORKERS (1 disables parallel extraction)
+            parallel_min_pages (Optional[int]): Page count from which parallel
+                extraction is used, defaults to PDF_PARALLEL_MIN_PAGES
+            max_chars (Optional[int]): Stop reading pages once this many characters
+                are gathered, defaults to PDF_MAX_CHARS (0 reads the whole document)
+            page_routing (Optional[bool]): Re-read poorly scoring pages with
+                pdfplumber, defaults to PDF_PAGE_ROUTING (true)
+        """
         self.extracted_text = None
         self.metadata = {}
+        self._summary = None
+        self._word_count = 0
+        self.truncated = False
+        self.routed_pages: Dict[int, str] = {}
+        self.cache = (cache or get_pdf_cache()) if use_cache else None
+        
+        if parallel_workers is None:
+            parallel_workers = int(os.getenv('PDF_PARALLEL_WORKERS', str(min(4, os.cpu_count() or 1))))
+        if parallel_min_pages is None:
+            parallel_min_pages = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '50'))
+        self.parallel_workers = max(1, parallel_workers)
+        self.parallel_min_pages = parallel_min_pages
+        
+        if max_chars is None:
+            max_chars = int(os.getenv('PDF_MAX_CHARS', '0'))
+        self.max_chars = max(0, max_chars)
+        
+        if page_routing is None:
+            page_routing = os.getenv('PDF_PAGE_ROUTING', 'true').lower() in ('1', 'true', 'yes')
+        self.page_routing = page_routing
     
-    def extract_text(self, pdf_path: str) -> Optional[str]:
+    def extract_text(self, pdf_path: str, max_chars: Optional[int] = None) -> Optional[str]:
         """
         Extract text content from a PDF file.
         
-        Tries PyMuPDF first for speed, falls back to pdfplumber
-        if extraction yields poor results.
+        Reads pages with PyMuPDF for speed and re-reads the pages it
+        handles poorly with pdfplumber. Results are cached by file
+        content, so re-uploads of the same PDF skip parsing.
         
         Args:
             pdf_path (str): Path to the PDF file
+            max_chars (Optional[int]): Stop once this many characters are
+                gathered, defaults to the handler's max_chars (0 = no limit)
             
         Returns:
             Optional[str]: Extracted text content, or None if extraction fails
         """
+        if max_chars is None:
+            max_chars = self.max_chars
+        
         try:
-            # Try PyMuPDF first (faster)
-            text = self._extract_with_pymupdf(pdf_path)
+            # Serve repeat uploads of the same file from the cache
+            cache_key = None
+            if self.cache:
+                variant = "-".join(([f"max{max_chars}"] if max_chars else []) +
+                                   ([] if self.page_routing else ["unrouted"]))
+                cache_key = self.cache.make_key(pdf_path, variant=variant)
+                entry = self.cache.get(cache_key)
+                if entry:
+                    self.extracted_text = entry['text']
+                    self.metadata = entry['metadata']
+                    self._summary = entry['summary']
+                    self.truncated = self._summary.get('truncated', False)
+                    # JSON turns the page numbers into strings
+                    self.routed_pages = {int(page): reason for page, reason in entry.get('routed_pages', {}).items()}
+                    return self.extracted_text
+            
+            # Large documents: split pages across processes. A bounded read
+            # only touches the first pages, so it stays serial.
+            text = None
+            if self.parallel_workers > 1 and not max_chars:
+                text = self._extract_parallel(pdf_path)
             
-            # If text is too short, try pdfplumber as fallback
-            if not text or len(text.strip()) < 50:
-                text = self._extract_with_pdfplumber(pdf_path)
+            if text is None:
+                # PyMuPDF, with problem pages re-read by pdfplumber
+                text = self._extract_with_pymupdf(pdf_path, max_chars)
+                
+                # Without page routing, re-read the whole document with
+                # pdfplumber if PyMuPDF found next to no text
+                if not self.page_routing and (not text or len(text.strip()) < 50):
+                    text = self._extract_with_pdfplumber(pdf_path, max_chars)
             
             self.extracted_text = text
+            self._summary = None
+            
+            if cache_key and text:
+                self.cache.put(cache_key, {
+                    'text': text,
+                    'metadata': self.metadata,
+                    'summary': self.get_summary(),
+                    'routed_pages': dict(self.routed_pages)
+                })
             return text
             
         except Exception as e:
             print(f"Error extracting text from PDF: {str(e)}")
             return None
     
-    def _extract_with_pymupdf(self, pdf_path: str) -> str:
+    def iter_pages(self, pdf_path: str) -> Iterator[Tuple[int, str]]:
         """
-        Extract text using PyMuPDF library.
+        Stream the text of a PDF one page at a time with PyMuPDF.
+        
+        Only the current page is held in memory. Pages that score poorly
+        are re-read with pdfplumber (see score_page) and recorded in
+        self.routed_pages. The document metadata (including the full page
+        count) is available in self.metadata as soon as the first page is
+        yielded. Closing the generator early closes the document.
         
         Args:
             pdf_path (str): Path to the PDF file
             
+        Yields:
+            Tuple[int, str]: (page_number, text) for each page with text,
+            page numbers 1-based
+        """
+        router = _PageRouter(pdf_path, self.page_routing)
+        self.routed_pages = router.routed
+        try:
+            with fitz.open(pdf_path) as doc:
+                # Store metadata
+                self.metadata = {
+                    'pages': doc.page_count,
+                    'title': doc.metadata.get('title', 'Unknown'),
+                    'author': doc.metadata.get('author', 'Unknown')
+                }
+                
+                for page_num, page in enumerate(doc, 1):
+                    text = router.page_text(page_num, page)
+                    if text.strip():
+                        yield page_num, text
+        finally:
+            router.close()
+    
+    def _join_pages(self, pages: Iterable[Tuple[int, str]], max_chars: int = 0) -> str:
+        """
+        Join page texts with page markers, counting words as pages arrive.
+        
+        Args:
+            pages (Iterable[Tuple[int, str]]): (page_number, text) pairs in order
+            max_chars (int): Stop after the page that reaches this many
+                characters (0 = read every page)
+            
         Returns:
             str: Extracted text content
         """
         text_content = []
+        char_count = 0
+        self._word_count = 0
+        self.truncated = False
+        
+        for page_num, text in pages:
+            chunk = f"--- Page {page_num} ---\n{text}"
+            text_content.append(chunk)
+            self._word_count += len(chunk.split())
+            char_count += len(chunk) + 2
+            
+            if max_chars and char_count >= max_chars:
+                self.truncated = page_num < self.metadata.get('pages', 0)
+                break
+        
+        # Stop a streaming source so its document is closed right away
+        if hasattr(pages, 'close'):
+            pages.close()
+        
+        return "\n\n".join(text_content)
+    
+    def _extract_with_pymupdf(self, pdf_path: str, max_chars: int = 0) -> str:
+        """
+        Extract text using PyMuPDF library.
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            max_chars (int): Character budget (0 = whole document)
+            
+        Returns:
+            str: Extracted text content
+        """
+        return self._join_pages(self.iter_pages(pdf_path), max_chars)
+    
+    def _extract_parallel(self, pdf_path: str) -> Optional[str]:
+        """
+        Extract a large PDF with PyMuPDF, splitting page ranges across processes.
+        
+        Workers route their own problem pages to pdfplumber. Without page
+        routing, pages that come back empty are retried individually with
+        pdfplumber, instead of re-running the whole file.
         
+        Args:
+            pdf_path (str): Path to the PDF file
+            
+        Returns:
+            Optional[str]: Extracted text, or None if the document is too
+            small for parallel extraction or the pool failed
+        """
         with fitz.open(pdf_path) as doc:
-            # Store metadata
-            self.metadata = {
-                'pages': len(doc),
+            page_count = len(doc)
+            metadata = {
+                'pages': page_count,
                 'title': doc.metadata.get('title', 'Unknown'),
                 'author': doc.metadata.get('author', 'Unknown')
             }
-            
-            # Extract text from each page
-            for page_num, page in enumerate(doc, 1):
-                text = page.get_text()
-                if text.strip():
-                    text_content.append(f"--- Page {page_num} ---\n{text}")
         
-        return "\n\n".join(text_content)
+        if page_count < self.parallel_min_pages:
+            return None
+        
+        try:
+            pool = _get_extraction_pool(self.parallel_workers)
+            futures = [
+                pool.submit(_extract_page_range, pdf_path, start, end, self.page_routing)
+                for start, end in _split_pages(page_count, self.parallel_workers)
+            ]
+            pages, routed = {}, {}
+            for future in futures:
+                range_pages, range_routed = future.result()
+                pages.update(range_pages)
+                routed.update(range_routed)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. MuPDF crashed on this document) - don't keep the broken pool
+            print(f"Parallel extraction failed, falling back to serial: {str(e)}")
+            _discard_extraction_pool(pool)
+            return None
+        except Exception as e:
+            print(f"Parallel extraction failed, falling back to serial: {str(e)}")
+            return None
+        
+        # Without page routing, retry only the empty pages with pdfplumber
+        empty_pages = [page_num for page_num, text in pages.items() if not text.strip()]
+        if empty_pages and not self.page_routing:
+            pages.update(self._extract_pages_with_pdfplumber(pdf_path, empty_pages))
+        
+        self.metadata = metadata
+        self.routed_pages = routed
+        return self._join_pages(
+            (page_num, pages[page_num]) for page_num in sorted(pages)
+            if pages[page_num] and pages[page_num].strip()
+        )
+    
+    def _extract_pages_with_pdfplumber(self, pdf_path: str, page_numbers: List[int]) -> Dict[int, str]:
+        """
+        Extract selected pages with pdfplumber.
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            page_numbers (List[int]): 1-based page numbers to extract
+            
+        Returns:
+            Dict[int, str]: Page number to extracted text
+        """
+        pages = {}
+        with pdfplumber.open(pdf_path) as pdf:
+            for page_num in page_numbers:
+                pages[page_num] = pdf.pages[page_num - 1].extract_text() or ""
+        return pages
     
-    def _extract_with_pdfplumber(self, pdf_path: str) -> str:
+    def _extract_with_pdfplumber(self, pdf_path: str, max_chars: int = 0) -> str:
         """
         Extract text using pdfplumber library (fallback method).
         
@@ -92,12 +533,11 @@ class PDFHandler:
         
         Args:
             pdf_path (str): Path to the PDF file
+            max_chars (int): Character budget (0 = whole document)
             
         Returns:
             str: Extracted text content
         """
-        text_content = []
-        
         with pdfplumber.open(pdf_path) as pdf:
             # Store metadata
             self.metadata = {
@@ -106,33 +546,39 @@ class PDFHandler:
                 'author': 'Unknown'
             }
             
-            # Extract text from each page
-            for page_num, page in enumerate(pdf.pages, 1):
-                text = page.extract_text()
-                if text and text.strip():
-                    text_content.append(f"--- Page {page_num} ---\n{text}")
-        
-        return "\n\n".join(text_content)
+            # Pages are parsed lazily, so an early exit skips the rest
+            def pages():
+                for page_num, page in enumerate(pdf.pages, 1):
+                    text = page.extract_text()
+                    if text and text.strip():
+                        yield page_num, text
+            
+            return self._join_pages(pages(), max_chars)
     
     def get_summary(self) -> Dict[str, any]:
         """
         Get a summary of the extracted PDF content.
         
+        Word counts are accumulated during extraction, so this never
+        re-scans the document text.
+        
         Returns:
             Dict: Summary information including word count, page count, etc.
         """
         if not self.extracted_text:
             return {}
         
-        words = self.extracted_text.split()
+        if self._summary is None:
+            self._summary = {
+                'word_count': self._word_count,
+                'character_count': len(self.extracted_text),
+                'pages': self.metadata.get('pages', 0),
+                'title': self.metadata.get('title', 'Unknown'),
+                'author': self.metadata.get('author', 'Unknown'),
+                'truncated': self.truncated
+            }
         
-        return {
-            'word_count': len(words),
-            'character_count': len(self.extracted_text),
-            'pages': self.metadata.get('pages', 0),
-            'title': self.metadata.get('title', 'Unknown'),
-            'author': self.metadata.get('author', 'Unknown')
-        }
+        return dict(self._summary)
     
     def validate_content(self) -> bool:
         """
@@ -151,6 +597,10 @@ class PDFHandler:
         """Reset the PDF handler state."""
         self.extracted_text = None
         self.metadata = {}
+        self._summary = None
+        self._word_count = 0
+        self.truncated = False
+        self.routed_pages = {}
 
 
 # Utility function for easy access
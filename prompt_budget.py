@@ -0,0 +1,264 @@
+"""
+Prompt Budget Module
+====================
+This module handles token accounting for the examiner's prompts.
+
+It provides:
+    - A local approximate token counter (no API call), with optional
+      exact counts from the SDK's count_tokens for prompts near a limit
+    - Per-prompt-kind budgets for the document excerpt, in tokens
+    - Per-model input budgets, enforced before a prompt is sent
+    - Per-session usage totals (input/output tokens by kind and model),
+      taken from the response's usage_metadata when available
+
+Dependencies:
+    - Standard library only (the SDK model is passed in by the caller)
+"""
+
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+
+# Rough characters per token for English text
+CHARS_PER_TOKEN = 4
+
+# Tokens of document text included in each kind of prompt
+DOCUMENT_TOKEN_BUDGETS = {
+    'analysis': 750,
+    'focus_areas': 625,
+    'question': 500,
+    'rephrase': 500,
+    'evaluation': 500,
+    'question_bank': 750,
+    'exam_questions': 1500,
+    'exam_grading': 1500,
+}
+
+# Maximum input tokens per call for each model
+MODEL_INPUT_BUDGETS = {
+    'gemini-2.5-flash': 8000,
+    'gemini-2.0-flash-lite': 8000,
+    'gemini-2.5-flash-lite': 8000,
+    'gemini-2.0-flash': 8000,
+    'gemini-2.5-pro': 32000,
+}
+DEFAULT_INPUT_BUDGET = 8000
+
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate the number of tokens in a text without calling the API.
+
+    Words count as one token per four characters (rounded up) and each
+    punctuation mark as one token, which tracks Gemini's tokenizer
+    closely enough for budgeting English prose.
+
+    Args:
+        text (str): Text to count
+
+    Returns:
+        int: Approximate token count
+    """
+    return sum((len(piece) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN for piece in TOKEN_PATTERN.findall(text or ""))
+
+
+def document_chars(kind: str) -> int:
+    """
+    Get the document excerpt size for a kind of prompt, in characters.
+
+    Args:
+        kind (str): Prompt kind (see DOCUMENT_TOKEN_BUDGETS)
+
+    Returns:
+        int: Maximum excerpt length in characters
+    """
+    return DOCUMENT_TOKEN_BUDGETS.get(kind, 500) * CHARS_PER_TOKEN
+
+
+class TokenCounter:
+    """
+    Counts prompt tokens and enforces per-model input budgets.
+
+    Counting is local by default. With use_sdk enabled, prompts whose
+    estimate is close to a model's budget are counted exactly with the
+    SDK's count_tokens (one extra request), so that prompts are only
+    trimmed when they really do not fit.
+    """
+
+    def __init__(self, use_sdk: bool = False, budgets: Optional[Dict[str, int]] = None,
+                 default_budget: int = DEFAULT_INPUT_BUDGET):
+        """
+        Initialize the counter.
+
+        Args:
+            use_sdk (bool): Use the SDK's count_tokens near the budget
+            budgets (Optional[Dict[str, int]]): Model name -> max input tokens
+            default_budget (int): Budget for models not in budgets
+        """
+        self.use_sdk = use_sdk
+        self.budgets = dict(MODEL_INPUT_BUDGETS if budgets is None else budgets)
+        self.default_budget = default_budget
+
+    def budget_for(self, model_name: str) -> int:
+        """
+        Get the input token budget of a model.
+
+        Args:
+            model_name (str): Model name
+
+        Returns:
+            int: Maximum input tokens per call
+        """
+        return self.budgets.get(model_name, self.default_budget)
+
+    def count(self, prompt: str, model: Any = None, model_name: str = "") -> int:
+        """
+        Count the tokens of a prompt.
+
+        Args:
+            prompt (str): Prompt text
+            model (Any): SDK model, used for exact counts when enabled
+            model_name (str): Model name, used to decide whether an exact count is needed
+
+        Returns:
+            int: Token count (exact if the SDK was used, otherwise approximate)
+        """
+        estimate = estimate_tokens(prompt)
+        if not self.use_sdk or model is None or estimate < 0.9 * self.budget_for(model_name):
+            return estimate
+
+        try:
+            return model.count_tokens(prompt).total_tokens
+        except Exception as e:
+            print(f"Error counting tokens with the SDK: {str(e)}")
+            return estimate
+
+    def fit(self, prompt: str, model_name: str, model: Any = None) -> str:
+        """
+        Trim a prompt to a model's input budget.
+
+        The middle of the prompt is cut, since prompts start with the
+        examiner persona and end with the instructions and output format,
+        while the document text and previous Q&A sit in between.
+
+        Args:
+            prompt (str): Prompt text
+            model_name (str): Model the prompt is sent to
+            model (Any): SDK model, used for exact counts when enabled
+
+        Returns:
+            str: The prompt, trimmed if it exceeded the budget
+        """
+        budget = self.budget_for(model_name)
+        tokens = self.count(prompt, model, model_name)
+        if tokens <= budget:
+            return prompt
+
+        marker = "\n\n[... trimmed to fit the input budget ...]\n\n"
+        keep = max(0, int(len(prompt) * (budget - estimate_tokens(marker)) / tokens))
+        head = keep * 2 // 5
+        print(f"Prompt of ~{tokens} tokens trimmed to the {budget}-token budget of {model_name}")
+        return prompt[:head] + marker + prompt[len(prompt) - (keep - head):]
+
+
+@dataclass
+class TokenUsage:
+    """
+    Token usage totals for one session.
+
+    Attributes:
+        calls: Number of successful model calls
+        input_tokens: Prompt tokens sent
+        output_tokens: Response tokens received
+        estimated_calls: Calls whose counts were estimated locally
+            (the response had no usage metadata)
+        by_kind: Prompt kind -> {'calls', 'input_tokens', 'output_tokens'}
+        by_model: Model name -> {'calls', 'input_tokens', 'output_tokens'}
+    """
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    estimated_calls: int = 0
+    by_kind: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    by_model: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, model_name: str, kind: str, prompt: str, response: Any) -> Dict[str, int]:
+        """
+        Record the tokens of one successful call.
+
+        Args:
+            model_name (str): Model that answered
+            kind (str): Prompt kind, e.g. 'question' or 'evaluation'
+            prompt (str): Prompt that was sent
+            response (Any): SDK response
+
+        Returns:
+            Dict[str, int]: 'input_tokens' and 'output_tokens' of the call
+        """
+        usage = getattr(response, 'usage_metadata', None)
+        input_tokens = getattr(usage, 'prompt_token_count', None)
+        output_tokens = getattr(usage, 'candidates_token_count', None)
+
+        estimated = not input_tokens
+        if estimated:
+            input_tokens = estimate_tokens(prompt)
+            try:
+                output_tokens = estimate_tokens(response.text)
+            except (ValueError, AttributeError):
+                output_tokens = 0
+
+        counts = {'input_tokens': int(input_tokens), 'output_tokens': int(output_tokens or 0)}
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += counts['input_tokens']
+            self.output_tokens += counts['output_tokens']
+            self.estimated_calls += 1 if estimated else 0
+            for group, key in ((self.by_kind, kind), (self.by_model, model_name)):
+                totals = group.setdefault(key, {'calls': 0, 'input_tokens': 0, 'output_tokens': 0})
+                totals['calls'] += 1
+                totals['input_tokens'] += counts['input_tokens']
+                totals['output_tokens'] += counts['output_tokens']
+        return counts
+
+    def get_totals(self) -> Dict:
+        """
+        Get a snapshot of the usage totals.
+
+        Returns:
+            Dict: Totals plus per-kind and per-model breakdowns
+        """
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'input_tokens': self.input_tokens,
+                'output_tokens': self.output_tokens,
+                'total_tokens': self.input_tokens + self.output_tokens,
+                'estimated_calls': self.estimated_calls,
+                'by_kind': {k: dict(v) for k, v in self.by_kind.items()},
+                'by_model': {k: dict(v) for k, v in self.by_model.items()}
+            }
+
+
+def create_token_counter() -> TokenCounter:
+    """
+    Create a TokenCounter configured from environment variables.
+
+    Environment variables:
+        PROMPT_COUNT_TOKENS_SDK: Count prompts near the budget with the SDK (default false)
+        PROMPT_MAX_INPUT_TOKENS: Input budget for every model, replacing the
+            per-model defaults (unset keeps MODEL_INPUT_BUDGETS)
+
+    Returns:
+        TokenCounter: Configured counter
+    """
+    use_sdk = os.getenv('PROMPT_COUNT_TOKENS_SDK', 'false').lower() in ('1', 'true', 'yes')
+    max_input_tokens = os.getenv('PROMPT_MAX_INPUT_TOKENS')
+    if max_input_tokens:
+        return TokenCounter(use_sdk=use_sdk, budgets={}, default_budget=int(max_input_tokens))
+    return TokenCounter(use_sdk=use_sdk)
@@ -0,0 +1,312 @@
+"""
+Question Bank Module
+====================
+This module stores pre-generated examination questions per document so
+that sessions can be served without spending live RPM quota.
+
+For each document (identified by the SHA-256 of its text) the bank holds
+several candidate questions per focus area, each with a rephrased version
+for the "rephrase" lifeline. Sessions draw questions at random, skipping
+ones they have already seen.
+
+Banks are built ahead of an exam window with the warm command:
+
+    python question_bank.py warm ./handouts --per-area 5
+
+Dependencies:
+    - sqlite3 (standard library)
+    - examiner_logic / pdf_handler (warm command only)
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# Bump when the question bank prompt changes
+BANK_VERSION = 3
+
+
+class QuestionBank:
+    """
+    SQLite-backed store of pre-generated questions and rephrasings.
+
+    A short-lived connection is opened per operation, so a single bank can
+    be shared by threads and by several worker processes.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the bank and create its table if needed.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS question_bank (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    document_hash TEXT NOT NULL,
+                    bank_version INTEGER NOT NULL,
+                    focus_index INTEGER NOT NULL,
+                    focus_area TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    rephrasing TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_question_bank_document "
+                "ON question_bank (document_hash, bank_version, focus_index)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection, commit on success and always close it."""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def has_bank(self, document_hash: str) -> bool:
+        """
+        Check whether questions have been generated for a document.
+
+        Args:
+            document_hash (str): SHA-256 of the document text
+
+        Returns:
+            bool: True if the document has at least one banked question
+        """
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT 1 FROM question_bank WHERE document_hash = ? AND bank_version = ? LIMIT 1",
+                    (document_hash, BANK_VERSION)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading question bank: {str(e)}")
+            return False
+        return row is not None
+
+    def store(self, document_hash: str, focus_index: int, focus_area: str,
+              items: Sequence[Tuple[str, str]]):
+        """
+        Replace the banked questions for one focus area of a document.
+
+        Args:
+            document_hash (str): SHA-256 of the document text
+            focus_index (int): Index of the focus area
+            focus_area (str): Focus area text the questions were generated for
+            items (Sequence[Tuple[str, str]]): (question, rephrasing) pairs
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM question_bank WHERE document_hash = ? AND bank_version = ? AND focus_index = ?",
+                (document_hash, BANK_VERSION, focus_index)
+            )
+            conn.executemany(
+                "INSERT INTO question_bank "
+                "(document_hash, bank_version, focus_index, focus_area, question, rephrasing, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(document_hash, BANK_VERSION, focus_index, focus_area, q, r, now) for q, r in items]
+            )
+
+    def get_candidates(self, document_hash: str, focus_index: int) -> List[Tuple[str, str]]:
+        """
+        Get all banked questions for one focus area of a document.
+
+        Args:
+            document_hash (str): SHA-256 of the document text
+            focus_index (int): Index of the focus area
+
+        Returns:
+            List[Tuple[str, str]]: (question, rephrasing) pairs
+        """
+        try:
+            with self._connect() as conn:
+                return conn.execute(
+                    "SELECT question, rephrasing FROM question_bank "
+                    "WHERE document_hash = ? AND bank_version = ? AND focus_index = ? ORDER BY id",
+                    (document_hash, BANK_VERSION, focus_index)
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error reading question bank: {str(e)}")
+            return []
+
+    def draw(self, document_hash: str, focus_index: int,
+             exclude: Sequence[str] = ()) -> Optional[Tuple[str, str]]:
+        """
+        Pick a random banked question not already seen in the session.
+
+        Args:
+            document_hash (str): SHA-256 of the document text
+            focus_index (int): Index of the focus area
+            exclude (Sequence[str]): Questions already asked or discarded
+
+        Returns:
+            Optional[Tuple[str, str]]: (question, rephrasing), or None if
+            the focus area has no unseen questions
+        """
+        seen = {q.strip().lower() for q in exclude}
+        candidates = [c for c in self.get_candidates(document_hash, focus_index)
+                      if c[0].strip().lower() not in seen]
+        if not candidates:
+            return None
+        with self._lock:
+            return self._rng.choice(candidates)
+
+    def get_stats(self) -> Dict:
+        """
+        Get bank statistics for monitoring.
+
+        Returns:
+            Dict: Number of banked documents and questions
+        """
+        try:
+            with self._connect() as conn:
+                documents, questions = conn.execute(
+                    "SELECT COUNT(DISTINCT document_hash), COUNT(*) FROM question_bank WHERE bank_version = ?",
+                    (BANK_VERSION,)
+                ).fetchone()
+        except sqlite3.Error:
+            documents, questions = None, None
+        return {'documents': documents, 'questions': questions}
+
+
+# Process-wide bank shared by every examiner
+_shared_bank: Optional[QuestionBank] = None
+_shared_lock = threading.Lock()
+
+
+def get_question_bank() -> Optional[QuestionBank]:
+    """
+    Get the process-wide question bank.
+
+    Environment variables:
+        QUESTION_BANK_ENABLED: Set to "false" to disable the bank (default true)
+        QUESTION_BANK_PATH: SQLite file (default <tmp>/examiner_ai/question_bank.db)
+
+    Returns:
+        Optional[QuestionBank]: Shared bank, or None if disabled
+    """
+    global _shared_bank
+    if os.getenv('QUESTION_BANK_ENABLED', 'true').lower() not in ('1', 'true', 'yes'):
+        return None
+
+    with _shared_lock:
+        if _shared_bank is None:
+            db_path = os.getenv(
+                'QUESTION_BANK_PATH',
+                os.path.join(tempfile.gettempdir(), 'examiner_ai', 'question_bank.db')
+            )
+            try:
+                _shared_bank = QuestionBank(db_path)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Error opening question bank: {str(e)}")
+                return None
+        return _shared_bank
+
+
+def warm_directory(directory: str, questions_per_area: int = 5, force: bool = False) -> int:
+    """
+    Build question banks for every PDF in a directory.
+
+    Each document is analyzed (which also fills the analysis cache) and
+    then banked, one request per focus area.
+
+    Args:
+        directory (str): Directory containing PDF files
+        questions_per_area (int): Questions to generate per focus area
+        force (bool): Rebuild banks that already exist
+
+    Returns:
+        int: Number of documents that failed
+    """
+    from dotenv import load_dotenv
+    from examiner_logic import create_examiner
+    from pdf_handler import PDFHandler
+
+    load_dotenv()
+    examiner = create_examiner()
+    failures = 0
+
+    pdf_files = sorted(name for name in os.listdir(directory) if name.lower().endswith('.pdf'))
+    for name in pdf_files:
+        pdf_path = os.path.join(directory, name)
+        title = os.path.splitext(name)[0]
+
+        handler = PDFHandler()
+        text = handler.extract_text(pdf_path)
+        if not text or not handler.validate_content():
+            print(f"❌ {name}: could not extract sufficient text")
+            failures += 1
+            continue
+
+        examiner.reset()
+        _, error = examiner.analyze_document(text, title)
+        if error:
+            print(f"❌ {name}: {error}")
+            failures += 1
+            continue
+
+        if not force and examiner.question_bank.has_bank(examiner.state.document_hash):
+            print(f"⏭️  {name}: bank already exists")
+            continue
+
+        count, error = examiner.build_question_bank(questions_per_area)
+        if error:
+            print(f"❌ {name}: {error}")
+            failures += 1
+        else:
+            print(f"✅ {name}: {count} questions banked")
+
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Manage pre-generated examination question banks.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    warm = subparsers.add_parser("warm", help="Generate question banks for a directory of PDFs")
+    warm.add_argument("directory", help="Directory containing PDF files")
+    warm.add_argument("--per-area", type=int, default=5, help="Questions per focus area (default 5)")
+    warm.add_argument("--force", action="store_true", help="Rebuild existing banks")
+
+    subparsers.add_parser("stats", help="Show question bank statistics")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "warm":
+        if get_question_bank() is None:
+            print("⚠️ Question bank is disabled (QUESTION_BANK_ENABLED=false).")
+            return 1
+        return 1 if warm_directory(args.directory, args.per_area, args.force) else 0
+
+    bank = get_question_bank()
+    print(bank.get_stats() if bank else "Question bank is disabled.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""
+Rate Limiter Module
+===================
+This module implements a client-side rate-limit scheduler for the Gemini
+models used by the examiner.
+
+Each model gets a token bucket seeded from its requests-per-minute limit
+(e.g. "30 RPM"). Before a request is sent, the scheduler picks the most
+preferred model that still has capacity, so saturated models are skipped
+without paying for a failed round trip. When every model is saturated the
+request waits (up to a bounded time) for the first model to free up.
+
+The scheduler is shared by all sessions in the process, since the quota
+belongs to the API key rather than to a single user.
+"""
+
+import asyncio
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+
+def parse_rpm(rpm_limit: str, default: float = 10.0) -> float:
+    """
+    Parse a requests-per-minute label such as "30 RPM".
+
+    Args:
+        rpm_limit (str): RPM label
+        default (float): Value to use if the label cannot be parsed
+
+    Returns:
+        float: Requests per minute
+    """
+    match = re.search(r'(\d+(?:\.\d+)?)', rpm_limit or "")
+    if match and float(match.group(1)) > 0:
+        return float(match.group(1))
+    return default
+
+
+def parse_retry_delay(error_str: str) -> Optional[float]:
+    """
+    Extract the server-suggested retry delay from a Gemini 429 error.
+
+    Args:
+        error_str (str): Error message
+
+    Returns:
+        Optional[float]: Delay in seconds, or None if not present
+    """
+    match = re.search(r'retry_delay\s*\{\s*seconds:\s*(\d+)', error_str)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """
+    Token bucket for a single model.
+
+    Holds up to one minute's worth of requests and refills continuously
+    at rpm / 60 tokens per second.
+    """
+
+    def __init__(self, rpm: float):
+        """
+        Initialize the bucket full.
+
+        Args:
+            rpm (float): Requests per minute allowed for the model
+        """
+        self.rpm = rpm
+        self.capacity = max(1.0, rpm)
+        self.refill_rate = rpm / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        """Add the tokens accrued since the last update."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        """
+        Take one token if available.
+
+        Returns:
+            bool: True if a request may be sent now
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if now < self.blocked_until or self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+    def time_until_available(self, now: Optional[float] = None) -> float:
+        """
+        Predict how long until a token is available.
+
+        Returns:
+            float: Seconds to wait (0 if available now)
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        refill_wait = max(0.0, (1.0 - self.tokens) / self.refill_rate) if self.refill_rate > 0 else float('inf')
+        return max(refill_wait, self.blocked_until - now, 0.0)
+
+    def penalize(self, cooldown: float, now: Optional[float] = None):
+        """
+        Mark the model as saturated after the server rejected a request.
+
+        Args:
+            cooldown (float): Seconds during which the model is skipped
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, now + cooldown)
+
+
+class RateLimitScheduler:
+    """
+    Routes requests to models that are predicted to have capacity.
+
+    Candidates are (model_name, rpm_limit) pairs in order of preference.
+    Buckets are created lazily the first time a model is seen.
+    """
+
+    def __init__(self, max_wait: float = 10.0, min_cooldown: float = 10.0, rpm_scale: float = 1.0):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_wait (float): Longest a request will wait for capacity
+            min_cooldown (float): Minimum time a model is skipped after a 429
+            rpm_scale (float): Multiplier for every model's RPM limit (e.g. a paid
+                tier, or a benchmark that is not bound by the free quota)
+        """
+        self.max_wait = max_wait
+        self.min_cooldown = min_cooldown
+        self.rpm_scale = rpm_scale
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._counters: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, model_name: str, rpm_limit: str) -> TokenBucket:
+        """Get or create the bucket for a model (caller must hold the lock)."""
+        bucket = self._buckets.get(model_name)
+        if bucket is None:
+            bucket = TokenBucket(parse_rpm(rpm_limit) * self.rpm_scale)
+            self._buckets[model_name] = bucket
+            self._counters[model_name] = {
+                'requests': 0, 'skipped': 0, 'rate_limited': 0,
+                'errors': 0, 'successes': 0, 'waits': 0, 'wait_seconds': 0.0
+            }
+        return bucket
+
+    def _try_pick(self, candidates: Sequence[Tuple[str, str]]) -> Tuple[Optional[int], float]:
+        """
+        Pick the first candidate with capacity.
+
+        Returns:
+            Tuple[Optional[int], float]: (candidate index or None, seconds until one frees up)
+        """
+        with self._lock:
+            now = time.monotonic()
+            skipped = []
+            for i, (model_name, rpm_limit) in enumerate(candidates):
+                if self._bucket(model_name, rpm_limit).try_acquire(now):
+                    for name in skipped:
+                        self._counters[name]['skipped'] += 1
+                    self._counters[model_name]['requests'] += 1
+                    return i, 0.0
+                skipped.append(model_name)
+
+            wait = min(
+                (self._buckets[name].time_until_available(now) for name, _ in candidates),
+                default=float('inf')
+            )
+            return None, wait
+
+    def _record_wait(self, candidates: Sequence[Tuple[str, str]], seconds: float):
+        """Count a wait against the most preferred candidate."""
+        with self._lock:
+            counters = self._counters[candidates[0][0]]
+            counters['waits'] += 1
+            counters['wait_seconds'] += seconds
+
+    def acquire(self, candidates: Sequence[Tuple[str, str]]) -> Optional[int]:
+        """
+        Reserve a request slot, waiting if every candidate is saturated.
+
+        Args:
+            candidates: (model_name, rpm_limit) pairs in order of preference
+
+        Returns:
+            Optional[int]: Index of the chosen candidate, or None if no
+            candidate frees up within max_wait
+        """
+        if not candidates:
+            return None
+
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            index, wait = self._try_pick(candidates)
+            if index is not None:
+                return index
+            if time.monotonic() + wait > deadline:
+                return None
+            self._record_wait(candidates, wait)
+            time.sleep(wait)
+
+    async def aacquire(self, candidates: Sequence[Tuple[str, str]]) -> Optional[int]:
+        """
+        Async variant of acquire that waits without blocking the event loop.
+
+        Args:
+            candidates: (model_name, rpm_limit) pairs in order of preference
+
+        Returns:
+            Optional[int]: Index of the chosen candidate, or None
+        """
+        if not candidates:
+            return None
+
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            index, wait = self._try_pick(candidates)
+            if index is not None:
+                return index
+            if time.monotonic() + wait > deadline:
+                return None
+            self._record_wait(candidates, wait)
+            await asyncio.sleep(wait)
+
+    def record_success(self, model_name: str):
+        """Record a successful request."""
+        with self._lock:
+            if model_name in self._counters:
+                self._counters[model_name]['successes'] += 1
+
+    def record_rate_limited(self, model_name: str, error_str: str = ""):
+        """
+        Record a 429 from the server and mark the model as saturated.
+
+        The model is skipped for the server-suggested retry delay if one is
+        present in the error, otherwise for the time one token takes to
+        refill (at least min_cooldown seconds).
+
+        Args:
+            model_name (str): Model that returned the 429
+            error_str (str): Error message from the SDK
+        """
+        with self._lock:
+            bucket = self._buckets.get(model_name)
+            if bucket is None:
+                return
+            cooldown = parse_retry_delay(error_str)
+            if cooldown is None:
+                cooldown = max(self.min_cooldown, 60.0 / bucket.rpm)
+            bucket.penalize(cooldown)
+            self._counters[model_name]['rate_limited'] += 1
+
+    def record_error(self, model_name: str):
+        """Record a failed request that was not a rate-limit error."""
+        with self._lock:
+            if model_name in self._counters:
+                self._counters[model_name]['errors'] += 1
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get per-model counters for monitoring.
+
+        Returns:
+            Dict: Model name -> counters plus current tokens and cooldown
+        """
+        with self._lock:
+            now = time.monotonic()
+            stats = {}
+            for model_name, counters in self._counters.items():
+                bucket = self._buckets[model_name]
+                bucket._refill(now)
+                stats[model_name] = dict(
+                    counters,
+                    rpm=bucket.rpm,
+                    tokens=round(bucket.tokens, 2),
+                    cooldown_seconds=round(max(0.0, bucket.blocked_until - now), 2)
+                )
+            return stats
+
+
+# Process-wide scheduler shared by every examiner
+_shared_scheduler: Optional[RateLimitScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """
+    Get the process-wide rate limit scheduler.
+
+    Environment variables:
+        RATE_LIMIT_MAX_WAIT: Seconds a request may wait for capacity (default 10)
+        RATE_LIMIT_RPM_SCALE: Multiplier for every model's RPM limit (default 1)
+
+    Returns:
+        RateLimitScheduler: Shared scheduler instance
+    """
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = RateLimitScheduler(
+                max_wait=float(os.getenv('RATE_LIMIT_MAX_WAIT', '10')),
+                rpm_scale=float(os.getenv('RATE_LIMIT_RPM_SCALE', '1'))
+            )
+        return _shared_scheduler
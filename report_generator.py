@@ -0,0 +1,434 @@
+"""
+Report Generator Module
+=======================
+This module renders examination session reports as PDF files.
+
+Paragraph and table styles are built once at import time instead of on
+every export. Reports are rendered into an in-memory buffer and written
+to a dedicated output directory, keyed by a hash of the report content,
+so exporting the same finished session again reuses the existing file.
+A janitor bounds the directory by file age and count after every write.
+
+Dependencies:
+    - reportlab: For PDF generation
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+
+# Session data fields that appear in the report (and so make up its cache key)
+REPORT_FIELDS = (
+    'document_title', 'total_questions', 'questions', 'answers', 'evaluations', 'marks',
+    'total_marks', 'max_marks', 'percentage', 'status', 'final_evaluation',
+    'lifelines_used', 'lifelines_total'
+)
+
+_SAMPLE_STYLES = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'ReportTitle',
+    parent=_SAMPLE_STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#2196F3'),
+    spaceAfter=30,
+    alignment=TA_CENTER,
+    fontName='Helvetica-Bold'
+)
+
+HEADING_STYLE = ParagraphStyle(
+    'ReportHeading',
+    parent=_SAMPLE_STYLES['Heading2'],
+    fontSize=14,
+    textColor=colors.HexColor('#1976D2'),
+    spaceAfter=12,
+    spaceBefore=12,
+    fontName='Helvetica-Bold'
+)
+
+# A copy, so the shared sample stylesheet is never modified
+NORMAL_STYLE = ParagraphStyle(
+    'ReportNormal',
+    parent=_SAMPLE_STYLES['Normal'],
+    fontSize=10,
+    leading=14
+)
+
+_INFO_TABLE_COMMANDS = [
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey)
+]
+
+DOCUMENT_TABLE_STYLE = TableStyle(
+    [('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#E3F2FD'))] + _INFO_TABLE_COMMANDS
+)
+
+# Results table per status (PASS / FAIL)
+RESULTS_TABLE_STYLES = {
+    status: TableStyle(
+        [('BACKGROUND', (0, 0), (0, -1), colors.HexColor(background))] + _INFO_TABLE_COMMANDS + [
+            ('TEXTCOLOR', (1, 2), (1, 2), status_color),
+            ('FONTNAME', (1, 2), (1, 2), 'Helvetica-Bold'),
+        ]
+    )
+    for status, background, status_color in (
+        ('PASS', '#E8F5E9', colors.green),
+        ('FAIL', '#FFEBEE', colors.red),
+    )
+}
+
+
+def _marks_box_style(color) -> TableStyle:
+    """Build the style of a per-question marks box."""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), color),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ])
+
+
+MARKS_BOX_STYLES = {
+    'high': _marks_box_style(colors.green),
+    'medium': _marks_box_style(colors.orange),
+    'low': _marks_box_style(colors.red),
+}
+
+
+def report_hash(session_data: Dict) -> str:
+    """
+    Hash the parts of the session data that appear in the report.
+
+    Args:
+        session_data (Dict): Data from ExaminerAI.get_session_data()
+
+    Returns:
+        str: Hex digest identifying the report content
+    """
+    content = {field: session_data.get(field) for field in REPORT_FIELDS}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def render_report(session_data: Dict, generated_at: Optional[datetime] = None) -> bytes:
+    """
+    Render a session report as PDF bytes.
+
+    Args:
+        session_data (Dict): Data from ExaminerAI.get_session_data()
+        generated_at (Optional[datetime]): Examination date shown in the report (default now)
+
+    Returns:
+        bytes: The PDF document
+    """
+    generated_at = generated_at or datetime.now()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    story = []
+
+    # Title
+    story.append(Paragraph("🎓 EXAMINATION REPORT", TITLE_STYLE))
+    story.append(Spacer(1, 0.2*inch))
+
+    # Document Information
+    story.append(Paragraph("📄 Document Information", HEADING_STYLE))
+    doc_info = [
+        ['Document Title:', session_data['document_title']],
+        ['Examination Date:', generated_at.strftime('%B %d, %Y at %H:%M')],
+        ['Total Questions:', str(session_data['total_questions'])],
+    ]
+    doc_table = Table(doc_info, colWidths=[2*inch, 4*inch])
+    doc_table.setStyle(DOCUMENT_TABLE_STYLE)
+    story.append(doc_table)
+    story.append(Spacer(1, 0.3*inch))
+
+    # Results Summary
+    story.append(Paragraph("📊 Results Summary", HEADING_STYLE))
+    status = session_data['status']
+    results = [
+        ['Total Marks:', f"{session_data['total_marks']}/{session_data['max_marks']}"],
+        ['Percentage:', f"{session_data['percentage']:.1f}%"],
+        ['Status:', status],
+        ['Lifelines Used:', f"{session_data['lifelines_used']}/{session_data['lifelines_total']}"],
+    ]
+    results_table = Table(results, colWidths=[2*inch, 4*inch])
+    results_table.setStyle(RESULTS_TABLE_STYLES['PASS' if status == 'PASS' else 'FAIL'])
+    story.append(results_table)
+    story.append(Spacer(1, 0.3*inch))
+
+    # Overall Evaluation
+    if session_data.get('final_evaluation'):
+        story.append(Paragraph("🎓 Overall Evaluation", HEADING_STYLE))
+        story.append(Paragraph(session_data['final_evaluation'].replace('**', ''), NORMAL_STYLE))
+        story.append(Spacer(1, 0.3*inch))
+
+    # Question-wise Breakdown
+    story.append(Paragraph("📝 Question-wise Performance", HEADING_STYLE))
+
+    for i, (question, answer, evaluation, mark) in enumerate(zip(
+        session_data['questions'],
+        session_data['answers'],
+        session_data['evaluations'],
+        session_data['marks']
+    ), 1):
+        # Question
+        story.append(Paragraph(f"<b>Question {i}:</b>", NORMAL_STYLE))
+        story.append(Paragraph(question, NORMAL_STYLE))
+        story.append(Spacer(1, 0.1*inch))
+
+        # Answer
+        story.append(Paragraph("<b>Your Answer:</b>", NORMAL_STYLE))
+        story.append(Paragraph(answer, NORMAL_STYLE))
+        story.append(Spacer(1, 0.1*inch))
+
+        # Evaluation and Marks
+        story.append(Paragraph("<b>Evaluation:</b>", NORMAL_STYLE))
+        story.append(Paragraph(evaluation.replace('**', ''), NORMAL_STYLE))
+
+        # Marks box
+        band = 'high' if mark >= 7 else 'medium' if mark >= 4 else 'low'
+        marks_table = Table([[f"Marks: {mark}/10"]], colWidths=[6*inch])
+        marks_table.setStyle(MARKS_BOX_STYLES[band])
+        story.append(marks_table)
+        story.append(Spacer(1, 0.2*inch))
+
+        if i < len(session_data['questions']):
+            story.append(Spacer(1, 0.1*inch))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def report_filename(session_data: Dict, generated_at: datetime, content_hash: str) -> str:
+    """
+    Build a readable, filesystem-safe filename for a report.
+
+    Args:
+        session_data (Dict): Data from ExaminerAI.get_session_data()
+        generated_at (datetime): Time the report was rendered
+        content_hash (str): Hash from report_hash()
+
+    Returns:
+        str: Filename
+    """
+    doc_title = re.sub(r'[^\w\-]+', '_', session_data.get('document_title') or 'Document').strip('_')[:60]
+    timestamp = generated_at.strftime('%Y%m%d_%H%M%S')
+    return f"Examination_Report_{doc_title}_{timestamp}_{content_hash[:8]}.pdf"
+
+
+class ReportGenerator:
+    """
+    Writes report files, reusing them for unchanged sessions.
+
+    Files live in a dedicated directory that is pruned after every write:
+    files older than max_age_seconds are removed, then the oldest files
+    until at most max_files remain.
+    """
+
+    def __init__(self, output_dir: str, max_files: int = 100, max_age_seconds: float = 3600):
+        """
+        Initialize the generator.
+
+        Args:
+            output_dir (str): Directory for report files
+            max_files (int): Maximum number of report files kept
+            max_age_seconds (float): Age after which report files are deleted
+        """
+        self.output_dir = output_dir
+        self.max_files = max(1, max_files)
+        self.max_age_seconds = max_age_seconds
+
+        self._paths: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def export(self, session_data: Dict) -> str:
+        """
+        Get a report file for a session, rendering it only if the content changed.
+
+        Args:
+            session_data (Dict): Data from ExaminerAI.get_session_data()
+
+        Returns:
+            str: Path to the PDF report
+        """
+        content_hash = report_hash(session_data)
+        path = self.lookup(content_hash)
+        if path:
+            return path
+
+        generated_at = datetime.now()
+        return self.store(content_hash, report_filename(session_data, generated_at, content_hash),
+                          render_report(session_data, generated_at))
+
+    def lookup(self, content_hash: str) -> Optional[str]:
+        """
+        Find the existing report file for a content hash.
+
+        Args:
+            content_hash (str): Hash from report_hash()
+
+        Returns:
+            Optional[str]: Path to the report, or None if it must be rendered
+        """
+        with self._lock:
+            path = self._paths.get(content_hash)
+            if path and os.path.exists(path):
+                self._paths.move_to_end(content_hash)
+                self.hits += 1
+                return path
+        return None
+
+    def store(self, content_hash: str, filename: str, pdf_bytes: bytes) -> str:
+        """
+        Save a rendered report and remember it for its content hash.
+
+        Args:
+            content_hash (str): Hash from report_hash()
+            filename (str): Filename from report_filename()
+            pdf_bytes (bytes): Rendered report
+
+        Returns:
+            str: Path to the report
+        """
+        path = self.write_file(filename, pdf_bytes)
+        with self._lock:
+            self.renders += 1
+            self._paths[content_hash] = path
+            self._paths.move_to_end(content_hash)
+            while len(self._paths) > self.max_files:
+                self._paths.popitem(last=False)
+        return path
+
+    def write_file(self, filename: str, data: bytes) -> str:
+        """
+        Write a file to the output directory, then prune the directory.
+
+        Args:
+            filename (str): Name of the file
+            data (bytes): File contents
+
+        Returns:
+            str: Path to the file
+        """
+        path = os.path.join(self.output_dir, filename)
+
+        # Write to a temporary file first so downloads never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.cleanup(keep=path)
+        return path
+
+    def cleanup(self, keep: Optional[str] = None) -> int:
+        """
+        Delete expired report files and the oldest ones beyond max_files.
+
+        Args:
+            keep (Optional[str]): A file that must not be deleted (the one just written)
+
+        Returns:
+            int: Number of files deleted
+        """
+        now = datetime.now().timestamp()
+        files = []
+        for name in os.listdir(self.output_dir):
+            path = os.path.join(self.output_dir, name)
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            # Leftover temporary files are only removed once they are old
+            if name.endswith('.tmp') and now - mtime < 60:
+                continue
+            files.append((mtime, path))
+
+        files.sort()
+        expired = [path for mtime, path in files if now - mtime > self.max_age_seconds]
+        surplus = max(0, len(files) - len(expired) - self.max_files)
+        expired += [path for _, path in files if path not in expired][:surplus]
+
+        deleted = 0
+        for path in expired:
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                deleted += 1
+            except OSError:
+                pass
+        return deleted
+
+    def get_stats(self) -> Dict:
+        """
+        Get report statistics for monitoring.
+
+        Returns:
+            Dict: Cache hits, renders and cached reports
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'renders': self.renders,
+                'cached_reports': len(self._paths)
+            }
+
+
+# Process-wide report generator shared by every session
+_shared_generator: Optional[ReportGenerator] = None
+_shared_lock = threading.Lock()
+
+
+def get_report_generator() -> ReportGenerator:
+    """
+    Get the process-wide report generator.
+
+    Environment variables:
+        REPORT_DIR: Directory for report files (default <tmp>/examiner_ai/reports)
+        REPORT_MAX_FILES: Report files kept on disk (default 100)
+        REPORT_MAX_AGE_MINUTES: Minutes before a report file is deleted (default 60)
+
+    Returns:
+        ReportGenerator: Shared generator
+    """
+    global _shared_generator
+    with _shared_lock:
+        if _shared_generator is None:
+            _shared_generator = ReportGenerator(
+                os.getenv('REPORT_DIR', os.path.join(tempfile.gettempdir(), 'examiner_ai', 'reports')),
+                max_files=int(os.getenv('REPORT_MAX_FILES', '100')),
+                max_age_seconds=float(os.getenv('REPORT_MAX_AGE_MINUTES', '60')) * 60
+            )
+        return _shared_generator
@@ -0,0 +1,458 @@
+"""
+Report Jobs Module
+==================
+This module renders PDF reports on a process pool, so that ReportLab
+work never runs on the threads serving exam turns.
+
+Jobs are created from snapshots of ExaminerAI.get_session_data() (plain
+dicts, safe to send to another process). A job either renders one report
+or exports a batch of sessions - e.g. a whole cohort for an instructor -
+as a single ZIP of reports or one merged PDF. Every job has a status
+that can be polled, and a future that resolves to the output file.
+
+Everything else a job does - hashing sessions, reading cached reports,
+collecting results and zipping or merging them - runs on one dedicated
+coordinator thread, so submitting a job returns at once and never
+blocks the caller (e.g. the Gradio event loop).
+
+Finished files are written through the shared ReportGenerator, so they
+benefit from its content-hash cache and directory janitor.
+
+Dependencies:
+    - report_generator: Rendering and report files
+    - fitz (PyMuPDF): Merging reports into one PDF
+"""
+
+import io
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import fitz
+
+from report_generator import ReportGenerator, get_report_generator, render_report, report_filename, report_hash
+
+
+# Batch export formats
+BATCH_FORMATS = ('zip', 'pdf')
+
+
+def _render(session_data: Dict, generated_at: float) -> bytes:
+    """Render one report in a worker process."""
+    return render_report(session_data, datetime.fromtimestamp(generated_at))
+
+
+def merge_pdfs(documents: List[bytes]) -> bytes:
+    """
+    Concatenate PDF documents into one.
+
+    Args:
+        documents (List[bytes]): PDF files, in order
+
+    Returns:
+        bytes: The merged PDF
+    """
+    merged = fitz.open()
+    try:
+        for data in documents:
+            with fitz.open(stream=data, filetype="pdf") as doc:
+                merged.insert_pdf(doc)
+        return merged.tobytes(garbage=3, deflate=True)
+    finally:
+        merged.close()
+
+
+def build_zip(files: List[Tuple[str, bytes]]) -> bytes:
+    """
+    Pack files into a ZIP archive.
+
+    Args:
+        files (List[Tuple[str, bytes]]): (filename, contents) pairs
+
+    Returns:
+        bytes: The ZIP archive
+    """
+    buffer = io.BytesIO()
+    # PDFs are already compressed
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for name, data in files:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+@dataclass
+class ReportJob:
+    """
+    Status of one report job.
+
+    Attributes:
+        job_id: Unique job identifier
+        kind: 'report' for a single session, or a batch format ('zip' / 'pdf')
+        total: Number of reports to render
+        status: 'queued', 'running', 'done' or 'failed'
+        completed: Reports rendered so far
+        failed: Reports that could not be rendered
+        path: Output file once the job is done
+        error: Error message if the job failed
+        created_at: Submission timestamp (seconds since epoch)
+        finished_at: Completion timestamp, if finished
+        result: Future resolving to the output path
+    """
+    job_id: str
+    kind: str
+    total: int
+    status: str = 'queued'
+    completed: int = 0
+    failed: int = 0
+    path: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    result: Future = field(default_factory=Future, repr=False, compare=False)
+
+    def to_dict(self) -> Dict:
+        """
+        Get the job status as a plain dict.
+
+        Returns:
+            Dict: Job fields other than the future
+        """
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'total': self.total,
+            'status': self.status,
+            'completed': self.completed,
+            'failed': self.failed,
+            'path': self.path,
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+
+
+class ReportJobQueue:
+    """
+    Process pool backed queue of report rendering jobs.
+
+    Reports whose content is already cached by the ReportGenerator are
+    not rendered again. Job records are kept for the most recent
+    max_jobs jobs.
+    """
+
+    def __init__(self, generator: ReportGenerator, max_workers: int = 2, max_jobs: int = 200):
+        """
+        Initialize the queue.
+
+        Args:
+            generator (ReportGenerator): Writes and caches report files
+            max_workers (int): Worker processes (0 renders on a single background thread)
+            max_jobs (int): Finished job records to keep for status queries
+        """
+        self.generator = generator
+        self.max_workers = max(0, max_workers)
+        self.max_jobs = max(1, max_jobs)
+
+        self._executor: Optional[Executor] = None
+        self._coordinator: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, ReportJob] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        """Get the worker pool, starting it on first use (workers are spawned, not forked from the server)."""
+        with self._lock:
+            if self._executor is None:
+                if self.max_workers:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-render")
+            return self._executor
+
+    def _discard_executor(self, executor: Executor):
+        """Drop a pool whose worker died, so the next render starts a new one."""
+        with self._lock:
+            if self._executor is not executor:
+                # Already replaced by another job
+                return
+            self._executor = None
+        print("Error in report workers: a worker process died, restarting the pool")
+        executor.shutdown(wait=False)
+
+    def _get_coordinator(self) -> ThreadPoolExecutor:
+        """Get the thread that orchestrates jobs, starting it on first use."""
+        with self._lock:
+            if self._coordinator is None:
+                self._coordinator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-coordinator")
+            return self._coordinator
+
+    def _coordinate(self, job: ReportJob, fn, *args):
+        """Run one step of a job on the coordinator thread, failing the job if it raises."""
+        def run():
+            try:
+                fn(*args)
+            except Exception as e:
+                self._finish(job, error=str(e))
+
+        try:
+            self._get_coordinator().submit(run)
+        except RuntimeError:
+            # Shutting down - finish the step here
+            run()
+
+    def _add_job(self, kind: str, total: int) -> ReportJob:
+        """Register a new job, forgetting the oldest finished ones."""
+        job = ReportJob(job_id=uuid.uuid4().hex, kind=kind, total=total)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            finished = [j for j in self._jobs.values() if j.finished_at is not None]
+            for old in sorted(finished, key=lambda j: j.finished_at)[:max(0, len(self._jobs) - self.max_jobs)]:
+                del self._jobs[old.job_id]
+        return job
+
+    def _finish(self, job: ReportJob, path: Optional[str] = None, error: Optional[str] = None):
+        """Mark a job as done or failed and resolve its future."""
+        with self._lock:
+            if job.finished_at is not None:
+                return
+            job.path = path
+            job.error = error
+            job.status = 'failed' if error else 'done'
+            job.finished_at = time.time()
+        if error:
+            print(f"Error in report job {job.job_id}: {error}")
+            job.result.set_exception(RuntimeError(error))
+        else:
+            job.result.set_result(path)
+
+    def _render_all(self, job: ReportJob, sessions: List[Dict], on_complete):
+        """
+        Render reports on the pool, then call on_complete with the results.
+
+        Runs on the coordinator thread, and so does on_complete. Cached
+        reports are read from disk instead of being rendered. If a worker
+        process dies, the pool is replaced and the report is retried once.
+
+        Args:
+            job (ReportJob): Job being processed
+            sessions (List[Dict]): Session data snapshots
+            on_complete: Called with [(content_hash, filename, pdf_bytes or None, cached path or None)]
+        """
+        generated_at = datetime.now()
+        results: List[Optional[Tuple]] = [None] * len(sessions)
+        remaining = [len(sessions)]
+
+        def record(index: int, content_hash: str, filename: str, data: Optional[bytes], path: Optional[str] = None):
+            with self._lock:
+                results[index] = (content_hash, filename, data, path)
+                if data is None:
+                    job.failed += 1
+                else:
+                    job.completed += 1
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                # Renders finish on the pool's management thread - hand back to the coordinator
+                self._coordinate(job, on_complete, results)
+
+        if not sessions:
+            on_complete([])
+            return
+
+        def start(index: int, session_data: Dict, content_hash: str, filename: str, retry: bool = True):
+            executor = self._get_executor()
+            try:
+                future = executor.submit(_render, session_data, generated_at.timestamp())
+            except BrokenProcessPool:
+                self._discard_executor(executor)
+                if retry:
+                    start(index, session_data, content_hash, filename, retry=False)
+                    return
+                print("Error submitting report: the report workers keep dying")
+                record(index, content_hash, filename, None)
+                return
+            except Exception as e:
+                print(f"Error submitting report: {str(e)}")
+                record(index, content_hash, filename, None)
+                return
+
+            def done(f: Future):
+                try:
+                    data = f.result()
+                except BrokenProcessPool as e:
+                    self._discard_executor(executor)
+                    if retry:
+                        # Resubmit from the coordinator, not the pool's management thread
+                        self._coordinate(job, start, index, session_data, content_hash, filename, False)
+                        return
+                    print(f"Error rendering report: {str(e)}")
+                    data = None
+                except Exception as e:
+                    print(f"Error rendering report: {str(e)}")
+                    data = None
+                record(index, content_hash, filename, data)
+
+            future.add_done_callback(done)
+
+        with self._lock:
+            job.status = 'running'
+        for index, session_data in enumerate(sessions):
+            content_hash = report_hash(session_data)
+            filename = report_filename(session_data, generated_at, content_hash)
+
+            cached = self.generator.lookup(content_hash)
+            if cached:
+                try:
+                    with open(cached, 'rb') as f:
+                        record(index, content_hash, os.path.basename(cached), f.read(), cached)
+                    continue
+                except OSError:
+                    pass
+
+            start(index, session_data, content_hash, filename)
+
+    def submit(self, session_data: Dict) -> ReportJob:
+        """
+        Queue the report of one session.
+
+        Returns at once; the job is processed on the coordinator thread.
+
+        Args:
+            session_data (Dict): Snapshot from ExaminerAI.get_session_data()
+
+        Returns:
+            ReportJob: The job; its result future resolves to the report path
+        """
+        job = self._add_job('report', 1)
+
+        def complete(results):
+            content_hash, filename, data, cached = results[0]
+            if data is None:
+                self._finish(job, error="The report could not be rendered.")
+                return
+            self._finish(job, path=cached or self.generator.store(content_hash, filename, data))
+
+        self._coordinate(job, self._render_all, job, [session_data], complete)
+        return job
+
+    def submit_batch(self, sessions: List[Dict], fmt: str = 'zip') -> ReportJob:
+        """
+        Queue the reports of many sessions as one ZIP or merged PDF.
+
+        Sessions whose report fails to render are left out and counted
+        in the job's 'failed' field. Returns at once; the job is processed
+        on the coordinator thread.
+
+        Args:
+            sessions (List[Dict]): Snapshots from ExaminerAI.get_session_data()
+            fmt (str): 'zip' or 'pdf'
+
+        Returns:
+            ReportJob: The job; its result future resolves to the output path
+
+        Raises:
+            ValueError: If the format is not supported
+        """
+        if fmt not in BATCH_FORMATS:
+            raise ValueError(f"Unsupported batch format '{fmt}', use one of {', '.join(BATCH_FORMATS)}")
+
+        job = self._add_job(fmt, len(sessions))
+
+        def complete(results):
+            rendered = [(filename, data) for _, filename, data, _ in results if data is not None]
+            if not rendered:
+                self._finish(job, error="No reports could be rendered.")
+                return
+
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            if fmt == 'zip':
+                # Prefix with the position so sessions on the same document stay distinct
+                files = [(f"{i:03d}_{filename}", data) for i, (filename, data) in enumerate(rendered, 1)]
+                output, name = build_zip(files), f"Examination_Reports_{timestamp}_{job.job_id[:8]}.zip"
+            else:
+                output = merge_pdfs([data for _, data in rendered])
+                name = f"Examination_Reports_{timestamp}_{job.job_id[:8]}.pdf"
+
+            self._finish(job, path=self.generator.write_file(name, output))
+
+        self._coordinate(job, self._render_all, job, list(sessions), complete)
+        return job
+
+    def get_status(self, job_id: str) -> Optional[Dict]:
+        """
+        Get the status of a job.
+
+        Args:
+            job_id (str): Job identifier
+
+        Returns:
+            Optional[Dict]: Job status, or None if the job is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def list_jobs(self) -> List[Dict]:
+        """
+        Get the status of all known jobs, newest first.
+
+        Returns:
+            List[Dict]: Job statuses
+        """
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+            return [job.to_dict() for job in jobs]
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the worker pool and the coordinator thread.
+
+        Args:
+            wait (bool): Wait for running renders and pending jobs to finish
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+        # After the pool, since finished renders still hand their results to the coordinator
+        with self._lock:
+            coordinator, self._coordinator = self._coordinator, None
+        if coordinator is not None:
+            coordinator.shutdown(wait=wait)
+
+
+# Process-wide job queue shared by every session
+_shared_queue: Optional[ReportJobQueue] = None
+_shared_lock = threading.Lock()
+
+
+def get_report_jobs() -> ReportJobQueue:
+    """
+    Get the process-wide report job queue.
+
+    Environment variables:
+        REPORT_WORKERS: Worker processes for rendering (default 2, 0 = background thread)
+        REPORT_JOB_HISTORY: Finished jobs kept for status queries (default 200)
+
+    Returns:
+        ReportJobQueue: Shared job queue
+    """
+    global _shared_queue
+    with _shared_lock:
+        if _shared_queue is None:
+            _shared_queue = ReportJobQueue(
+                get_report_generator(),
+                max_workers=int(os.getenv('REPORT_WORKERS', '2')),
+                max_jobs=int(os.getenv('REPORT_JOB_HISTORY', '200'))
+            )
+        return _shared_queue
@@ -0,0 +1,138 @@
+"""
+Request Queue Module
+====================
+This module configures the Gradio request queue for the examiner app.
+
+Events are grouped into concurrency tiers that share a limit:
+    - setup: PDF extraction plus the document analysis requests
+    - chat: answer evaluation, retries and lifelines (one or two LLM calls)
+    - export: PDF report rendering (CPU only)
+    - light: UI-only handlers such as reset and button toggles (unlimited)
+
+The LLM tier limits default to what the aggregate RPM quota of the flash
+models can sustain (Little's law: concurrent events = events per second x
+seconds per event), so a classroom burst waits in the queue - where Gradio
+shows each user their position - instead of piling onto the rate limiter.
+When the queue is full, new requests are rejected straight away.
+
+Dependencies:
+    - gradio (only the Blocks instance passed to apply())
+"""
+
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+# Sum of the RPM limits of the primary and fallback flash models
+DEFAULT_AGGREGATE_RPM = 75
+
+# (LLM calls, typical seconds) per event of each LLM tier
+TIER_PROFILES = {
+    'setup': (3, 10.0),
+    'chat': (2, 6.0),
+}
+
+
+def llm_concurrency(aggregate_rpm: float, calls_per_event: int, seconds_per_event: float) -> int:
+    """
+    Get the number of concurrent events a requests-per-minute quota sustains.
+
+    Args:
+        aggregate_rpm (float): Requests per minute across all models
+        calls_per_event (int): LLM calls made by one event
+        seconds_per_event (float): Typical duration of one event
+
+    Returns:
+        int: Concurrency limit (at least 1)
+    """
+    events_per_second = aggregate_rpm / 60 / max(1, calls_per_event)
+    return max(1, math.ceil(events_per_second * seconds_per_event))
+
+
+@dataclass
+class QueueSettings:
+    """
+    Queue size and per-tier concurrency limits.
+
+    Attributes:
+        max_size: Maximum queued requests before new ones are rejected (None = unbounded)
+        setup_concurrency: Concurrent PDF uploads being analyzed
+        chat_concurrency: Concurrent answer evaluations and lifelines
+        export_concurrency: Concurrent report exports
+        max_threads: Worker threads for synchronous handlers
+    """
+    max_size: Optional[int] = 64
+    setup_concurrency: int = 2
+    chat_concurrency: int = 4
+    export_concurrency: int = 2
+    max_threads: int = 40
+
+    def event_options(self, tier: str) -> Dict[str, Any]:
+        """
+        Get the event listener arguments for a tier.
+
+        Args:
+            tier (str): 'setup', 'chat', 'export' or 'light'
+
+        Returns:
+            Dict[str, Any]: concurrency_limit and concurrency_id for the event
+        """
+        limits = {
+            'setup': self.setup_concurrency,
+            'chat': self.chat_concurrency,
+            'export': self.export_concurrency,
+        }
+        if tier not in limits:
+            return {'concurrency_limit': None}
+        return {'concurrency_limit': limits[tier], 'concurrency_id': tier}
+
+    def apply(self, demo):
+        """
+        Enable the queue on a Gradio Blocks app.
+
+        Args:
+            demo (gr.Blocks): The app
+
+        Returns:
+            gr.Blocks: The same app, for chaining
+        """
+        return demo.queue(max_size=self.max_size, default_concurrency_limit=self.chat_concurrency)
+
+    def launch_options(self) -> Dict[str, Any]:
+        """
+        Get the demo.launch() arguments that depend on the queue settings.
+
+        Returns:
+            Dict[str, Any]: Launch keyword arguments
+        """
+        return {'max_threads': self.max_threads}
+
+
+def create_queue_settings() -> QueueSettings:
+    """
+    Create queue settings from environment variables.
+
+    Environment variables:
+        QUEUE_MAX_SIZE: Queued requests before rejecting new ones (default 64, 0 = unbounded)
+        QUEUE_AGGREGATE_RPM: RPM quota shared by the LLM tiers (default 75)
+        QUEUE_SETUP_CONCURRENCY: Concurrent PDF analyses (default derived from the RPM)
+        QUEUE_CHAT_CONCURRENCY: Concurrent evaluations/lifelines (default derived from the RPM)
+        QUEUE_EXPORT_CONCURRENCY: Concurrent report exports (default: CPU count)
+        QUEUE_MAX_THREADS: Worker threads for synchronous handlers (default 40)
+
+    Returns:
+        QueueSettings: Configured settings
+    """
+    aggregate_rpm = float(os.getenv('QUEUE_AGGREGATE_RPM', str(DEFAULT_AGGREGATE_RPM)))
+    derived = {tier: llm_concurrency(aggregate_rpm, *profile) for tier, profile in TIER_PROFILES.items()}
+    max_size = int(os.getenv('QUEUE_MAX_SIZE', '64'))
+
+    return QueueSettings(
+        max_size=max_size or None,
+        setup_concurrency=int(os.getenv('QUEUE_SETUP_CONCURRENCY', str(derived['setup']))),
+        chat_concurrency=int(os.getenv('QUEUE_CHAT_CONCURRENCY', str(derived['chat']))),
+        export_concurrency=int(os.getenv('QUEUE_EXPORT_CONCURRENCY', str(os.cpu_count() or 1))),
+        max_threads=int(os.getenv('QUEUE_MAX_THREADS', '40'))
+    )
@@ -0,0 +1,247 @@
+"""
+Retrieval Module
+================
+This module selects the parts of a document that are relevant to a
+question, so prompts can cover the whole document at a constant size.
+
+The extracted text is split into page-aware chunks using the
+"--- Page N ---" markers written by PDFHandler, and the chunks are
+indexed with BM25 (a local lexical ranking, no API calls). Prompts then
+include the top-ranked chunks for the current focus area or question
+instead of the first few thousand characters of the document.
+
+Indexes are kept in a small process-wide LRU keyed by document hash, so
+sessions examining the same document share one index.
+
+Dependencies:
+    - Standard library only
+"""
+
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List
+
+
+# Common words that carry no information for ranking
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further
+had has have having he her here hers herself him himself his how i if in into is it its itself
+just me more most my myself no nor not now of off on once only or other our ours ourselves out
+over own same she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when where which
+while who whom why will with would you your yours yourself yourselves
+""".split())
+
+PAGE_MARKER = re.compile(r'^--- Page (\d+) ---$', re.MULTILINE)
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms, dropping stopwords and single letters.
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        List[str]: Terms in order of appearance
+    """
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+@dataclass
+class Chunk:
+    """
+    A contiguous piece of a document.
+
+    Attributes:
+        index: Position of the chunk in the document
+        page: Page number the chunk starts on (0 if the text has no page markers)
+        text: Chunk text
+    """
+    index: int
+    page: int
+    text: str
+
+
+def split_into_chunks(document_text: str, max_chars: int = 800) -> List[Chunk]:
+    """
+    Split extracted text into chunks that never span a page boundary.
+
+    Pages are split on paragraph breaks, and paragraphs are packed into
+    chunks of up to max_chars characters (longer paragraphs are cut).
+
+    Args:
+        document_text (str): Text with "--- Page N ---" markers
+        max_chars (int): Maximum chunk size in characters
+
+    Returns:
+        List[Chunk]: Chunks in document order
+    """
+    pages = []
+    markers = list(PAGE_MARKER.finditer(document_text))
+    if not markers:
+        pages.append((0, document_text))
+    for i, marker in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(document_text)
+        pages.append((int(marker.group(1)), document_text[marker.end():end]))
+
+    chunks = []
+    for page, page_text in pages:
+        current = ""
+        for paragraph in re.split(r'\n\s*\n', page_text):
+            paragraph = paragraph.strip()
+            while len(paragraph) > max_chars:
+                if current:
+                    chunks.append(Chunk(len(chunks), page, current))
+                    current = ""
+                chunks.append(Chunk(len(chunks), page, paragraph[:max_chars]))
+                paragraph = paragraph[max_chars:].strip()
+            if not paragraph:
+                continue
+            if current and len(current) + len(paragraph) + 1 > max_chars:
+                chunks.append(Chunk(len(chunks), page, current))
+                current = ""
+            current = f"{current}\n{paragraph}" if current else paragraph
+        if current:
+            chunks.append(Chunk(len(chunks), page, current))
+
+    return chunks
+
+
+class DocumentIndex:
+    """
+    BM25 index over the chunks of one document.
+    """
+
+    def __init__(self, document_text: str, chunk_chars: int = 800, k1: float = 1.5, b: float = 0.75):
+        """
+        Chunk and index a document.
+
+        Args:
+            document_text (str): Text with "--- Page N ---" markers
+            chunk_chars (int): Maximum chunk size in characters
+            k1 (float): BM25 term frequency saturation
+            b (float): BM25 length normalization
+        """
+        self.chunks = split_into_chunks(document_text, chunk_chars)
+        self.k1 = k1
+        self.b = b
+
+        self._term_freqs: List[Counter] = []
+        document_freqs: Counter = Counter()
+        for chunk in self.chunks:
+            freqs = Counter(tokenize(chunk.text))
+            self._term_freqs.append(freqs)
+            document_freqs.update(freqs.keys())
+
+        self._lengths = [sum(freqs.values()) for freqs in self._term_freqs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+        n = len(self.chunks)
+        self._idf: Dict[str, float] = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_freqs.items()
+        }
+
+    def search(self, query: str, k: int = 3) -> List[Chunk]:
+        """
+        Rank chunks against a query.
+
+        Args:
+            query (str): Focus area, question or other search text
+            k (int): Number of chunks to return
+
+        Returns:
+            List[Chunk]: Up to k matching chunks, best first (empty if
+            no query term occurs in the document)
+        """
+        terms = [t for t in set(tokenize(query)) if t in self._idf]
+        if not terms or not self.chunks:
+            return []
+
+        scores = []
+        for i, freqs in enumerate(self._term_freqs):
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / (self._avg_length or 1))
+            score = 0.0
+            for term in terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((score, i))
+
+        scores.sort(key=lambda item: (-item[0], item[1]))
+        return [self.chunks[i] for _, i in scores[:k]]
+
+    def excerpt(self, query: str, max_chars: int = 2000, k: int = 3) -> str:
+        """
+        Build a prompt excerpt from the chunks most relevant to a query.
+
+        Chunks are shown in document order with their page numbers. If
+        nothing matches, the start of the document is used instead.
+
+        Args:
+            query (str): Focus area, question or other search text
+            max_chars (int): Maximum excerpt size in characters
+            k (int): Maximum number of chunks to include
+
+        Returns:
+            str: Excerpt text
+        """
+        selected = self.search(query, k) or self.chunks[:k]
+
+        # Keep the best chunks that fit the budget, then restore document order
+        chosen = []
+        used = 0
+        for chunk in selected:
+            size = len(chunk.text) + 20
+            if chosen and used + size > max_chars:
+                continue
+            chosen.append(chunk)
+            used += size
+
+        parts = []
+        for chunk in sorted(chosen, key=lambda c: c.index):
+            header = f"[Page {chunk.page}]\n" if chunk.page else ""
+            parts.append(f"{header}{chunk.text}")
+
+        return "\n\n".join(parts)[:max_chars]
+
+
+# Process-wide LRU of document indexes, keyed by document hash
+_index_cache: "OrderedDict[str, DocumentIndex]" = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def get_document_index(document_hash: str, document_text: str) -> DocumentIndex:
+    """
+    Get the index for a document, building it on first use.
+
+    Environment variables:
+        RETRIEVAL_CHUNK_CHARS: Maximum chunk size in characters (default 800)
+        RETRIEVAL_INDEX_CACHE_SIZE: Documents whose index is kept (default 32)
+
+    Args:
+        document_hash (str): SHA-256 of the document text
+        document_text (str): Document text, indexed on a cache miss
+
+    Returns:
+        DocumentIndex: Shared index for the document
+    """
+    with _index_lock:
+        index = _index_cache.get(document_hash)
+        if index is not None:
+            _index_cache.move_to_end(document_hash)
+            return index
+
+        index = DocumentIndex(document_text, chunk_chars=int(os.getenv('RETRIEVAL_CHUNK_CHARS', '800')))
+        _index_cache[document_hash] = index
+        while len(_index_cache) > max(1, int(os.getenv('RETRIEVAL_INDEX_CACHE_SIZE', '32'))):
+            _index_cache.popitem(last=False)
+        return index
+
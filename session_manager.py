@@ -0,0 +1,360 @@
+"""
+Session Manager Module
+======================
+This module keeps one examiner per browser session so that concurrent
+users never share (or overwrite) each other's examination state.
+
+Each Gradio session is identified by its session hash and owns its own
+ExaminerAI / PDFHandler pair. Idle sessions are evicted after a TTL and
+the registry enforces both a session-count cap and an approximate
+memory cap, evicting the least recently used sessions first.
+
+With a session store, sessions are checkpointed after every turn, and a
+session that is not in memory (evicted, or from before a restart) is
+rehydrated from its checkpoint, so eviction no longer ends an exam.
+
+Dependencies:
+    - examiner_logic: ExaminerAI instances
+    - pdf_handler: PDFHandler instances
+    - session_store: Persistence of session checkpoints
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from examiner_logic import ExaminerAI, create_examiner
+from model_backends import uses_fake_backend
+from pdf_handler import PDFHandler
+from session_store import SessionStore, get_session_store
+
+
+# Rough fixed cost of an idle session (objects, model handles, lists)
+SESSION_BASE_BYTES = 64 * 1024
+
+
+@dataclass
+class UserSession:
+    """
+    All per-user state for one browser session.
+
+    Attributes:
+        session_id: Gradio session hash identifying the browser session
+        examiner: The user's own ExaminerAI instance
+        pdf_handler: The user's own PDFHandler instance
+        session_active: Whether an examination is currently in progress
+        created_at: Creation timestamp (seconds since epoch)
+        last_access: Last time the session was used (seconds since epoch)
+        counted_memory: Estimate counted in the registry's memory total
+    """
+    session_id: str
+    examiner: ExaminerAI
+    pdf_handler: PDFHandler
+    session_active: bool = False
+    created_at: float = field(default_factory=time.time)
+    last_access: float = field(default_factory=time.time)
+    counted_memory: int = 0
+
+    def touch(self):
+        """Mark the session as used now."""
+        self.last_access = time.time()
+
+    def estimated_memory(self) -> int:
+        """
+        Estimate the memory held by this session.
+
+        Only the large, user-driven parts (document text and Q&A) are
+        counted; everything else is covered by a fixed base cost.
+
+        Returns:
+            int: Approximate size in bytes
+        """
+        state = self.examiner.state
+        size = SESSION_BASE_BYTES
+        size += sys.getsizeof(state.document_text)
+        size += sys.getsizeof(self.pdf_handler.extracted_text or "")
+        for items in (state.questions_asked, state.answers_given, state.evaluations):
+            size += sum(sys.getsizeof(item) for item in items)
+        return size
+
+
+class SessionRegistry:
+    """
+    Thread-safe registry of user sessions keyed by Gradio session hash.
+
+    Sessions are kept in least-recently-used order so that expiry and
+    cap enforcement only ever look at the oldest entries. The memory
+    total is kept as a running sum, refreshed for a session each time it
+    is fetched.
+    """
+
+    def __init__(self, api_key: str, ttl_seconds: float = 1800,
+                 max_sessions: int = 500, max_memory_mb: float = 512,
+                 store: Optional[SessionStore] = None):
+        """
+        Initialize the session registry.
+
+        Args:
+            api_key (str): Gemini API key used for every new examiner
+            ttl_seconds (float): Idle time after which a session is evicted
+            max_sessions (int): Maximum number of live sessions
+            max_memory_mb (float): Approximate memory budget for all sessions
+            store (Optional[SessionStore]): Where sessions are checkpointed and
+                rehydrated from (None keeps them in memory only)
+        """
+        self.api_key = api_key
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max(1, max_sessions)
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self.store = store
+
+        self._sessions: "OrderedDict[str, UserSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._memory_bytes = 0
+        self.evictions = 0
+        self.rehydrated = 0
+
+    def get(self, session_id: str) -> UserSession:
+        """
+        Get the session for a session id, creating it if needed.
+
+        A session that is not in memory is rehydrated from the store if it
+        has a checkpoint there. New sessions are built and rehydrated
+        outside the registry lock, so other users are not held up by the
+        store.
+
+        Args:
+            session_id (str): Gradio session hash
+
+        Returns:
+            UserSession: The (possibly new) session, marked as used
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                return self._use(session)
+
+        created = UserSession(
+            session_id=session_id,
+            examiner=create_examiner(self.api_key),
+            pdf_handler=PDFHandler()
+        )
+        rehydrated = self._rehydrate(created)
+
+        with self._lock:
+            # Another request for the same session may have won the race
+            session = self._sessions.get(session_id)
+            if session is not None:
+                return self._use(session)
+
+            self._sessions[session_id] = created
+            if rehydrated:
+                self.rehydrated += 1
+            return self._use(created)
+
+    def _use(self, session: UserSession) -> UserSession:
+        """Mark a registered session as used and apply the caps (caller must hold the lock)."""
+        self._sessions.move_to_end(session.session_id)
+        session.touch()
+
+        # The session may have grown since it was last counted
+        memory = session.estimated_memory()
+        self._memory_bytes += memory - session.counted_memory
+        session.counted_memory = memory
+
+        self._enforce_limits(keep=session.session_id)
+        return session
+
+    def _rehydrate(self, session: UserSession) -> bool:
+        """Restore a new session from its stored checkpoint, if any."""
+        if self.store is None:
+            return False
+
+        saved = self.store.load(session.session_id)
+        if not saved:
+            return False
+
+        try:
+            session.examiner.restore(saved['checkpoint'], saved['document_text'])
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Error restoring session {session.session_id}: {str(e)}")
+            session.examiner.reset()
+            return False
+
+        session.session_active = saved['active']
+        return True
+
+    def checkpoint(self, session: UserSession) -> bool:
+        """
+        Persist a session's progress (call after every turn).
+
+        A session without a document has nothing to resume, so its
+        checkpoint is dropped instead.
+
+        Args:
+            session (UserSession): The session to persist
+
+        Returns:
+            bool: True if a checkpoint was stored
+        """
+        if self.store is None:
+            return False
+
+        state = session.examiner.state
+        if not state.document_hash:
+            self.store.delete(session.session_id)
+            return False
+        return self.store.save(
+            session.session_id, session.examiner.checkpoint(), session.session_active,
+            state.document_hash, state.document_text
+        )
+
+    def remove(self, session_id: str) -> bool:
+        """
+        Drop a session immediately, including its stored checkpoint.
+
+        Args:
+            session_id (str): Gradio session hash
+
+        Returns:
+            bool: True if a session was removed
+        """
+        with self._lock:
+            removed = self._discard(session_id) is not None
+        if self.store is not None:
+            removed = self.store.delete(session_id) or removed
+        return removed
+
+    def evict_expired(self) -> int:
+        """
+        Evict all sessions idle for longer than the TTL.
+
+        Returns:
+            int: Number of sessions evicted
+        """
+        with self._lock:
+            return self._evict_expired()
+
+    def snapshot_session_data(self, min_answers: int = 1) -> List[Dict]:
+        """
+        Get report data for every live session, e.g. for a cohort export.
+
+        Args:
+            min_answers (int): Skip sessions with fewer evaluated answers
+
+        Returns:
+            List[Dict]: ExaminerAI.get_session_data() of each session, oldest first
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return [
+            session.examiner.get_session_data() for session in sessions
+            if len(session.examiner.state.marks) >= min_answers
+        ]
+
+    def _evict_expired(self, keep: Optional[str] = None) -> int:
+        """Evict expired sessions (caller must hold the lock)."""
+        cutoff = time.time() - self.ttl_seconds
+        evicted = 0
+
+        # Oldest sessions are at the front, so stop at the first fresh one
+        for session_id in list(self._sessions):
+            session = self._sessions[session_id]
+            if session.last_access >= cutoff:
+                break
+            if session_id == keep:
+                continue
+            self._discard(session_id)
+            evicted += 1
+
+        self.evictions += evicted
+        return evicted
+
+    def _enforce_limits(self, keep: Optional[str] = None):
+        """Apply TTL, session-count and memory caps (caller must hold the lock)."""
+        self._evict_expired(keep)
+
+        # Session count cap - drop least recently used first
+        while len(self._sessions) > self.max_sessions:
+            if not self._pop_oldest(keep):
+                break
+
+        # Memory cap - drop least recently used until under budget
+        while self._memory_bytes > self.max_memory_bytes and len(self._sessions) > 1:
+            if self._pop_oldest(keep) is None:
+                break
+
+    def _pop_oldest(self, keep: Optional[str] = None) -> Optional[UserSession]:
+        """Remove the least recently used session other than `keep`."""
+        for session_id in self._sessions:
+            if session_id != keep:
+                self.evictions += 1
+                return self._discard(session_id)
+        return None
+
+    def _discard(self, session_id: str) -> Optional[UserSession]:
+        """Remove a session and its share of the memory total (caller must hold the lock)."""
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._memory_bytes -= session.counted_memory
+        return session
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get_stats(self) -> Dict:
+        """
+        Get registry statistics for monitoring.
+
+        Returns:
+            Dict: Live sessions, active examinations, memory, evictions,
+            rehydrated sessions and store statistics
+        """
+        with self._lock:
+            stats = {
+                'sessions': len(self._sessions),
+                'active_examinations': sum(1 for s in self._sessions.values() if s.session_active),
+                'estimated_memory_mb': round(self._memory_bytes / (1024 * 1024), 2),
+                'evictions': self.evictions,
+                'rehydrated': self.rehydrated,
+                'max_sessions': self.max_sessions,
+                'ttl_seconds': self.ttl_seconds
+            }
+        stats['store'] = self.store.get_stats() if self.store is not None else None
+        return stats
+
+
+# Utility function for easy initialization
+def create_registry(api_key: Optional[str] = None) -> SessionRegistry:
+    """
+    Create a SessionRegistry configured from environment variables.
+
+    Environment variables:
+        SESSION_TTL_MINUTES: Idle minutes before a session is evicted (default 30)
+        MAX_SESSIONS: Maximum number of live sessions (default 500)
+        SESSION_MEMORY_MB: Approximate memory budget for sessions (default 512)
+        SESSION_STORE_*: Session persistence, see session_store.get_session_store
+
+    Args:
+        api_key (Optional[str]): API key, or None to use environment variable
+
+    Returns:
+        SessionRegistry: Configured session registry
+    """
+    if api_key is None:
+        api_key = os.getenv('GEMINI_API_KEY')
+
+    if not api_key and not uses_fake_backend():
+        raise ValueError("Gemini API key not found. Set GEMINI_API_KEY environment variable.")
+
+    return SessionRegistry(
+        api_key,
+        ttl_seconds=float(os.getenv('SESSION_TTL_MINUTES', '30')) * 60,
+        max_sessions=int(os.getenv('MAX_SESSIONS', '500')),
+        max_memory_mb=float(os.getenv('SESSION_MEMORY_MB', '512')),
+        store=get_session_store()
+    )
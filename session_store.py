@@ -0,0 +1,373 @@
+"""
+Session Store Module
+====================
+This module persists examination progress, so that in-flight exams
+survive restarts and redeploys and any worker sharing the store can
+serve any session.
+
+The app checkpoints each session after every turn: the examiner's
+ConversationState (see ExaminerAI.checkpoint) is stored as JSON, while
+the document text is stored once per content hash, so sessions on the
+same document share one copy. Sessions that are not in a worker's
+memory (after a restart, after LRU eviction, or started by another
+worker) are rehydrated from their checkpoint on first use.
+
+SQLiteSessionStore keeps everything in a local SQLite database in WAL
+mode. Other backends (e.g. a database shared by several hosts) subclass
+SessionStore and are passed to the SessionRegistry.
+
+Dependencies:
+    - sqlite3 (standard library)
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+# Expired sessions and unreferenced documents are pruned every this many checkpoints
+PRUNE_EVERY = 100
+
+
+class SessionStore(ABC):
+    """
+    Interface of a session persistence backend.
+
+    Implementations must be safe to share between threads.
+    """
+
+    @abstractmethod
+    def save(self, session_id: str, checkpoint: Dict, active: bool,
+             document_hash: str = "", document_text: str = "") -> bool:
+        """
+        Store the latest checkpoint of a session.
+
+        Args:
+            session_id (str): Gradio session hash
+            checkpoint (Dict): JSON-serializable examiner checkpoint
+            active (bool): Whether an examination is in progress
+            document_hash (str): SHA-256 of the document text
+            document_text (str): Document text, stored once per hash
+
+        Returns:
+            bool: True if the checkpoint was stored
+        """
+
+    @abstractmethod
+    def load(self, session_id: str) -> Optional[Dict]:
+        """
+        Load the latest checkpoint of a session.
+
+        Args:
+            session_id (str): Gradio session hash
+
+        Returns:
+            Optional[Dict]: 'checkpoint', 'active', 'document_text' and
+            'updated_at', or None if the session is unknown or expired
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """
+        Forget a session.
+
+        Args:
+            session_id (str): Gradio session hash
+
+        Returns:
+            bool: True if a session was deleted
+        """
+
+    def get_stats(self) -> Dict:
+        """
+        Get store statistics for monitoring.
+
+        Returns:
+            Dict: Backend-specific counters
+        """
+        return {}
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store in a local SQLite database (WAL mode).
+
+    A short-lived connection is opened per operation, so a single store
+    can be shared by threads and by several worker processes. Recently
+    loaded documents are kept in memory, so sessions rehydrated on the
+    same document share one string.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: float = 24 * 3600, document_cache_entries: int = 16):
+        """
+        Initialize the store and create its tables if needed.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+            ttl_seconds (float): Time since the last checkpoint after which a session is dropped
+            document_cache_entries (int): Documents kept in memory for rehydration
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.document_cache_entries = max(0, document_cache_entries)
+        self.saves = 0
+        self.loads = 0
+        self.errors = 0
+        self._documents: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    document_hash TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    document_hash TEXT,
+                    checkpoint TEXT NOT NULL,
+                    active INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_document ON sessions (document_hash)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection, commit on success and always close it."""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            # WAL keeps commits durable across crashes without a sync per write
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, session_id: str, checkpoint: Dict, active: bool,
+             document_hash: str = "", document_text: str = "") -> bool:
+        """
+        Store the latest checkpoint of a session.
+
+        Args:
+            session_id (str): Gradio session hash
+            checkpoint (Dict): JSON-serializable examiner checkpoint
+            active (bool): Whether an examination is in progress
+            document_hash (str): SHA-256 of the document text
+            document_text (str): Document text, stored once per hash
+
+        Returns:
+            bool: True if the checkpoint was stored
+        """
+        now = time.time()
+        try:
+            data = json.dumps(checkpoint)
+            with self._connect() as conn:
+                if document_hash and document_text:
+                    # Ignored when another session already stored the document
+                    conn.execute(
+                        "INSERT OR IGNORE INTO documents (document_hash, text, created_at) VALUES (?, ?, ?)",
+                        (document_hash, document_text, now)
+                    )
+                conn.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, document_hash, checkpoint, active, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (session_id, document_hash or None, data, int(active), now)
+                )
+                with self._lock:
+                    self.saves += 1
+                    prune = self.saves % PRUNE_EVERY == 0
+                if prune:
+                    self._prune(conn, now)
+            return True
+        except (TypeError, ValueError, sqlite3.Error) as e:
+            print(f"Error saving session checkpoint: {str(e)}")
+            with self._lock:
+                self.errors += 1
+            return False
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        """
+        Load the latest checkpoint of a session.
+
+        Args:
+            session_id (str): Gradio session hash
+
+        Returns:
+            Optional[Dict]: 'checkpoint', 'active', 'document_text' and
+            'updated_at', or None if the session is unknown or expired
+        """
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT checkpoint, active, document_hash, updated_at FROM sessions "
+                    "WHERE session_id = ? AND updated_at >= ?",
+                    (session_id, time.time() - self.ttl_seconds)
+                ).fetchone()
+                if not row:
+                    return None
+
+                document_text = ""
+                if row[2]:
+                    document_text = self._get_document(conn, row[2])
+                    if document_text is None:
+                        print(f"Error loading session checkpoint: document {row[2][:12]} is missing")
+                        return None
+            checkpoint = json.loads(row[0])
+        except (ValueError, sqlite3.Error) as e:
+            print(f"Error loading session checkpoint: {str(e)}")
+            with self._lock:
+                self.errors += 1
+            return None
+
+        with self._lock:
+            self.loads += 1
+        return {
+            'checkpoint': checkpoint,
+            'active': bool(row[1]),
+            'document_text': document_text,
+            'updated_at': row[3]
+        }
+
+    def _get_document(self, conn: sqlite3.Connection, document_hash: str) -> Optional[str]:
+        """Get a document's text, from memory if it was loaded recently."""
+        with self._lock:
+            text = self._documents.get(document_hash)
+            if text is not None:
+                self._documents.move_to_end(document_hash)
+                return text
+
+        row = conn.execute("SELECT text FROM documents WHERE document_hash = ?", (document_hash,)).fetchone()
+        if not row:
+            return None
+
+        with self._lock:
+            # Another thread may have loaded it meanwhile - share its copy
+            text = self._documents.setdefault(document_hash, row[0])
+            self._documents.move_to_end(document_hash)
+            while len(self._documents) > self.document_cache_entries:
+                self._documents.popitem(last=False)
+        return text
+
+    def delete(self, session_id: str) -> bool:
+        """
+        Forget a session.
+
+        Args:
+            session_id (str): Gradio session hash
+
+        Returns:
+            bool: True if a session was deleted
+        """
+        try:
+            with self._connect() as conn:
+                return conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount > 0
+        except sqlite3.Error as e:
+            print(f"Error deleting session checkpoint: {str(e)}")
+            return False
+
+    def prune(self) -> int:
+        """
+        Drop expired sessions and documents no session refers to.
+
+        Returns:
+            int: Number of sessions dropped
+        """
+        try:
+            with self._connect() as conn:
+                return self._prune(conn, time.time())
+        except sqlite3.Error as e:
+            print(f"Error pruning session store: {str(e)}")
+            return 0
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> int:
+        """Drop expired sessions and unreferenced documents."""
+        dropped = conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl_seconds,)).rowcount
+        conn.execute(
+            "DELETE FROM documents WHERE document_hash NOT IN ("
+            "SELECT document_hash FROM sessions WHERE document_hash IS NOT NULL)"
+        )
+        return dropped
+
+    def get_stats(self) -> Dict:
+        """
+        Get store statistics for monitoring.
+
+        Returns:
+            Dict: Stored sessions and documents, document bytes, checkpoints
+            saved, sessions loaded and errors
+        """
+        try:
+            with self._connect() as conn:
+                sessions = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+                documents, document_bytes = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(text AS BLOB))), 0) FROM documents"
+                ).fetchone()
+        except sqlite3.Error:
+            sessions = documents = document_bytes = None
+
+        with self._lock:
+            return {
+                'sessions': sessions,
+                'documents': documents,
+                'document_bytes': document_bytes,
+                'saves': self.saves,
+                'loads': self.loads,
+                'errors': self.errors
+            }
+
+
+# Process-wide store shared by the session registry
+_shared_store: Optional[SessionStore] = None
+_shared_lock = threading.Lock()
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """
+    Get the process-wide session store.
+
+    Environment variables:
+        SESSION_STORE_ENABLED: Set to "false" to keep sessions in memory only (default true)
+        SESSION_STORE_PATH: SQLite file (default <tmp>/examiner_ai/sessions.db)
+        SESSION_STORE_TTL_HOURS: Hours after the last turn that a session can be resumed (default 24)
+        SESSION_STORE_DOCUMENT_CACHE: Documents kept in memory for rehydration (default 16)
+
+    Returns:
+        Optional[SessionStore]: Shared store, or None if disabled
+    """
+    global _shared_store
+    if os.getenv('SESSION_STORE_ENABLED', 'true').lower() not in ('1', 'true', 'yes'):
+        return None
+
+    with _shared_lock:
+        if _shared_store is None:
+            db_path = os.getenv(
+                'SESSION_STORE_PATH',
+                os.path.join(tempfile.gettempdir(), 'examiner_ai', 'sessions.db')
+            )
+            try:
+                _shared_store = SQLiteSessionStore(
+                    db_path,
+                    ttl_seconds=float(os.getenv('SESSION_STORE_TTL_HOURS', '24')) * 3600,
+                    document_cache_entries=int(os.getenv('SESSION_STORE_DOCUMENT_CACHE', '16'))
+                )
+            except (OSError, sqlite3.Error) as e:
+                print(f"Error opening session store: {str(e)}")
+                return None
+        return _shared_store
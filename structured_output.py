@@ -0,0 +1,452 @@
+"""
+Structured Output Module
+========================
+This module defines the JSON responses the examiner asks Gemini for, and
+validates them before anything is recorded.
+
+Each response model carries the JSON schema that is sent as the
+request's response_schema (JSON mode), and a from_dict() that checks the
+parsed object. A response that does not validate is never patched up
+locally (e.g. marks are never defaulted): the caller may send one cheap
+repair request containing only the bad reply, and otherwise reports an
+error.
+
+Parse outcomes are counted per prompt kind so the failure rate can be
+monitored.
+
+Dependencies:
+    - Standard library only
+"""
+
+import json
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ResponseParseError(ValueError):
+    """Raised when a model response does not match its response model."""
+
+
+DOCUMENT_TYPES = (
+    "research_paper", "thesis", "proposal", "book_chapter", "book", "technical_report",
+    "essay", "case_study", "review_article", "tutorial", "topic", "general"
+)
+
+
+def _text(value: Any, name: str) -> str:
+    """Validate a non-empty string field."""
+    if not isinstance(value, str) or not value.strip():
+        raise ResponseParseError(f"'{name}' must be a non-empty string")
+    return value.strip()
+
+
+def _integer(value: Any, name: str, low: int, high: int) -> int:
+    """Validate an integer field within [low, high]."""
+    if isinstance(value, bool):
+        raise ResponseParseError(f"'{name}' must be an integer")
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value.strip())
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if not isinstance(value, int) or not low <= value <= high:
+        raise ResponseParseError(f"'{name}' must be an integer from {low} to {high}")
+    return value
+
+
+def _text_list(value: Any, name: str, minimum: int) -> List[str]:
+    """Validate a list of at least `minimum` non-empty strings."""
+    if not isinstance(value, list):
+        raise ResponseParseError(f"'{name}' must be a list")
+    items = [item.strip() for item in value if isinstance(item, str) and item.strip()]
+    if len(items) < minimum:
+        raise ResponseParseError(f"'{name}' must contain at least {minimum} non-empty strings, got {len(items)}")
+    return items
+
+
+@dataclass
+class DocumentAnalysis:
+    """
+    Document type and summary.
+
+    Attributes:
+        document_type: One of DOCUMENT_TYPES
+        summary: Short description of the document
+    """
+    document_type: str
+    summary: str
+
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "document_type": {"type": "string"},
+            "summary": {"type": "string"}
+        },
+        "required": ["document_type", "summary"]
+    }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DocumentAnalysis":
+        document_type = _text(data.get("document_type"), "document_type").lower()
+        if document_type not in DOCUMENT_TYPES:
+            raise ResponseParseError(f"'document_type' must be one of {', '.join(DOCUMENT_TYPES)}")
+        return cls(document_type, _text(data.get("summary"), "summary"))
+
+    def to_text(self) -> str:
+        """Render in the "**Type:** / **Summary:**" form shown to users."""
+        return f"**Type:** {self.document_type}\n**Summary:** {self.summary}"
+
+
+@dataclass
+class FocusAreas:
+    """
+    Subject-matter areas that questions should cover.
+
+    Attributes:
+        areas: Exactly five focus areas
+    """
+    areas: List[str]
+
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "focus_areas": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["focus_areas"]
+    }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FocusAreas":
+        return cls(_text_list(data.get("focus_areas"), "focus_areas", 5)[:5])
+
+
+@dataclass
+class Evaluation:
+    """
+    Marks and feedback for one answer.
+
+    Attributes:
+        marks: Score out of 10
+        feedback: Short constructive feedback (first in the JSON, so it can
+            be shown while the response is still streaming)
+    """
+    marks: int
+    feedback: str
+
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "feedback": {"type": "string"},
+            "marks": {"type": "integer"}
+        },
+        "required": ["feedback", "marks"]
+    }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Evaluation":
+        return cls(_integer(data.get("marks"), "marks", 0, 10), _text(data.get("feedback"), "feedback"))
+
+    def to_text(self) -> str:
+        """Render in the "**Marks: X/10**" form shown to users."""
+        return f"**Marks: {self.marks}/10**\n\n{self.feedback}"
+
+
+@dataclass
+class ExamQuestions:
+    """
+    The question set of an exam.
+
+    Attributes:
+        questions: Questions in the order they are asked
+    """
+    questions: List[str]
+
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "questions": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["questions"]
+    }
+
+    @classmethod
+    def from_dict(cls, data: Dict, question_count: int = 1) -> "ExamQuestions":
+        return cls(_text_list(data.get("questions"), "questions", question_count)[:question_count])
+
+
+@dataclass
+class QuestionBankItems:
+    """
+    Banked questions for one focus area.
+
+    Attributes:
+        items: (question, rephrasing) pairs
+    """
+    items: List[Tuple[str, str]]
+
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "questions": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "question": {"type": "string"},
+                        "rephrasing": {"type": "string"}
+                    },
+                    "required": ["question", "rephrasing"]
+                }
+            }
+        },
+        "required": ["questions"]
+    }
+
+    @classmethod
+    def from_dict(cls, data: Dict, question_count: int = 1) -> "QuestionBankItems":
+        questions = data.get("questions")
+        if not isinstance(questions, list):
+            raise ResponseParseError("'questions' must be a list")
+
+        items = []
+        for item in questions:
+            if not isinstance(item, dict):
+                raise ResponseParseError("each question must be an object")
+            items.append((_text(item.get("question"), "question"), _text(item.get("rephrasing"), "rephrasing")))
+
+        if len(items) < question_count:
+            raise ResponseParseError(f"'questions' must contain at least {question_count} questions, got {len(items)}")
+        return cls(items[:question_count])
+
+
+@dataclass
+class ExamGrading:
+    """
+    Marks and feedback for every exam answer, plus the overall evaluation.
+
+    Attributes:
+        results: (marks, feedback) per question, in question order
+        overall_evaluation: Final evaluation of the whole exam
+    """
+    results: List[Tuple[int, str]]
+    overall_evaluation: str
+
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "question_number": {"type": "integer"},
+                        "marks": {"type": "integer"},
+                        "feedback": {"type": "string"}
+                    },
+                    "required": ["question_number", "marks", "feedback"]
+                }
+            },
+            "overall_evaluation": {"type": "string"}
+        },
+        "required": ["results", "overall_evaluation"]
+    }
+
+    @classmethod
+    def from_dict(cls, data: Dict, question_count: int = 1) -> "ExamGrading":
+        results = data.get("results")
+        if not isinstance(results, list):
+            raise ResponseParseError("'results' must be a list")
+
+        graded = {}
+        for result in results:
+            if not isinstance(result, dict):
+                raise ResponseParseError("each result must be an object")
+            number = _integer(result.get("question_number"), "question_number", 1, question_count)
+            graded[number] = Evaluation.from_dict(result)
+
+        missing = [str(n) for n in range(1, question_count + 1) if n not in graded]
+        if missing:
+            raise ResponseParseError(f"missing results for questions {', '.join(missing)}")
+
+        return cls(
+            [(graded[n].marks, graded[n].feedback) for n in range(1, question_count + 1)],
+            _text(data.get("overall_evaluation"), "overall_evaluation")
+        )
+
+
+def generation_config(response_model: type) -> Dict:
+    """
+    Get the JSON-mode generation config for a response model.
+
+    Args:
+        response_model (type): Response model class
+
+    Returns:
+        Dict: SDK generation config
+    """
+    return {"response_mime_type": "application/json", "response_schema": response_model.SCHEMA}
+
+
+def parse_response(text: str, response_model: type, **constraints):
+    """
+    Parse and validate a JSON response.
+
+    Tolerates a Markdown code fence or text around the JSON object, which
+    some fallback models add despite JSON mode.
+
+    Args:
+        text (str): Model response
+        response_model (type): Response model class
+        **constraints: Extra arguments for the model's from_dict (e.g. question_count)
+
+    Returns:
+        The validated response model instance
+
+    Raises:
+        ResponseParseError: If the response is not valid JSON or does not validate
+    """
+    text = (text or "").strip()
+    fenced = re.search(r'```(?:json)?\s*(.*?)```', text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1).strip()
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end < start:
+        raise ResponseParseError("response is not a JSON object")
+
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError as e:
+        raise ResponseParseError(f"invalid JSON: {str(e)}")
+    if not isinstance(data, dict):
+        raise ResponseParseError("response is not a JSON object")
+
+    return response_model.from_dict(data, **constraints)
+
+
+def partial_string_field(text: str, name: str) -> str:
+    """
+    Read a string field from an incomplete JSON response.
+
+    Used while a response is streaming, to show e.g. the feedback before
+    the object is complete. Escapes cut off at the end are dropped.
+
+    Args:
+        text (str): JSON received so far
+        name (str): Field name
+
+    Returns:
+        str: The field's value so far, or "" if it has not started
+    """
+    match = re.search(r'"' + re.escape(name) + r'"\s*:\s*"', text or "")
+    if not match:
+        return ""
+
+    raw = []
+    escaped = False
+    for char in text[match.end():]:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '"':
+            break
+        raw.append(char)
+
+    value = "".join(raw)
+    # Drop an escape sequence that has not fully arrived
+    if escaped:
+        value = value[:-1]
+    value = re.sub(r'\\u[0-9a-fA-F]{0,3}$', '', value)
+    try:
+        return json.loads(f'"{value}"')
+    except ValueError:
+        return value.replace('\\n', '\n').replace('\\"', '"')
+
+
+def build_repair_prompt(text: str, response_model: type, problem: str) -> str:
+    """
+    Build a short prompt asking the model to fix an invalid response.
+
+    Only the bad reply is sent back (not the original prompt), so a
+    repair costs a fraction of the original call.
+
+    Args:
+        text (str): The invalid response
+        response_model (type): Response model class
+        problem (str): Why validation failed
+
+    Returns:
+        str: Repair prompt
+    """
+    return f"""The reply below was supposed to be a JSON object matching this schema, but it could not be used: {problem}
+
+Schema:
+{json.dumps(response_model.SCHEMA)}
+
+Reply:
+{text[:4000]}
+
+Rewrite the reply as a single JSON object that matches the schema. Keep its content and judgements; do not invent information that is not in the reply.
+Respond with ONLY the JSON object."""
+
+
+class ParseStats:
+    """
+    Thread-safe counters of structured response parsing per prompt kind.
+    """
+
+    def __init__(self):
+        """Initialize empty counters."""
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, outcome: str):
+        """
+        Record the outcome of parsing one response.
+
+        Args:
+            kind (str): Prompt kind
+            outcome (str): 'parsed' (first try), 'repaired' or 'failed'
+        """
+        with self._lock:
+            counters = self._counters.setdefault(kind, {'parsed': 0, 'repaired': 0, 'failed': 0})
+            counters[outcome] += 1
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get per-kind counters and rates for monitoring.
+
+        Returns:
+            Dict: Prompt kind -> counters, parse_failure_rate (first attempts
+            that did not validate) and failure_rate (after repair)
+        """
+        with self._lock:
+            stats = {}
+            for kind, counters in self._counters.items():
+                total = sum(counters.values())
+                stats[kind] = dict(
+                    counters,
+                    parse_failure_rate=round((counters['repaired'] + counters['failed']) / total, 4) if total else 0.0,
+                    failure_rate=round(counters['failed'] / total, 4) if total else 0.0
+                )
+            return stats
+
+
+# Process-wide parse statistics shared by every examiner
+_shared_stats: Optional[ParseStats] = None
+_shared_lock = threading.Lock()
+
+
+def get_parse_stats() -> ParseStats:
+    """
+    Get the process-wide parse statistics.
+
+    Returns:
+        ParseStats: Shared statistics instance
+    """
+    global _shared_stats
+    with _shared_lock:
+        if _shared_stats is None:
+            _shared_stats = ParseStats()
+        return _shared_stats